@@ -0,0 +1,6 @@
+"""Общий код правил и алгоритмов лабиринта для настольного (stage1) и веб (stage2) приложений.
+
+Карты здесь хранятся компактно: bytearray по одному байту на клетку,
+индекс y * width + x (строка y = 0 — нижняя), значение — 3-битный код
+типа клетки, как в CellType.
+"""
@@ -0,0 +1,241 @@
+"""Каталог готовых миссий 5x5 по сложности.
+
+Миссия — карта 5x5, как у «Нового лабиринта»: робот в (0, 0) на дороге,
+остальные 24 клетки — дороги и ровно десять особых клеток (MISSION_CELLS).
+Таких раскладок около 1.5e11, поэтому каталог строится выборкой: процессы
+пула раскладывают клетки случайно, решают миссию точным поиском
+(maze_core.solver) и возвращают раскладку с длиной кратчайшего решения
+(0 — миссия невыполнима). Повторы отбрасываются.
+
+Формат файла (little-endian):
+    заголовок   CATALOG_HEADER: магия, версия, число опробованных раскладок,
+                число записей, наибольшая длина решения L
+    смещения    L + 2 чисел uint32: записи длины l лежат в [offsets[l], offsets[l + 1])
+    записи      по RECORD_SIZE байт — клетки, упакованные savefile.pack_cells,
+                отсортированы по длине решения (сначала невыполнимые)
+    CRC32       контрольная сумма всего, что выше
+
+Уровень сложности — около трети выполнимых записей по порядку длины;
+границы уровней проходят между длинами решения (по смещениям), поэтому
+уровни не пересекаются по длине. Случайная миссия уровня — одно случайное
+число и один срез, без генерации и проверки карт во время игры.
+
+Собранный каталог (CATALOG_PATH) лежит в репозитории. Если файла нет или
+он повреждён, random_mission перебирает случайные раскладки и отдаёт
+первую, которую решатель признал выполнимой, — так игра никогда не выдаёт
+невыполнимую карту, только без выбора сложности.
+
+Пример: python -m maze_core.catalog --samples 200000 --workers 4
+"""
+import argparse
+import os
+import random
+import struct
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from maze_core.cells import BARRIER, FILLED, FINISH, FIRE, POST
+from maze_core.savefile import pack_cells, unpack_cells, write_atomic
+from maze_core.solver import solve_mission
+
+SIZE = 5
+CELL_COUNT = SIZE * SIZE
+MISSION_CELLS = (FIRE,) * 3 + (FILLED,) * 2 + (BARRIER,) * 2 + (POST,) * 2 + (FINISH,)
+
+CATALOG_MAGIC = b"RFCAT"
+CATALOG_VERSION = 1
+CATALOG_HEADER = struct.Struct("<5sBIII")
+CATALOG_CRC = struct.Struct("<I")
+# 25 клеток по 3 бита и ведущая единица pack_cells — 76 бит
+RECORD_SIZE = 10
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "missions_5x5.cat")
+
+# Раскладок на одну задачу пула
+CHUNK_SAMPLES = 2000
+
+LEVELS = ("easy", "medium", "hard")
+LEVEL_NAMES = {"easy": "Лёгкая", "medium": "Средняя", "hard": "Сложная"}
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class Mission(NamedTuple):
+    grid: bytearray  # коды клеток без бита робота, индекс y * 5 + x
+    length: int      # длина кратчайшего решения (действий)
+
+
+def random_layout(rng: random.Random) -> bytearray:
+    """Случайная раскладка миссии (как RobotMaze.create_random_maze_5x5)"""
+    positions = list(range(1, CELL_COUNT))
+    rng.shuffle(positions)
+    grid = bytearray(CELL_COUNT)
+    for position, code in zip(positions, MISSION_CELLS):
+        grid[position] = code
+    return grid
+
+
+def _sample_chunk(seed: int, count: int) -> bytes:
+    """Задача процесса пула: count раскладок по RECORD_SIZE байт и байт длины решения после каждой"""
+    rng = random.Random(seed)
+    out = bytearray()
+    for _ in range(count):
+        grid = random_layout(rng)
+        actions = solve_mission(SIZE, SIZE, grid, (0, 0))
+        out += pack_cells(bytes(grid))
+        out.append(len(actions) if actions is not None else 0)
+    return bytes(out)
+
+
+def build_catalog(samples: int, workers: Optional[int] = None, seed: Optional[int] = None,
+                  progress: Progress = None) -> bytes:
+    """Опробует samples случайных раскладок в пуле процессов; возвращает содержимое файла каталога"""
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    chunks = [min(CHUNK_SAMPLES, samples - start) for start in range(0, samples, CHUNK_SAMPLES)]
+    lengths = {}
+    done = 0
+    step = RECORD_SIZE + 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        seeds = [(seed << 24) + number for number in range(len(chunks))]
+        for block in pool.map(_sample_chunk, seeds, chunks):
+            for start in range(0, len(block), step):
+                lengths[block[start:start + RECORD_SIZE]] = block[start + RECORD_SIZE]
+            done += len(block) // step
+            if progress:
+                progress(done, samples)
+
+    records = sorted(lengths.items(), key=lambda item: (item[1], item[0]))
+    max_length = records[-1][1] if records else 0
+    offsets = [0] * (max_length + 2)
+    for _, length in records:
+        offsets[length + 1] += 1
+    for length in range(1, len(offsets)):
+        offsets[length] += offsets[length - 1]
+
+    data = CATALOG_HEADER.pack(CATALOG_MAGIC, CATALOG_VERSION, samples, len(records), max_length)
+    data += struct.pack(f"<{len(offsets)}I", *offsets)
+    data += b"".join(layout for layout, _ in records)
+    return data + CATALOG_CRC.pack(zlib.crc32(data))
+
+
+class MissionCatalog:
+    def __init__(self, data: bytes):
+        if len(data) < CATALOG_HEADER.size + CATALOG_CRC.size:
+            raise ValueError("Файл каталога обрезан")
+        body, (crc,) = data[:-CATALOG_CRC.size], CATALOG_CRC.unpack(data[-CATALOG_CRC.size:])
+        if zlib.crc32(body) != crc:
+            raise ValueError("Каталог повреждён: не совпадает контрольная сумма")
+        magic, version, self.samples, count, max_length = CATALOG_HEADER.unpack_from(body)
+        if magic != CATALOG_MAGIC or version != CATALOG_VERSION:
+            raise ValueError("Неизвестный формат каталога")
+        start = CATALOG_HEADER.size
+        self.offsets: Tuple[int, ...] = struct.unpack_from(f"<{max_length + 2}I", body, start)
+        start += 4 * len(self.offsets)
+        self.records = body[start:]
+        if len(self.records) != count * RECORD_SIZE or self.offsets[-1] != count:
+            raise ValueError("Каталог повреждён: число записей не совпадает с заголовком")
+        self.count = count
+        self.level_bounds = self._split_levels()
+
+    def _split_levels(self) -> Tuple[int, ...]:
+        """Границы уровней — смещения между длинами решения, ближайшие к третям выполнимых записей"""
+        first = self.unsolvable
+        solvable = self.count - first
+        bounds = [first]
+        for number in range(1, len(LEVELS)):
+            target = first + solvable * number // len(LEVELS)
+            candidates = [offset for offset in self.offsets if bounds[-1] < offset < self.count] or [bounds[-1]]
+            bounds.append(min(candidates, key=lambda offset: abs(offset - target)))
+        bounds.append(self.count)
+        return tuple(bounds)
+
+    @classmethod
+    def load(cls, path: str) -> 'MissionCatalog':
+        with open(path, "rb") as file:
+            return cls(file.read())
+
+    @property
+    def unsolvable(self) -> int:
+        return self.offsets[1]
+
+    def __len__(self) -> int:
+        """Число выполнимых миссий"""
+        return self.count - self.unsolvable
+
+    def mission(self, index: int) -> Mission:
+        layout = self.records[index * RECORD_SIZE:(index + 1) * RECORD_SIZE]
+        return Mission(unpack_cells(layout, CELL_COUNT), bisect_right(self.offsets, index) - 1)
+
+    def level_range(self, level: Optional[str] = None) -> Tuple[int, int]:
+        """Номера записей [start, stop) уровня level; None — все выполнимые"""
+        if level is None:
+            return self.unsolvable, self.count
+        number = LEVELS.index(level)
+        return self.level_bounds[number], self.level_bounds[number + 1]
+
+    def level_lengths(self, level: Optional[str] = None) -> Tuple[int, int]:
+        """Наименьшая и наибольшая длина решения на уровне"""
+        start, stop = self.level_range(level)
+        if start == stop:
+            return 0, 0
+        return bisect_right(self.offsets, start) - 1, bisect_right(self.offsets, stop - 1) - 1
+
+    def pick(self, level: Optional[str] = None, rng: random.Random = None) -> Mission:
+        """Случайная выполнимая миссия уровня level"""
+        start, stop = self.level_range(level)
+        if start == stop:
+            raise ValueError("В каталоге нет миссий этого уровня")
+        return self.mission((rng or random).randrange(start, stop))
+
+
+@lru_cache(maxsize=None)
+def default_catalog() -> Optional[MissionCatalog]:
+    """Каталог из CATALOG_PATH (читается один раз); None, если его не собирали или он повреждён"""
+    try:
+        return MissionCatalog.load(CATALOG_PATH)
+    except (OSError, ValueError):
+        return None
+
+
+def random_mission(level: Optional[str] = None, rng: random.Random = None) -> Mission:
+    """Выполнимая миссия уровня level из каталога; без каталога — проверенная решателем (уровень не учитывается)"""
+    mission_catalog = default_catalog()
+    if mission_catalog is not None:
+        return mission_catalog.pick(level, rng)
+    rng = rng or random
+    while True:
+        grid = random_layout(rng)
+        actions = solve_mission(SIZE, SIZE, grid, (0, 0))
+        if actions is not None:
+            return Mission(grid, len(actions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка каталога миссий 5x5 по сложности")
+    parser.add_argument("path", nargs="?", default=CATALOG_PATH)
+    parser.add_argument("--samples", type=int, default=200_000, help="сколько случайных раскладок опробовать")
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    def report(done: int, total: int):
+        print(f"\rРешено раскладок: {done} из {total}", end="", flush=True)
+
+    data = build_catalog(args.samples, args.workers, args.seed, report)
+    print()
+    write_atomic(args.path, data)
+    catalog = MissionCatalog(data)
+    print(f"Каталог записан в {args.path}: миссий {len(catalog)}, невыполнимых {catalog.unsolvable}, "
+          f"повторов {args.samples - catalog.count}")
+    for level in LEVELS:
+        start, stop = catalog.level_range(level)
+        low, high = catalog.level_lengths(level)
+        print(f"  {LEVEL_NAMES[level]}: {stop - start} миссий, длина решения {low}-{high}")
+
+
+if __name__ == "__main__":
+    main()
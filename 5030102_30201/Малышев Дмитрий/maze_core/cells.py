@@ -0,0 +1,113 @@
+"""Реестр типов клеток — единое место, где объявляются типы клеток.
+
+Из CELL_TYPES заранее строятся таблицы, индексируемые целым значением
+клетки, поэтому правила и отрисовка обоих приложений читают их без
+словарей и без аллокаций на каждый вызов:
+
+* списки длины 8 (по 3-битному коду типа) — названия, подписи, цвета;
+* таблицы bytes длины 256 (по полному значению клетки, бит робота 0x8
+  допускается) — проходимость, необработанные клетки, финиш, переходы
+  при обработке, TYPE_ONLY (значение без бита робота). Их же можно
+  передавать в bytes.translate для массовых операций, а индексы клеток,
+  отмеченных таблицей 0/1, перечисляет flagged.
+
+Новый тип клетки добавляется одной строкой в CELL_TYPES (свободен код 0x7);
+CellType в stage1 и словари веб-приложения строятся отсюда.
+"""
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+ROBOT_BIT = 0x8
+TYPE_MASK = 0x7
+
+
+class CellInfo(NamedTuple):
+    code: int                # 3-битный код типа
+    key: str                 # ключ в веб-приложении и имя члена CellType (в верхнем регистре)
+    name: str                # название для истории и подсказок
+    symbol: str              # подпись в настольном приложении
+    emoji: str               # значок в веб-приложении
+    color: str               # цвет Tk
+    web_color: str           # цвет CSS
+    passable: bool = True    # можно ли зайти роботу
+    pending: bool = False    # должна быть обработана до завершения миссии
+    processed_into: Optional[int] = None  # код после обработки роботом
+
+
+CELL_TYPES = (
+    CellInfo(0x0, "road", "Дорога", "ДОРОГА", "", "white", "#FFFFFF"),
+    CellInfo(0x1, "fire", "Пожар", "ПОЖАР", "🔥", "red", "#FF0000", pending=True, processed_into=0x2),
+    CellInfo(0x2, "filled", "Залитое", "ЗАЛИТОЕ", "💧", "orange", "#FFA500", pending=True, processed_into=0x6),
+    CellInfo(0x3, "water", "Вода", "ВОДА", "🌊", "blue", "#0000FF"),
+    CellInfo(0x4, "barrier", "Барьер", "БАРЬЕР", "⬛", "black", "#000000", passable=False),
+    CellInfo(0x5, "finish", "Финиш", "ФИНИШ", "🏁", "green", "#00FF00"),
+    CellInfo(0x6, "post", "Пост", "ПОСТ", "📯", "purple", "#800080"),
+)
+
+# Значения для кодов, не объявленных в реестре
+UNKNOWN_CODE = next(code for code in range(TYPE_MASK + 1) if code not in {c.code for c in CELL_TYPES})
+UNKNOWN = CellInfo(UNKNOWN_CODE, "unknown", "Неизвестно", "?", "?", "gray", "#808080")
+
+_BY_CODE: List[CellInfo] = [UNKNOWN] * (TYPE_MASK + 1)
+for _info in CELL_TYPES:
+    _BY_CODE[_info.code] = _info
+
+CODE_BY_KEY = {info.key: info.code for info in CELL_TYPES}
+
+ROAD, FIRE, FILLED, WATER, BARRIER, FINISH, POST = (
+    CODE_BY_KEY[key] for key in ("road", "fire", "filled", "water", "barrier", "finish", "post"))
+
+# ---------- таблицы по коду типа ----------
+
+KEYS = [info.key for info in _BY_CODE]
+NAMES = [info.name for info in _BY_CODE]
+SYMBOLS = [info.symbol for info in _BY_CODE]
+EMOJI = [info.emoji for info in _BY_CODE]
+COLORS = [info.color for info in _BY_CODE]
+WEB_COLORS = [info.web_color for info in _BY_CODE]
+# Цвет текста поверх клетки: светлый на тёмном фоне
+TEXT_COLORS = ["white" if info.color == "black" else "black" for info in _BY_CODE]
+WEB_TEXT_COLORS = ["#FFFFFF" if info.web_color in ("#000000", "#800080", "#FF0000") else "#000000"
+                   for info in _BY_CODE]
+
+
+def code_of(key: str) -> int:
+    """Код типа по ключу веб-приложения (UNKNOWN_CODE для неизвестных)"""
+    return CODE_BY_KEY.get(key, UNKNOWN_CODE)
+
+
+# ---------- таблицы по полному значению клетки ----------
+
+def _value_table(predicate) -> bytes:
+    return bytes(1 if predicate(_BY_CODE[value & TYPE_MASK]) else 0 for value in range(256))
+
+
+# Значение клетки без бита робота (grid.translate(TYPE_ONLY) — коды типов всех клеток)
+TYPE_ONLY = bytes(value & TYPE_MASK for value in range(256))
+
+PASSABLE = _value_table(lambda info: info.passable)
+PENDING = _value_table(lambda info: info.pending)
+IS_FINISH = _value_table(lambda info: info.code == FINISH)
+
+# Значения клеток (с роботом и без), которые ещё нужно обработать
+PENDING_VALUES = tuple(value for value in range(ROBOT_BIT * 2) if PENDING[value])
+
+_ONE = re.compile(b"\x01")
+
+
+def flagged(flags: bytes) -> Iterator[int]:
+    """Индексы байтов 1 в flags — результате grid.translate(таблица 0/1), например PENDING"""
+    return (match.start() for match in _ONE.finditer(flags))
+
+
+def transition_table(source: int) -> bytes:
+    """Таблица обработки клетки типа source (остальные значения не меняются, бит робота сохраняется)"""
+    target = _BY_CODE[source].processed_into
+    if target is None:
+        raise ValueError(f"Клетка {KEYS[source]} не обрабатывается")
+    return bytes((value & ~TYPE_MASK) | target if value & TYPE_MASK == source else value
+                 for value in range(256))
+
+
+FIRE_TRANSITION = transition_table(FIRE)      # Пожар -> Залитое
+FILLED_TRANSITION = transition_table(FILLED)  # Залитое -> Пост
@@ -0,0 +1,206 @@
+"""Поля расстояний BFS до ближайшей клетки-цели (финиша, пожара и т.п.).
+
+Поле хранит для каждой клетки число шагов до ближайшего источника, поэтому
+перемещение робота его не меняет: подсказка «до финиша N шагов» — это
+просто чтение distances[клетка робота].
+
+При изменении клетки поле пересчитывается только там, где оно могло
+измениться:
+
+* расстояния уменьшаются (клетка стала проходимой или источником) —
+  от клетки расходится волна уменьшений;
+* расстояния растут (клетка стала стеной или перестала быть источником) —
+  сбрасывается «конус» клеток, все кратчайшие пути которых шли через неё
+  (соседи на 1 дальше, у которых не осталось другого соседа на 1 ближе,
+  рекурсивно), и он заново заполняется от своей границы очередью с
+  приоритетом.
+
+Для масштаба тепловой карты поле ведёт счётчики клеток по расстояниям
+(counts[d] — сколько клеток на расстоянии d), поэтому max_distance не
+просматривает карту: перерисовка стоит столько же на карте 1000x1000,
+сколько на 5x5.
+"""
+import heapq
+from array import array
+from typing import List, Optional
+
+from maze_core.cells import IS_FINISH, PASSABLE, PENDING, flagged
+
+# Расстояние для недостижимых клеток и стен
+UNREACHABLE = 0x7FFFFFFF
+
+# Поля, которые показывают приложения: ключ -> (таблица источников, подпись)
+FIELD_SOURCES = {
+    "finish": (IS_FINISH, "до финиша"),
+    "pending": (PENDING, "до ближайшего пожара или залитой клетки"),
+}
+
+
+class DistanceField:
+    def __init__(self, width: int, height: int, grid: bytearray, sources: bytes):
+        """sources — таблица из 256 байт: 1 для значений клеток-источников"""
+        self.width = width
+        self.height = height
+        self.grid = grid  # общий буфер с лабиринтом, читается «вживую»
+        self.sources = sources
+        self.distances = array("i", [UNREACHABLE]) * (width * height)
+        self.updated_cells = 0  # сколько клеток пересчитано последним изменением
+        self._counts: List[int] = []  # число клеток на каждом конечном расстоянии
+        self._top = 0  # не меньше наибольшего расстояния с ненулевым счётчиком
+        self._compute_all()
+
+    def _neighbors(self, index: int) -> List[int]:
+        width = self.width
+        x = index % width
+        result = []
+        if x + 1 < width:
+            result.append(index + 1)
+        if x > 0:
+            result.append(index - 1)
+        if index + width < len(self.distances):
+            result.append(index + width)
+        if index >= width:
+            result.append(index - width)
+        return result
+
+    def _compute_all(self):
+        """Многоисточниковый BFS по всей карте"""
+        distances, grid, width = self.distances, self.grid, self.width
+        size = len(distances)
+        frontier = list(flagged(bytes(grid).translate(self.sources)))
+        for index in frontier:
+            distances[index] = 0
+        counts = [len(frontier)]
+        step = 0
+        while frontier:
+            step += 1
+            reached = []
+            for index in frontier:
+                x = index % width
+                for neighbor in (index + 1 if x + 1 < width else -1, index - 1 if x else -1,
+                                 index + width if index + width < size else -1, index - width):
+                    if neighbor >= 0 and distances[neighbor] == UNREACHABLE and PASSABLE[grid[neighbor]]:
+                        distances[neighbor] = step
+                        reached.append(neighbor)
+            frontier = reached
+            if reached:
+                counts.append(len(reached))
+        self._counts = counts
+        self._top = len(counts) - 1
+
+    def _assign(self, index: int, distance: int):
+        """Записывает расстояние клетки и обновляет счётчики расстояний"""
+        counts = self._counts
+        old = self.distances[index]
+        if old != UNREACHABLE:
+            counts[old] -= 1
+        if distance != UNREACHABLE:
+            if distance >= len(counts):
+                counts.extend([0] * (distance + 1 - len(counts)))
+            counts[distance] += 1
+            if distance > self._top:
+                self._top = distance
+        self.distances[index] = distance
+
+    def distance(self, x: int, y: int) -> Optional[int]:
+        """Шагов до ближайшего источника (None — недостижимо)"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        distance = self.distances[y * self.width + x]
+        return None if distance == UNREACHABLE else distance
+
+    # ---------- инкрементальное обновление ----------
+
+    def cell_changed(self, x: int, y: int, old_value: int, new_value: int):
+        index = y * self.width + x
+        was_open, is_open = PASSABLE[old_value], PASSABLE[new_value]
+        was_source, is_source = self.sources[old_value], self.sources[new_value]
+        if was_open == is_open and was_source == is_source:
+            self.updated_cells = 0
+            return
+
+        if (is_open and not was_open) or (is_source and not was_source):
+            self._decrease(index)
+        else:
+            self._increase(index)
+
+    def _local_distance(self, index: int) -> int:
+        """Расстояние клетки по её соседям (без учёта более дальних изменений)"""
+        grid = self.grid
+        if not PASSABLE[grid[index]]:
+            return UNREACHABLE
+        if self.sources[grid[index]]:
+            return 0
+        best = min((self.distances[neighbor] for neighbor in self._neighbors(index)), default=UNREACHABLE)
+        return best + 1 if best != UNREACHABLE else UNREACHABLE
+
+    def _decrease(self, index: int):
+        """Волна уменьшений от клетки, которая стала ближе к источникам"""
+        distances = self.distances
+        distance = self._local_distance(index)
+        if distance >= distances[index]:
+            self.updated_cells = 0
+            return
+        self._assign(index, distance)
+        self._relax([(distance, index)])
+
+    def _increase(self, index: int):
+        """Сбрасывает конус зависимых клеток и заполняет его заново от границы"""
+        distances = self.distances
+        cone = [index]
+        seen = {index}
+        # Обход идёт по возрастанию расстояния, поэтому к моменту проверки клетки
+        # все её возможные «родители» (соседи на 1 ближе) уже отнесены к конусу или нет
+        for cell in cone:
+            limit = distances[cell]
+            if limit == UNREACHABLE:
+                continue
+            for neighbor in self._neighbors(cell):
+                if neighbor in seen or distances[neighbor] != limit + 1:
+                    continue
+                supported = any(distances[other] == limit and other not in seen
+                                for other in self._neighbors(neighbor))
+                if not supported:
+                    seen.add(neighbor)
+                    cone.append(neighbor)
+
+        for cell in cone:
+            self._assign(cell, UNREACHABLE)
+        queue = []
+        for cell in cone:
+            distance = self._local_distance(cell)
+            if distance != UNREACHABLE:
+                self._assign(cell, distance)
+                queue.append((distance, cell))
+        heapq.heapify(queue)
+        self._relax(queue, len(cone))
+
+    def _relax(self, queue, updated: int = 1):
+        """Распространяет уменьшения расстояний (очередь — куча пар (расстояние, клетка))"""
+        distances, grid = self.distances, self.grid
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            if distance > distances[cell]:
+                continue
+            for neighbor in self._neighbors(cell):
+                if distances[neighbor] > distance + 1 and PASSABLE[grid[neighbor]]:
+                    self._assign(neighbor, distance + 1)
+                    updated += 1
+                    heapq.heappush(queue, (distance + 1, neighbor))
+        self.updated_cells = updated
+
+    def max_distance(self) -> int:
+        """Наибольшее конечное расстояние на карте (для масштаба тепловой карты), без просмотра карты"""
+        counts = self._counts
+        while self._top and not counts[self._top]:
+            self._top -= 1
+        return self._top
+
+
+def heat_color(distance: Optional[int], max_distance: int) -> Optional[str]:
+    """Цвет тепловой карты: близко — красный, далеко — синий (None для недостижимых)"""
+    if distance is None:
+        return None
+    t = distance / max_distance if max_distance else 0.0
+    t = min(t, 1.0)
+    return "#{:02X}{:02X}{:02X}".format(round(255 * (1 - t)), round(96 * (1 - abs(2 * t - 1))), round(255 * t))
@@ -0,0 +1,183 @@
+"""Правила миссии без интерфейса — одни для настольного и веб-приложения.
+
+MissionEngine хранит компактную сетку (bytearray, индекс y * width + x,
+y = 0 — нижняя строка, значение — код типа | ROBOT_BIT), позицию робота
+и флаг выполненной миссии. RobotMaze/RobotFireman в stage1 и Maze в stage2 —
+тонкие обёртки над ним: они добавляют журнал, сообщения и отрисовку, а
+решения принимаются здесь по таблицам maze_core.cells.
+
+* Число необработанных клеток (pending) поддерживается в set_value при
+  каждой смене типа клетки, поэтому проверка завершения миссии — O(1):
+  робот на финише и pending == 0, без просмотра карты.
+* Позиция робота отслеживается по биту робота в set_value и в step.
+* Смена типа клетки передаётся слушателям listener(x, y, old, new);
+  производные структуры (derived) подписываются на это сами и
+  сбрасываются при замене карты (load).
+
+step(action) выполняет одно действие (индексы — как у решателя и
+пакетной среды) и возвращает исход и клетку, к которой он относится, —
+по ним обёртки пишут свои сообщения.
+
+Быстрые циклы без объектов движка (интерпретатор программ робота,
+пакетная среда) берут правила отсюда же: move_target — куда ведёт ход,
+TRANSITIONS — обработка клетки, mission_complete — условие завершения;
+проходимость и счётчик — по тем же таблицам PASSABLE и PENDING из
+maze_core.cells.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from maze_core.cells import (BARRIER, FILLED, FILLED_TRANSITION, FINISH, FIRE, FIRE_TRANSITION, IS_FINISH, PASSABLE,
+                             PENDING, POST, ROBOT_BIT, TYPE_MASK)
+
+ACTIONS = ("attack", "retreat", "move_left", "move_right", "process_fire", "process_filled")
+ATTACK, RETREAT, MOVE_LEFT, MOVE_RIGHT, PROCESS_FIRE, PROCESS_FILLED = range(len(ACTIONS))
+MOVES = ((0, 1), (0, -1), (-1, 0), (1, 0))
+TRANSITIONS = (FIRE_TRANSITION, FILLED_TRANSITION)
+
+# Исходы действия
+MOVED = "moved"          # робот перешёл в клетку (x, y)
+BLOCKED = "blocked"      # клетка (x, y) непроходима
+OUTSIDE = "outside"      # за границей карты; (x, y) — клетка робота
+PROCESSED = "processed"  # клетка робота (x, y) обработана
+MISSED = "missed"        # в клетке робота нечего обрабатывать этим действием
+NO_ROBOT = "no_robot"    # на карте нет робота
+
+# Карта миссии 5x5 по умолчанию: (x, y, код клетки), остальное — дороги, робот в (0, 0)
+DEFAULT_MISSION_SIZE = 5
+DEFAULT_MISSION = (
+    (4, 4, FINISH), (3, 4, BARRIER), (2, 4, POST), (1, 4, FIRE),
+    (3, 3, FIRE), (1, 3, FILLED),
+    (3, 2, POST), (1, 2, FIRE), (0, 2, BARRIER),
+    (2, 1, FILLED),
+    (4, 0, POST), (3, 0, BARRIER),
+)
+
+Listener = Callable[[int, int, int, int], None]
+
+
+class StepResult(NamedTuple):
+    outcome: str
+    x: int
+    y: int
+
+    @property
+    def ok(self) -> bool:
+        return self.outcome in (MOVED, PROCESSED)
+
+
+def move_target(width: int, height: int, position: int, action: int) -> int:
+    """Индекс клетки, в которую ведёт ход action из клетки position (-1 — за границей карты)"""
+    dx, dy = MOVES[action]
+    x, y = position % width + dx, position // width + dy
+    return y * width + x if 0 <= x < width and 0 <= y < height else -1
+
+
+def mission_complete(value: int, pending: int) -> bool:
+    """Миссия выполнена: робот в клетке со значением value стоит на финише и необработанных клеток нет"""
+    return pending == 0 and IS_FINISH[value] == 1
+
+
+def find_robot(grid: bytes) -> int:
+    """Индекс первой клетки с битом робота (-1 — робота нет)"""
+    positions = [index for index in (grid.find(value) for value in range(ROBOT_BIT, ROBOT_BIT * 2)) if index >= 0]
+    return min(positions) if positions else -1
+
+
+def default_mission() -> bytearray:
+    """Сетка карты миссии по умолчанию (с роботом в (0, 0))"""
+    grid = bytearray(DEFAULT_MISSION_SIZE * DEFAULT_MISSION_SIZE)
+    for x, y, code in DEFAULT_MISSION:
+        grid[y * DEFAULT_MISSION_SIZE + x] = code
+    grid[0] |= ROBOT_BIT
+    return grid
+
+
+class MissionEngine:
+    def __init__(self, width: int = 0, height: int = 0, grid: Optional[bytearray] = None):
+        self.listeners: List[Listener] = []
+        self._derived: Dict[str, object] = {}
+        self.load(width, height, grid if grid is not None else bytearray(width * height))
+
+    def load(self, width: int, height: int, grid: bytearray):
+        """Заменяет карту целиком (буфер grid не копируется) и сбрасывает производные структуры"""
+        if len(grid) != width * height:
+            raise ValueError("Размер сетки не совпадает с шириной и высотой")
+        for index in self._derived.values():
+            self.listeners.remove(index.cell_changed)
+        self._derived.clear()
+        self.width = width
+        self.height = height
+        self.grid = grid
+        self.pending = grid.translate(PENDING).count(1)
+        self.position = find_robot(grid)
+        self.completed = False
+
+    def derived(self, name: str, factory: Callable[[], object]):
+        """Производная структура над сеткой: строится при первом обращении и обновляется через cell_changed"""
+        index = self._derived.get(name)
+        if index is None:
+            index = self._derived[name] = factory()
+            self.listeners.append(index.cell_changed)
+        return index
+
+    @property
+    def robot(self) -> Optional[Tuple[int, int]]:
+        if self.position < 0:
+            return None
+        return self.position % self.width, self.position // self.width
+
+    def value(self, x: int, y: int) -> int:
+        return self.grid[y * self.width + x]
+
+    def set_value(self, x: int, y: int, value: int):
+        """Записывает значение клетки; при смене типа обновляет pending и сообщает слушателям"""
+        offset = y * self.width + x
+        old_value = self.grid[offset]
+        self.grid[offset] = value
+        changed = old_value ^ value
+        if changed & ROBOT_BIT:
+            if value & ROBOT_BIT:
+                self.position = offset
+            elif self.position == offset:
+                self.position = -1
+        if changed & TYPE_MASK:
+            self.pending += PENDING[value] - PENDING[old_value]
+            for listener in self.listeners:
+                listener(x, y, old_value, value)
+
+    def place_robot(self, x: int, y: int):
+        """Переносит робота в (x, y) без проверки правил (начало миссии, загрузка сохранения)"""
+        if self.position >= 0:
+            self.grid[self.position] &= ~ROBOT_BIT
+        self.position = y * self.width + x
+        self.grid[self.position] |= ROBOT_BIT
+
+    def step(self, action: int) -> StepResult:
+        """Выполняет действие робота по правилам миссии"""
+        position, width = self.position, self.width
+        if position < 0:
+            return StepResult(NO_ROBOT, -1, -1)
+        grid = self.grid
+        if action < PROCESS_FIRE:
+            target = move_target(width, self.height, position, action)
+            if target < 0:
+                return StepResult(OUTSIDE, position % width, position // width)
+            if not PASSABLE[grid[target]]:
+                return StepResult(BLOCKED, target % width, target // width)
+            grid[position] &= ~ROBOT_BIT
+            grid[target] |= ROBOT_BIT
+            self.position = target
+            return StepResult(MOVED, target % width, target // width)
+        x, y = position % width, position // width
+        value = grid[position]
+        new_value = TRANSITIONS[action - PROCESS_FIRE][value]
+        if new_value == value:
+            return StepResult(MISSED, x, y)
+        self.set_value(x, y, new_value)
+        return StepResult(PROCESSED, x, y)
+
+    def is_complete(self) -> bool:
+        """Миссия выполнена: робот на финише и нет необработанных клеток (однажды выполненная остаётся такой)"""
+        if not self.completed and self.position >= 0 and mission_complete(self.grid[self.position], self.pending):
+            self.completed = True
+        return self.completed
@@ -0,0 +1,187 @@
+"""Процедурный генератор карт произвольного размера.
+
+Карта строится порциями по несколько строк. Каждая порция зависит только
+от seed и своего номера, поэтому порции можно генерировать и записывать
+в файл по очереди, не держа в памяти всю карту. Типы клеток выбираются
+через таблицу перевода байтов: случайные байты -> коды клеток
+(плотности задаются с шагом 1/256).
+
+Пример: python -m maze_core.generator 4000 4000 big.map --structure rooms
+"""
+import argparse
+import random
+import struct
+from typing import Iterator, Optional, Tuple
+
+from maze_core.cells import BARRIER, FILLED, FINISH, FIRE, POST, ROAD, WATER
+
+STRUCTURES = (None, "corridors", "rooms")
+
+# Размер порции по умолчанию (клеток)
+CHUNK_CELLS = 1 << 16
+
+MAP_MAGIC = b"RFMAP"
+MAP_VERSION = 1
+MAP_HEADER = struct.Struct("<5sBII")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(*values: int) -> int:
+    """Детерминированный хеш целых чисел (для позиций дверей)"""
+    h = 0x9E3779B97F4A7C15
+    for value in values:
+        h ^= value & _MASK64
+        h = (h * 0xBF58476D1CE4E5B9) & _MASK64
+        h ^= h >> 31
+    return h
+
+
+class MapGenerator:
+    def __init__(self, width: int, height: int, seed: Optional[int] = None,
+                 fire: float = 0.06, filled: float = 0.03, barrier: float = 0.12,
+                 post: float = 0.03, water: float = 0.02,
+                 structure: Optional[str] = None, room_size: int = 8,
+                 corridor_spacing: int = 4, chunk_rows: Optional[int] = None):
+        if width < 1 or height < 1:
+            raise ValueError("Размеры карты должны быть положительными")
+        if structure not in STRUCTURES:
+            raise ValueError(f"Неизвестная структура карты: {structure}")
+        if room_size < 2 or corridor_spacing < 2:
+            raise ValueError("Размер комнаты и шаг коридоров должны быть не меньше 2")
+
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else random.randrange(1 << 62)
+        self.structure = structure
+        self.room_size = room_size
+        self.corridor_spacing = corridor_spacing
+        self.chunk_rows = chunk_rows or max(1, CHUNK_CELLS // width)
+        self.densities = {FIRE: fire, FILLED: filled, BARRIER: barrier, POST: post, WATER: water}
+        self._table = self._build_table()
+
+    def _build_table(self) -> bytes:
+        """Таблица перевода случайного байта в код клетки"""
+        table = bytearray()
+        for code, density in self.densities.items():
+            if density < 0:
+                raise ValueError("Плотности клеток не могут быть отрицательными")
+            table += bytes([code]) * round(density * 256)
+        if len(table) > 256:
+            raise ValueError("Сумма плотностей клеток больше 1")
+        table += bytes([ROAD]) * (256 - len(table))
+        return bytes(table)
+
+    @property
+    def chunk_count(self) -> int:
+        return (self.height + self.chunk_rows - 1) // self.chunk_rows
+
+    def chunk(self, index: int) -> bytearray:
+        """Строит порцию строк с номером index"""
+        y0 = index * self.chunk_rows
+        rows = min(self.chunk_rows, self.height - y0)
+        if rows <= 0:
+            raise IndexError(f"Нет порции с номером {index}")
+
+        rng = random.Random(_mix(self.seed, index))
+        cells = bytearray(rng.randbytes(rows * self.width).translate(self._table))
+
+        if self.structure == "corridors":
+            self._add_row_walls(cells, y0, rows, self.corridor_spacing, self.room_size)
+        elif self.structure == "rooms":
+            self._add_row_walls(cells, y0, rows, self.room_size, self.room_size)
+            self._add_column_walls(cells, y0, rows)
+
+        # Старт робота всегда свободен, финиш — в противоположном углу
+        if y0 == 0:
+            cells[0] = ROAD
+        if y0 + rows == self.height:
+            cells[(rows - 1) * self.width + self.width - 1] = FINISH
+        return cells
+
+    def _add_row_walls(self, cells: bytearray, y0: int, rows: int, spacing: int, door_every: int):
+        """Горизонтальные стены каждые spacing строк с дверью на каждые door_every клеток"""
+        width = self.width
+        wall = bytes([BARRIER]) * width
+        first = y0 + (spacing - 1 - y0 % spacing) % spacing
+        for y in range(first, y0 + rows, spacing):
+            offset = (y - y0) * width
+            cells[offset:offset + width] = wall
+            for segment, x0 in enumerate(range(0, width, door_every)):
+                span = min(door_every - 1, width - x0) or 1
+                cells[offset + x0 + _mix(self.seed, 1, y, segment) % span] = ROAD
+
+    def _add_column_walls(self, cells: bytearray, y0: int, rows: int):
+        """Вертикальные стены комнат с одной дверью на комнату"""
+        width, room = self.width, self.room_size
+        columns = range(room - 1, width, room)
+        if not columns:
+            return
+        wall = bytes([BARRIER]) * len(columns)
+        for row in range(rows):
+            offset = row * width
+            cells[offset + room - 1:offset + width:room] = wall
+
+        # Двери: для каждой полосы комнат и каждой стены — одна строка
+        for band in range(y0 // room, (y0 + rows - 1) // room + 1):
+            band_y = band * room
+            span = min(room - 1, self.height - band_y) or 1
+            for index, x in enumerate(columns):
+                y = band_y + _mix(self.seed, 2, band, index) % span
+                if y0 <= y < y0 + rows:
+                    cells[(y - y0) * width + x] = ROAD
+
+    def iter_chunks(self) -> Iterator[Tuple[int, bytearray]]:
+        """Порции карты по порядку: (номер первой строки, клетки)"""
+        for index in range(self.chunk_count):
+            yield index * self.chunk_rows, self.chunk(index)
+
+    def generate(self) -> bytearray:
+        """Вся карта одним компактным буфером"""
+        grid = bytearray()
+        for _, cells in self.iter_chunks():
+            grid += cells
+        return grid
+
+    def write(self, path: str):
+        """Потоково записывает карту в файл, порция за порцией"""
+        with open(path, "wb") as file:
+            file.write(MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, self.width, self.height))
+            for _, cells in self.iter_chunks():
+                file.write(cells)
+
+
+def read_map_file(path: str) -> Tuple[int, int, bytearray]:
+    """Читает файл карты: (ширина, высота, клетки)"""
+    with open(path, "rb") as file:
+        magic, version, width, height = MAP_HEADER.unpack(file.read(MAP_HEADER.size))
+        if magic != MAP_MAGIC or version != MAP_VERSION:
+            raise ValueError(f"{path}: неизвестный формат карты")
+        grid = bytearray(width * height)
+        if file.readinto(grid) != len(grid):
+            raise ValueError(f"{path}: файл карты обрезан")
+    return width, height, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация большой карты в файл")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--structure", choices=[s for s in STRUCTURES if s])
+    parser.add_argument("--room-size", type=int, default=8)
+    for name, default in (("fire", 0.06), ("filled", 0.03), ("barrier", 0.12), ("post", 0.03), ("water", 0.02)):
+        parser.add_argument(f"--{name}", type=float, default=default, help=f"доля клеток (по умолчанию {default})")
+    args = parser.parse_args()
+
+    generator = MapGenerator(args.width, args.height, seed=args.seed,
+                             fire=args.fire, filled=args.filled, barrier=args.barrier,
+                             post=args.post, water=args.water,
+                             structure=args.structure, room_size=args.room_size)
+    generator.write(args.path)
+    print(f"Карта {args.width}x{args.height} (seed={generator.seed}) записана в {args.path}")
+
+
+if __name__ == "__main__":
+    main()
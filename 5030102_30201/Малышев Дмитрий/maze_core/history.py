@@ -0,0 +1,199 @@
+"""История действий с индексами по виду события, клетке и времени.
+
+События только добавляются, поэтому номера событий в каждом индексе идут
+по возрастанию, а времена событий не убывают. Выборка («все тушения»,
+«всё в клетке (3,3)», «с 12:00 до 12:30») — это готовый список номеров из
+индекса, суженный двумя бинарными поисками по времени; страница выборки —
+срез этого списка. Ни фильтр, ни листание не просматривают всю историю.
+
+В сохранение история пишется списком записей [время, вид, x, y, текст];
+строки из старых сохранений читаются как события вида INFO без времени.
+Для контрольных точек checkpoint() отдаёт срез HistorySlice — ссылку на
+список событий и их число — за O(1): список только растёт, поэтому
+первые count событий не меняются, пока их читает поток записи.
+"""
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Виды событий
+MOVE = "move"              # робот перешёл в клетку
+BLOCKED = "blocked"        # движение отклонено (стена или граница)
+EXTINGUISH = "extinguish"  # пожар потушен
+POST = "post"              # поставлен пост
+MISSED = "missed"          # в клетке нечего обрабатывать
+PROGRAM = "program"        # итог запуска программы робота
+INFO = "info"              # остальное: начало миссии, сохранение, маршруты
+
+KIND_NAMES = {
+    MOVE: "Перемещения",
+    BLOCKED: "Отклонённые движения",
+    EXTINGUISH: "Тушения",
+    POST: "Посты",
+    MISSED: "Нечего обрабатывать",
+    PROGRAM: "Программы",
+    INFO: "Прочее",
+}
+
+NO_CELL = -1
+
+
+class HistoryEvent(NamedTuple):
+    time: float  # секунды с эпохи (0 — время неизвестно)
+    kind: str
+    x: int       # NO_CELL, если событие не относится к клетке
+    y: int
+    text: str
+
+    @property
+    def cell(self) -> Optional[Tuple[int, int]]:
+        return None if self.x == NO_CELL else (self.x, self.y)
+
+    def format(self) -> str:
+        """Строка для показа: «[ЧЧ:ММ:СС] текст»"""
+        if not self.time:
+            return self.text
+        return f"[{time.strftime('%H:%M:%S', time.localtime(self.time))}] {self.text}"
+
+
+class HistorySlice(NamedTuple):
+    """Первые count событий списка events (снимок истории без копирования)"""
+    events: List[HistoryEvent]
+    count: int
+
+
+class HistoryView:
+    """Выборка событий: отрезок [start, stop) списка номеров"""
+
+    def __init__(self, store: 'HistoryStore', indices: Sequence[int], start: int, stop: int):
+        self.store = store
+        self.indices = indices
+        self.start = start
+        self.stop = max(start, stop)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def page_count(self, size: int) -> int:
+        return max(1, -(-len(self) // size))
+
+    def page(self, number: int, size: int) -> List[HistoryEvent]:
+        """Страница number (с 0, от старых событий к новым) по size событий"""
+        first = self.start + number * size
+        events = self.store.events
+        return [events[index] for index in self.indices[first:min(first + size, self.stop)]]
+
+
+class HistoryStore:
+    def __init__(self):
+        self.events: List[HistoryEvent] = []
+        self._times = array("d")
+        self._by_kind: Dict[str, array] = {}
+        self._by_cell: Dict[Tuple[int, int], array] = {}
+        self._by_kind_cell: Dict[Tuple[str, int, int], array] = {}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def append(self, text: str, kind: str = INFO, cell: Optional[Tuple[int, int]] = None,
+               timestamp: Optional[float] = None):
+        """Добавляет событие (время не убывает, даже если часы отстали)"""
+        if timestamp is None:
+            timestamp = time.time()
+        if self._times:
+            timestamp = max(timestamp, self._times[-1])
+        x, y = cell if cell is not None else (NO_CELL, NO_CELL)
+        index = len(self.events)
+        self.events.append(HistoryEvent(timestamp, kind, x, y, text))
+        self._times.append(timestamp)
+        self._by_kind.setdefault(kind, array("l")).append(index)
+        if cell is not None:
+            self._by_cell.setdefault((x, y), array("l")).append(index)
+            self._by_kind_cell.setdefault((kind, x, y), array("l")).append(index)
+
+    def clear(self):
+        self.__init__()
+
+    def last(self, count: int) -> List[HistoryEvent]:
+        return self.events[-count:] if count else []
+
+    def select(self, kind: Optional[str] = None, cell: Optional[Tuple[int, int]] = None,
+               since: Optional[float] = None, until: Optional[float] = None) -> HistoryView:
+        """События вида kind в клетке cell за время [since, until]; None — без ограничения"""
+        if kind is not None and cell is not None:
+            indices = self._by_kind_cell.get((kind, *cell), ())
+        elif kind is not None:
+            indices = self._by_kind.get(kind, ())
+        elif cell is not None:
+            indices = self._by_cell.get(tuple(cell), ())
+        else:
+            indices = range(len(self.events))
+
+        start, stop = 0, len(indices)
+        if since is not None:
+            start = bisect_left(indices, bisect_left(self._times, since))
+        if until is not None:
+            stop = bisect_left(indices, bisect_right(self._times, until))
+        return HistoryView(self, indices, start, stop)
+
+    def to_records(self) -> List[list]:
+        """Записи для сохранения"""
+        return [list(event) for event in self.events]
+
+    def checkpoint(self) -> HistorySlice:
+        """Срез текущей истории для сохранения (O(1); clear() заводит новый список и срез не трогает)"""
+        return HistorySlice(self.events, len(self.events))
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> 'HistoryStore':
+        """История из сохранения (записи [время, вид, x, y, текст] или строки старого формата)"""
+        store = cls()
+        for record in records:
+            if isinstance(record, str):
+                store.append(record, INFO, timestamp=0.0)
+            else:
+                timestamp, kind, x, y, text = record
+                store.append(text, kind, None if x == NO_CELL else (x, y), timestamp)
+        return store
+
+
+def parse_cell(text: str) -> Optional[Tuple[int, int]]:
+    """«x,y» -> (x, y); пустая строка -> None (ValueError для неверного ввода)"""
+    text = text.strip().strip("()")
+    if not text:
+        return None
+    parts = text.replace(";", ",").split(",")
+    if len(parts) != 2:
+        raise ValueError("Клетка задаётся как x,y")
+    return int(parts[0]), int(parts[1])
+
+
+def parse_time_range(text: str, reference: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+    """«ЧЧ:ММ-ЧЧ:ММ» (любая граница может отсутствовать) -> (since, until) в секундах.
+
+    Время отсчитывается в дне reference (по умолчанию — сегодня).
+    """
+    text = text.strip()
+    if not text:
+        return None, None
+    if "-" not in text:
+        raise ValueError("Интервал задаётся как ЧЧ:ММ-ЧЧ:ММ")
+    day = time.localtime(reference if reference is not None else time.time())
+
+    def moment(part: str, end: bool) -> Optional[float]:
+        part = part.strip()
+        if not part:
+            return None
+        pieces = [int(piece) for piece in part.split(":")]
+        if not 1 <= len(pieces) <= 3 or not 0 <= pieces[0] < 24 or any(not 0 <= p < 60 for p in pieces[1:]):
+            raise ValueError(f"Неверное время: {part}")
+        hour, minute, second = (pieces + [0, 0])[:3]
+        if end and len(pieces) < 3:
+            second = 59
+            if len(pieces) == 1:
+                minute = 59
+        return time.mktime((day.tm_year, day.tm_mon, day.tm_mday, hour, minute, second, 0, 0, -1))
+
+    first, _, second = text.partition("-")
+    return moment(first, False), moment(second, True)
@@ -0,0 +1,146 @@
+"""Фоновые задачи для интерфейса: пул рабочих потоков и очередь событий.
+
+Задача — функция job(context, *args), выполняемая в пуле. Она сообщает
+ход работы через context.progress(сделано, всего, текст); этот же вызов
+бросает JobCancelled, если задачу отменили. Прогресс, результат, ошибка
+и отмена складываются в потокобезопасную очередь, а обработчики задачи
+(on_progress, on_done, on_error, on_cancel) вызываются из dispatch() —
+в потоке интерфейса, который опрашивает очередь (в Tk — через after).
+Ошибка в обработчике перехватывается и печатается в dispatch() и не
+мешает остальным событиям; у задачи закрытого окна обработчики снимаются
+через detach(), и её поздние события просто отбрасываются.
+
+Прогресс прореживается: событие отправляется не чаще, чем раз в
+PROGRESS_INTERVAL секунд, поэтому даже частые вызовы progress() не
+забивают очередь.
+"""
+import itertools
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+PROGRESS_INTERVAL = 0.05
+
+PROGRESS, DONE, ERROR, CANCELLED = "progress", "done", "error", "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Задача в пуле; обработчики вызываются в потоке, который вызывает JobPool.dispatch()"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, on_progress: Optional[Callable[[float, str], None]] = None,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[BaseException], None]] = None,
+                 on_cancel: Optional[Callable[[], None]] = None):
+        self.id = next(self._ids)
+        self.name = name
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.finished = False
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def detach(self):
+        """Снимает обработчики (окно задачи закрыто): её события больше ничего не вызывают"""
+        self.on_progress = self.on_done = self.on_error = self.on_cancel = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+
+class JobContext:
+    """То, что видит функция задачи: отчёт о ходе работы и проверка отмены"""
+
+    def __init__(self, job: Job, events: queue.Queue):
+        self.job = job
+        self._events = events
+        self._last_report = 0.0
+
+    def check(self):
+        if self.job.cancelled:
+            raise JobCancelled()
+
+    def progress(self, done: float, total: float, text: str = ""):
+        self.check()
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_INTERVAL or done >= total:
+            self._last_report = now
+            self._events.put((PROGRESS, self.job, (min(1.0, done / total) if total else 0.0, text)))
+
+
+class JobPool:
+    def __init__(self, workers: Optional[int] = None):
+        self.events: queue.Queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.active = set()
+        self.last_error: Optional[BaseException] = None  # последняя ошибка обработчика события
+
+    def submit(self, job: Job, function: Callable, *args) -> Job:
+        """Запускает function(context, *args) в пуле"""
+        self.active.add(job)
+        self._executor.submit(self._run, job, function, args)
+        return job
+
+    def _run(self, job: Job, function: Callable, args: tuple):
+        context = JobContext(job, self.events)
+        try:
+            context.check()
+            result = function(context, *args)
+        except JobCancelled:
+            self.events.put((CANCELLED, job, None))
+        except Exception as error:
+            self.events.put((ERROR, job, error))
+        else:
+            self.events.put((CANCELLED, job, None) if job.cancelled else (DONE, job, result))
+
+    def dispatch(self, limit: int = 200) -> int:
+        """Вызывает обработчики накопившихся событий (не больше limit); возвращает их число"""
+        handled = 0
+        while handled < limit:
+            try:
+                kind, job, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            if job.finished:
+                continue
+            if kind == PROGRESS:
+                if job.on_progress and not job.cancelled:
+                    self._call(job.on_progress, *payload)
+                continue
+            job.finished = True
+            self.active.discard(job)
+            if kind == DONE and job.on_done:
+                self._call(job.on_done, payload)
+            elif kind == ERROR and job.on_error:
+                self._call(job.on_error, payload)
+            elif kind == CANCELLED and job.on_cancel:
+                self._call(job.on_cancel)
+        return handled
+
+    def _call(self, handler: Callable, *args):
+        """Вызывает обработчик; его ошибка печатается, а разбор очереди продолжается"""
+        try:
+            handler(*args)
+        except Exception as error:
+            self.last_error = error
+            traceback.print_exc()
+
+    def shutdown(self):
+        """Отменяет все задачи и ждёт завершения потоков"""
+        for job in list(self.active):
+            job.cancel()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,97 @@
+"""Мини-карта: уменьшенное изображение всей карты.
+
+Каждый пиксель мини-карты покрывает квадрат block x block клеток. Пожар,
+финиш и залитые клетки видны при любом масштабе: если такая клетка есть
+в квадрате, пиксель берёт её цвет (в порядке KEEP_VISIBLE). Иначе пиксель
+получает самый частый в квадрате тип — так стены и коридоры остаются
+узнаваемыми. Робот не входит в пиксели, его рисуют отдельной меткой.
+
+Пиксели сгруппированы в плитки TILE x TILE. Изменение клетки помечает
+грязной только её плитку; update() пересчитывает грязные плитки и
+возвращает их список, чтобы интерфейс перерисовал только эти участки.
+"""
+import struct
+import zlib
+from typing import List, Set, Tuple
+
+from maze_core.cells import (BARRIER, FILLED, FINISH, FIRE, POST, ROAD, TYPE_ONLY, WATER,
+                             WEB_COLORS)
+
+# Типы, которые не должны пропадать при уменьшении (по убыванию важности)
+KEEP_VISIBLE = (FIRE, FINISH, FILLED)
+# Остальные типы: пиксель получает самый частый из них
+BACKGROUND = (ROAD, BARRIER, WATER, POST)
+
+# Размер плитки в пикселях мини-карты
+TILE = 16
+
+
+class Minimap:
+    def __init__(self, width: int, height: int, grid: bytearray, max_size: int = 128):
+        self.width = width
+        self.height = height
+        self.grid = grid  # общий буфер с лабиринтом, читается «вживую»
+        self.block = max(1, -(-max(width, height) // max_size))
+        self.map_width = -(-width // self.block)
+        self.map_height = -(-height // self.block)
+        self.pixels = bytearray(self.map_width * self.map_height)  # коды типов, строка 0 — нижняя
+        self.tiles_x = -(-self.map_width // TILE)
+        self.tiles_y = -(-self.map_height // TILE)
+        self.dirty: Set[Tuple[int, int]] = {(tx, ty) for ty in range(self.tiles_y) for tx in range(self.tiles_x)}
+
+    def cell_changed(self, x: int, y: int, old_value: int, new_value: int):
+        block = self.block
+        self.dirty.add((x // block // TILE, y // block // TILE))
+
+    def cell_to_pixel(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.block, y // self.block
+
+    def pixel_center(self, px: int, py: int) -> Tuple[int, int]:
+        """Клетка в центре квадрата, который покрывает пиксель (px, py)"""
+        block = self.block
+        return min(px * block + block // 2, self.width - 1), min(py * block + block // 2, self.height - 1)
+
+    def tile_bounds(self, tile: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """(px0, py0, px1, py1) плитки в пикселях мини-карты, полуинтервалы"""
+        tx, ty = tile
+        return (tx * TILE, ty * TILE,
+                min((tx + 1) * TILE, self.map_width), min((ty + 1) * TILE, self.map_height))
+
+    def update(self) -> List[Tuple[int, int]]:
+        """Пересчитывает грязные плитки и возвращает их"""
+        tiles = sorted(self.dirty)
+        self.dirty.clear()
+        for tile in tiles:
+            self._reduce_tile(tile)
+        return tiles
+
+    def _reduce_tile(self, tile: Tuple[int, int]):
+        grid, width, block = self.grid, self.width, self.block
+        px0, py0, px1, py1 = self.tile_bounds(tile)
+        x0, x1 = px0 * block, min(px1 * block, width)
+        for py in range(py0, py1):
+            rows = [grid[y * width + x0:y * width + x1].translate(TYPE_ONLY)
+                    for y in range(py * block, min((py + 1) * block, self.height))]
+            offset = py * self.map_width
+            for px in range(px0, px1):
+                start = (px - px0) * block
+                values = b"".join(row[start:start + block] for row in rows)
+                for code in KEEP_VISIBLE:
+                    if code in values:
+                        break
+                else:
+                    code = max(BACKGROUND, key=values.count)
+                self.pixels[offset + px] = code
+
+    def to_png(self) -> bytes:
+        """Мини-карта в PNG с палитрой (один байт на пиксель, верхняя строка — старшая y)"""
+        palette = b"".join(bytes.fromhex(color[1:]) for color in WEB_COLORS)
+        rows = b"".join(b"\x00" + bytes(self.pixels[py * self.map_width:(py + 1) * self.map_width])
+                        for py in range(self.map_height - 1, -1, -1))
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        header = struct.pack(">IIBBBBB", self.map_width, self.map_height, 8, 3, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"PLTE", palette)
+                + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
@@ -0,0 +1,329 @@
+"""Иерархический поиск пути (HPA*) по компактной сетке.
+
+Сетка делится на кластеры cluster_size x cluster_size. На границе двух
+соседних кластеров каждый непрерывный отрезок проходимых пар клеток даёт
+вход — пару клеток по разные стороны границы. Внутри кластера расстояния
+между входами считаются BFS. Запрос сначала решается на абстрактном
+графе входов (A*), затем каждый его участок уточняется BFS внутри одного
+кластера. Путь получается близким к кратчайшему, но не обязательно
+кратчайшим: абстрактный граф проходит только через входы кластеров.
+
+Всё строится лениво: кластер обсчитывается при первом запросе, который
+через него проходит. Когда клетка меняет проходимость, сбрасываются
+только её кластер и, если клетка на краю, соседний кластер за этой
+границей.
+"""
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from maze_core.cells import PASSABLE
+
+Path = List[Tuple[int, int]]
+
+
+class HierarchicalPathfinder:
+    def __init__(self, width: int, height: int, grid: bytearray, cluster_size: int = 16):
+        if cluster_size < 2:
+            raise ValueError("Размер кластера должен быть не меньше 2")
+        self.width = width
+        self.height = height
+        self.grid = grid  # общий буфер с лабиринтом, читается «вживую»
+        self.cluster_size = cluster_size
+        self.clusters_x = (width + cluster_size - 1) // cluster_size
+        self.clusters_y = (height + cluster_size - 1) // cluster_size
+
+        self._borders: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self._inter: Dict[int, List[int]] = {}
+        self._entrances: Dict[int, List[int]] = {}
+        self._intra: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+        self._neighbor_tables: Dict[Tuple[int, int], List[Tuple[int, ...]]] = {}
+        self.rebuilt_clusters = 0  # счётчик для диагностики
+
+    # ---------- геометрия ----------
+
+    def cluster_of(self, index: int) -> int:
+        x, y = index % self.width, index // self.width
+        return (y // self.cluster_size) * self.clusters_x + x // self.cluster_size
+
+    def cluster_bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        """(x0, y0, x1, y1) — полуинтервалы"""
+        cx, cy = cluster % self.clusters_x, cluster // self.clusters_x
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return x0, y0, min(x0 + self.cluster_size, self.width), min(y0 + self.cluster_size, self.height)
+
+    def _neighbor_clusters(self, cluster: int) -> List[int]:
+        cx, cy = cluster % self.clusters_x, cluster // self.clusters_x
+        result = []
+        if cx > 0:
+            result.append(cluster - 1)
+        if cx + 1 < self.clusters_x:
+            result.append(cluster + 1)
+        if cy > 0:
+            result.append(cluster - self.clusters_x)
+        if cy + 1 < self.clusters_y:
+            result.append(cluster + self.clusters_x)
+        return result
+
+    # ---------- построение абстрактного графа ----------
+
+    def _border(self, first: int, second: int) -> List[Tuple[int, int]]:
+        """Входы на границе кластеров first < second: пары (клетка в first, клетка в second)"""
+        key = (first, second)
+        pairs = self._borders.get(key)
+        if pairs is not None:
+            return pairs
+
+        grid, width = self.grid, self.width
+        x0, y0, x1, y1 = self.cluster_bounds(first)
+        if second == first + self.clusters_x:  # горизонтальная граница сверху от first
+            cells = [(y1 * width - width + x, y1 * width + x) for x in range(x0, x1)]
+        else:  # вертикальная граница справа от first
+            cells = [(y * width + x1 - 1, y * width + x1) for y in range(y0, y1)]
+
+        pairs = []
+        run = []
+        for a, b in cells + [(-1, -1)]:
+            if a >= 0 and PASSABLE[grid[a]] and PASSABLE[grid[b]]:
+                run.append((a, b))
+            elif run:
+                pairs.append(run[len(run) // 2])
+                run = []
+
+        self._borders[key] = pairs
+        for a, b in pairs:
+            self._inter.setdefault(a, []).append(b)
+            self._inter.setdefault(b, []).append(a)
+        return pairs
+
+    def _cluster_entrances(self, cluster: int) -> List[int]:
+        entrances = self._entrances.get(cluster)
+        if entrances is None:
+            entrances = []
+            for other in self._neighbor_clusters(cluster):
+                first, second = min(cluster, other), max(cluster, other)
+                for a, b in self._border(first, second):
+                    entrances.append(a if cluster == first else b)
+            self._entrances[cluster] = entrances
+        return entrances
+
+    def _bfs(self, cluster: int, source: int, targets=None) -> Dict[int, int]:
+        """BFS внутри кластера: {клетка: предыдущая клетка}; останавливается, найдя все targets"""
+        grid, width = self.grid, self.width
+        x0, y0, x1, y1 = self.cluster_bounds(cluster)
+        parents = {source: source}
+        remaining = set(targets) - {source} if targets is not None else None
+        queue = deque([source])
+        while queue:
+            index = queue.popleft()
+            x, y = index % width, index // width
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if x0 <= nx < x1 and y0 <= ny < y1:
+                    neighbor = ny * width + nx
+                    if neighbor not in parents and PASSABLE[grid[neighbor]]:
+                        parents[neighbor] = index
+                        if remaining is not None:
+                            remaining.discard(neighbor)
+                            if not remaining:
+                                return parents
+                        queue.append(neighbor)
+        return parents
+
+    @staticmethod
+    def _path_length(parents: Dict[int, int], target: int) -> int:
+        length = 0
+        while parents[target] != target:
+            target = parents[target]
+            length += 1
+        return length
+
+    def _local_neighbors(self, cluster_width: int, cluster_height: int) -> List[Tuple[int, ...]]:
+        """Соседи клеток внутри кластера по локальному индексу ly * cluster_width + lx"""
+        key = (cluster_width, cluster_height)
+        neighbors = self._neighbor_tables.get(key)
+        if neighbors is None:
+            neighbors = []
+            for ly in range(cluster_height):
+                for lx in range(cluster_width):
+                    neighbors.append(tuple(ny * cluster_width + nx for nx, ny in
+                                           ((lx + 1, ly), (lx - 1, ly), (lx, ly + 1), (lx, ly - 1))
+                                           if 0 <= nx < cluster_width and 0 <= ny < cluster_height))
+            self._neighbor_tables[key] = neighbors
+        return neighbors
+
+    def _cluster_edges(self, cluster: int) -> Dict[int, List[Tuple[int, int]]]:
+        """Расстояния между входами кластера (строятся при первом обращении)"""
+        edges = self._intra.get(cluster)
+        if edges is not None:
+            return edges
+
+        entrances = self._cluster_entrances(cluster)
+        edges = {entrance: [] for entrance in entrances}
+        width = self.width
+        x0, y0, x1, y1 = self.cluster_bounds(cluster)
+        cluster_width = x1 - x0
+        # Проходимость кластера одной строкой байтов: -1 — не посещена, -2 — стена
+        passable = b"".join(self.grid[y * width + x0:y * width + x1] for y in range(y0, y1)).translate(PASSABLE)
+        initial = [-1 if flag else -2 for flag in passable]
+        neighbors = self._local_neighbors(cluster_width, y1 - y0)
+        local = [(entrance // width - y0) * cluster_width + entrance % width - x0 for entrance in entrances]
+
+        for i in range(len(local) - 1):
+            distances = initial[:]
+            distances[local[i]] = 0
+            frontier, step = [local[i]], 0
+            while frontier:
+                step += 1
+                reached = []
+                for cell in frontier:
+                    for neighbor in neighbors[cell]:
+                        if distances[neighbor] == -1:
+                            distances[neighbor] = step
+                            reached.append(neighbor)
+                frontier = reached
+            for j in range(i + 1, len(local)):
+                distance = distances[local[j]]
+                if distance >= 0:
+                    edges[entrances[i]].append((entrances[j], distance))
+                    edges[entrances[j]].append((entrances[i], distance))
+
+        self._intra[cluster] = edges
+        self.rebuilt_clusters += 1
+        return edges
+
+    def build_all(self):
+        """Строит граф целиком (например, заранее в фоновом потоке)"""
+        for cluster in range(self.clusters_x * self.clusters_y):
+            self._cluster_edges(cluster)
+
+    # ---------- инкрементальное обновление ----------
+
+    def cell_changed(self, x: int, y: int, old_value: int, new_value: int):
+        """Вызывается при изменении клетки; сбрасывает только затронутые кластеры"""
+        if PASSABLE[old_value] == PASSABLE[new_value]:
+            return
+        index = y * self.width + x
+        cluster = self.cluster_of(index)
+        self._invalidate_cluster(cluster)
+
+        x0, y0, x1, y1 = self.cluster_bounds(cluster)
+        touched = []
+        if x == x0 and x > 0:
+            touched.append(cluster - 1)
+        if x == x1 - 1 and x1 < self.width:
+            touched.append(cluster + 1)
+        if y == y0 and y > 0:
+            touched.append(cluster - self.clusters_x)
+        if y == y1 - 1 and y1 < self.height:
+            touched.append(cluster + self.clusters_x)
+        for other in touched:
+            self._drop_border(min(cluster, other), max(cluster, other))
+            self._invalidate_cluster(other)
+
+    def _invalidate_cluster(self, cluster: int):
+        self._intra.pop(cluster, None)
+        self._entrances.pop(cluster, None)
+
+    def _drop_border(self, first: int, second: int):
+        for a, b in self._borders.pop((first, second), ()):
+            self._inter[a].remove(b)
+            self._inter[b].remove(a)
+
+    # ---------- запросы ----------
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[Path]:
+        """Путь из start в goal (список клеток, включая обе) или None, если цель недостижима"""
+        width = self.width
+        for x, y in (start, goal):
+            if not (0 <= x < width and 0 <= y < self.height):
+                return None
+        source = start[1] * width + start[0]
+        target = goal[1] * width + goal[0]
+        if not PASSABLE[self.grid[target]]:
+            return None
+        if source == target:
+            return [start]
+
+        source_cluster, target_cluster = self.cluster_of(source), self.cluster_of(target)
+        if source_cluster == target_cluster:
+            parents = self._bfs(source_cluster, source, [target])
+            if target in parents:
+                return self._unwind(parents, target)
+
+        abstract = self._abstract_search(source, target, source_cluster, target_cluster)
+        if abstract is None:
+            return None
+        return self._refine(abstract)
+
+    def _abstract_search(self, source, target, source_cluster, target_cluster) -> Optional[List[int]]:
+        width = self.width
+
+        # Временные рёбра от старта и от цели ко входам их кластеров
+        start_parents = self._bfs(source_cluster, source, self._cluster_entrances(source_cluster))
+        start_edges = [(entrance, self._path_length(start_parents, entrance))
+                       for entrance in self._cluster_entrances(source_cluster) if entrance in start_parents]
+        goal_parents = self._bfs(target_cluster, target, self._cluster_entrances(target_cluster))
+        goal_edges = {entrance: self._path_length(goal_parents, entrance)
+                      for entrance in self._cluster_entrances(target_cluster) if entrance in goal_parents}
+        if not start_edges or not goal_edges:
+            return None
+
+        tx, ty = target % width, target // width
+
+        def heuristic(index):
+            return abs(index % width - tx) + abs(index // width - ty)
+
+        # При равной оценке раньше раскрывается узел ближе к цели — иначе A*
+        # на открытой карте обходит почти весь граф равноценных путей
+        best = {source: 0}
+        came_from = {source: None}
+        queue = [(heuristic(source), heuristic(source), 0, source)]
+        while queue:
+            _, _, cost, node = heapq.heappop(queue)
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = came_from[node]
+                return path[::-1]
+            if cost > best.get(node, cost):
+                continue
+
+            if node == source:
+                edges = list(start_edges)
+            else:
+                edges = list(self._cluster_edges(self.cluster_of(node)).get(node, ()))
+            # Старт сам может быть входом — тогда у него есть и переход через границу
+            edges.extend((partner, 1) for partner in self._inter.get(node, ()))
+            if node in goal_edges:
+                edges.append((target, goal_edges[node]))
+
+            for neighbor, weight in edges:
+                new_cost = cost + weight
+                if new_cost < best.get(neighbor, new_cost + 1):
+                    best[neighbor] = new_cost
+                    came_from[neighbor] = node
+                    estimate = heuristic(neighbor)
+                    heapq.heappush(queue, (new_cost + estimate, estimate, new_cost, neighbor))
+        return None
+
+    def _refine(self, abstract: List[int]) -> Path:
+        """Разворачивает абстрактный путь в клетки BFS внутри кластеров"""
+        cells = [abstract[0]]
+        for a, b in zip(abstract, abstract[1:]):
+            cluster_a, cluster_b = self.cluster_of(a), self.cluster_of(b)
+            if cluster_a != cluster_b:  # переход через границу — соседние клетки
+                cells.append(b)
+                continue
+            parents = self._bfs(cluster_a, a, [b])
+            cells.extend(self._unwind(parents, b, as_indices=True)[1:])
+        return [(index % self.width, index // self.width) for index in cells]
+
+    def _unwind(self, parents: Dict[int, int], target: int, as_indices: bool = False):
+        path = [target]
+        while parents[path[-1]] != path[-1]:
+            path.append(parents[path[-1]])
+        path.reverse()
+        if as_indices:
+            return path
+        return [(index % self.width, index // self.width) for index in path]
@@ -0,0 +1,134 @@
+"""Общий для процесса кэш планов решателя (подсказки и решения в веб-сессиях).
+
+Ключ — BLAKE2b от размеров карты, позиции робота и кодов типов клеток
+(бит робота отбрасывается), поэтому одинаковые состояния разных сессий —
+например, карта по умолчанию в начале игры — решаются один раз.
+
+* Записи хранятся в порядке использования (OrderedDict) и вытесняются
+  с самой давней, пока общий размер больше max_bytes. Размер записи —
+  план по байту на действие плюс ENTRY_OVERHEAD на ключ и словарь.
+* Если ключ уже считается в другом потоке, запрос не запускает решатель
+  второй раз, а ждёт тот же Future (это считается в waits).
+* stats() отдаёт счётчики попаданий, промахов, ожиданий и вытеснений.
+"""
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from maze_core.cells import TYPE_ONLY
+from maze_core.solver import solve_mission
+
+KEY_HEADER = struct.Struct("<IIII")
+KEY_SIZE = 16
+
+# Оценка памяти на запись сверх самого плана: ключ, элемент словаря, объект bytes
+ENTRY_OVERHEAD = 160
+DEFAULT_MAX_BYTES = 32 << 20
+
+
+Solver = Callable[[int, int, bytes, Tuple[int, int]], Optional[List[int]]]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    waits: int        # запросы, дождавшиеся расчёта из другого потока
+    evictions: int
+    entries: int
+    size: int         # оценка занятой памяти, байт
+    max_bytes: int
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.waits
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля запросов, обслуженных без своего запуска решателя"""
+        return (self.hits + self.waits) / self.requests if self.requests else 0.0
+
+
+def plan_key(width: int, height: int, grid: bytes, start: Tuple[int, int]) -> bytes:
+    digest = hashlib.blake2b(KEY_HEADER.pack(width, height, *start), digest_size=KEY_SIZE)
+    digest.update(bytes(grid).translate(TYPE_ONLY))
+    return digest.digest()
+
+
+def _entry_size(packed: Optional[bytes]) -> int:
+    return ENTRY_OVERHEAD + (len(packed) if packed is not None else 0)
+
+
+def _unpack(packed: Optional[bytes]) -> Optional[List[int]]:
+    return list(packed) if packed is not None else None
+
+
+class PlanCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, solver: Solver = solve_mission):
+        self.max_bytes = max_bytes
+        self.solver = solver
+        self._lock = threading.Lock()
+        # ключ -> план (bytes, байт на действие) или None для невыполнимой миссии
+        self._entries: 'OrderedDict[bytes, Optional[bytes]]' = OrderedDict()
+        self._in_flight: Dict[bytes, Future] = {}
+        self.size = 0
+        self.hits = self.misses = self.waits = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def plan(self, width: int, height: int, grid: bytes, start: Tuple[int, int]) -> Optional[List[int]]:
+        """План от позиции start (None — миссия невыполнима): из кэша, из чужого расчёта или новый"""
+        key = plan_key(width, height, grid, start)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _unpack(self._entries[key])
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+                owner = True
+            else:
+                self.waits += 1
+                owner = False
+        if not owner:
+            return _unpack(future.result())
+
+        try:
+            plan = self.solver(width, height, bytes(grid), start)
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        packed = bytes(plan) if plan is not None else None
+        with self._lock:
+            del self._in_flight[key]
+            self._store(key, packed)
+        future.set_result(packed)
+        return plan
+
+    def _store(self, key: bytes, packed: Optional[bytes]):
+        size = _entry_size(packed)
+        if size > self.max_bytes:
+            return  # план больше всего кэша — не вытесняем ради него остальные
+        self._entries[key] = packed
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= _entry_size(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.waits, self.evictions, len(self._entries),
+                              self.size, self.max_bytes)
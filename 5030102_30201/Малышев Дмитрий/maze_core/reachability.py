@@ -0,0 +1,318 @@
+"""Инкрементальная разметка компонент связности проходимых клеток.
+
+Каждая проходимая клетка хранит метку своей компоненты (0 — стена), для
+каждой компоненты известны её размер, необработанные клетки и финиши.
+Поэтому «достижима ли клетка» и «выполнима ли ещё миссия» отвечаются за
+O(1), а список недостижимых пожаров — без обхода всей карты (для
+перерисовки — только в пределах видимой области).
+
+Изменения применяются по одной клетке:
+
+* клетка стала проходимой — соседние компоненты сливаются, перемечается
+  меньшая из них;
+* клетка стала стеной — её соседи обходятся BFS по очереди, по одной
+  клетке за шаг; поиски, встретившиеся друг с другом, объединяются.
+  Поиск, исчерпавший свою компоненту раньше остальных, получает новую
+  метку, поэтому работа пропорциональна размеру отколовшихся частей.
+
+Сетка читается только при построении: дальше достаточно старых и новых
+значений клеток из cell_changed.
+"""
+import re
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from maze_core.cells import IS_FINISH, PASSABLE, PENDING, flagged
+
+_RUN = re.compile(b"\x01+")
+
+
+class Reachability:
+    def __init__(self, width: int, height: int, grid: bytes):
+        self.width = width
+        self.height = height
+        self.labels = array("i", bytes(4 * width * height))
+        self.sizes: Dict[int, int] = {}
+        self.pending_cells: Dict[int, Set[int]] = {}
+        self.finish_cells: Dict[int, Set[int]] = {}
+        self.pending_total = 0
+        self._next_label = 1
+        self._label_all(bytes(grid))
+
+    # ---------- построение ----------
+
+    def _label_all(self, grid: bytes):
+        """Разметка отрезками строк и объединением пересекающихся отрезков соседних строк"""
+        width = self.width
+        passable = grid.translate(PASSABLE)
+        parent: List[int] = []
+
+        def find(run):
+            while parent[run] != run:
+                parent[run] = parent[parent[run]]
+                run = parent[run]
+            return run
+
+        runs = []
+        previous = []
+        for y in range(self.height):
+            offset = y * width
+            current = []
+            for match in _RUN.finditer(passable, offset, offset + width):
+                parent.append(len(parent))
+                current.append((match.start(), match.end(), len(parent) - 1))
+            i = j = 0
+            while i < len(previous) and j < len(current):
+                start_a, end_a, run_a = previous[i]
+                start_b, end_b, run_b = current[j]
+                # Отрезок предыдущей строки сдвинут на width назад
+                if start_a + width < end_b and start_b < end_a + width:
+                    root_a, root_b = find(run_a), find(run_b)
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+                if end_a + width < end_b:
+                    i += 1
+                else:
+                    j += 1
+            runs.extend(current)
+            previous = current
+
+        label_of_root = {}
+        for start, end, run in runs:
+            root = find(run)
+            label = label_of_root.get(root)
+            if label is None:
+                label = label_of_root[root] = self._new_label()
+            self.labels[start:end] = array("i", [label]) * (end - start)
+            self.sizes[label] += end - start
+
+        pending = grid.translate(PENDING)
+        for index in flagged(pending):
+            self._track(index, self.pending_cells)
+        self.pending_total = pending.count(1)
+        for index in flagged(grid.translate(IS_FINISH)):
+            self._track(index, self.finish_cells)
+
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        self.sizes[label] = 0
+        return label
+
+    def _track(self, index: int, table: Dict[int, Set[int]]):
+        table.setdefault(self.labels[index], set()).add(index)
+
+    def _untrack(self, index: int, table: Dict[int, Set[int]]):
+        members = table.get(self.labels[index])
+        if members is not None:
+            members.discard(index)
+            if not members:
+                del table[self.labels[index]]
+
+    def _neighbors(self, index: int):
+        width = self.width
+        x = index % width
+        if x + 1 < width:
+            yield index + 1
+        if x > 0:
+            yield index - 1
+        if index + width < len(self.labels):
+            yield index + width
+        if index >= width:
+            yield index - width
+
+    # ---------- инкрементальное обновление ----------
+
+    def cell_changed(self, x: int, y: int, old_value: int, new_value: int):
+        """Применяет изменение одной клетки"""
+        index = y * self.width + x
+        if self.labels[index]:
+            if PENDING[old_value]:
+                self._untrack(index, self.pending_cells)
+            if IS_FINISH[old_value]:
+                self._untrack(index, self.finish_cells)
+        self.pending_total += PENDING[new_value] - PENDING[old_value]
+
+        if PASSABLE[old_value] and not PASSABLE[new_value]:
+            self._close(index)
+        elif PASSABLE[new_value] and not PASSABLE[old_value]:
+            self._open(index)
+
+        if self.labels[index]:
+            if PENDING[new_value]:
+                self._track(index, self.pending_cells)
+            if IS_FINISH[new_value]:
+                self._track(index, self.finish_cells)
+
+    def _open(self, index: int):
+        """Клетка стала проходимой: присоединяется к соседям, соседние компоненты сливаются"""
+        labels = self.labels
+        around = {labels[neighbor]: neighbor for neighbor in self._neighbors(index) if labels[neighbor]}
+        if not around:
+            label = self._new_label()
+        else:
+            label = max(around, key=self.sizes.__getitem__)
+            for other, start in around.items():
+                if other != label:
+                    self._relabel([start], other, label)
+        labels[index] = label
+        self.sizes[label] += 1
+
+    def _relabel(self, starts: List[int], old: int, new: int):
+        """Переносит компоненту old (достижимую из starts) под метку new"""
+        labels = self.labels
+        queue = deque(starts)
+        for start in starts:
+            labels[start] = new
+        count = len(starts)
+        while queue:
+            index = queue.popleft()
+            for neighbor in self._neighbors(index):
+                if labels[neighbor] == old:
+                    labels[neighbor] = new
+                    count += 1
+                    queue.append(neighbor)
+        self.sizes[new] += count
+        self.sizes[old] -= count
+        if not self.sizes[old]:
+            del self.sizes[old]
+            for table in (self.pending_cells, self.finish_cells):
+                moved = table.pop(old, None)
+                if moved:
+                    table.setdefault(new, set()).update(moved)
+
+    def _close(self, index: int):
+        """Клетка стала стеной: проверяет, не распалась ли её компонента"""
+        labels = self.labels
+        label = labels[index]
+        labels[index] = 0
+        self.sizes[label] -= 1
+        if not self.sizes[label]:
+            del self.sizes[label]
+            return
+
+        starts = [neighbor for neighbor in self._neighbors(index) if labels[neighbor] == label]
+        if len(starts) < 2:
+            return
+
+        # Поиски из каждого соседа; owner[клетка] — номер поиска, group — объединение встретившихся
+        owner = {start: search for search, start in enumerate(starts)}
+        group = list(range(len(starts)))
+        frontiers = [deque([start]) for start in starts]
+        visited = [[start] for start in starts]
+
+        def find(search):
+            while group[search] != search:
+                group[search] = group[group[search]]
+                search = group[search]
+            return search
+
+        alive = list(range(len(starts)))
+        while len(alive) > 1:
+            for search in list(alive):
+                if search not in alive:
+                    continue
+                frontier = frontiers[search]
+                if not frontier:
+                    # Компонента исчерпана раньше других — она отделилась
+                    alive.remove(search)
+                    if alive:
+                        self._split_off(visited[search], label)
+                    continue
+                cell = frontier.popleft()
+                for neighbor in self._neighbors(cell):
+                    if labels[neighbor] != label:
+                        continue
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        visited[search].append(neighbor)
+                        frontier.append(neighbor)
+                        continue
+                    other = find(other)
+                    if other != search:
+                        # Поиски встретились — это одна компонента, продолжаем одним поиском
+                        group[other] = search
+                        frontier.extend(frontiers[other])
+                        visited[search].extend(visited[other])
+                        frontiers[other] = deque()
+                        visited[other] = []
+                        alive.remove(other)
+                if len(alive) < 2:
+                    break
+
+    def _split_off(self, members: List[int], old: int):
+        """Даёт отколовшейся части компоненты old новую метку"""
+        label = self._new_label()
+        labels = self.labels
+        for index in members:
+            labels[index] = label
+        self.sizes[label] = len(members)
+        self.sizes[old] -= len(members)
+        for table in (self.pending_cells, self.finish_cells):
+            source = table.get(old)
+            if not source:
+                continue
+            moved = {index for index in members if index in source} if len(members) < len(source) \
+                else {index for index in source if labels[index] == label}
+            if moved:
+                source -= moved
+                table[label] = moved
+                if not source:
+                    del table[old]
+
+    # ---------- запросы ----------
+
+    def label(self, x: int, y: int) -> int:
+        """Метка компоненты клетки (0 — стена или вне карты)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.labels[y * self.width + x]
+        return 0
+
+    def reachable(self, source: Tuple[int, int], target: Tuple[int, int]) -> bool:
+        label = self.label(*source)
+        return label != 0 and label == self.label(*target)
+
+    def finish_reachable(self, x: int, y: int) -> bool:
+        return self.label(x, y) in self.finish_cells
+
+    def reachable_pending(self, x: int, y: int) -> int:
+        """Сколько необработанных клеток в компоненте клетки (x, y)"""
+        return len(self.pending_cells.get(self.label(x, y), ()))
+
+    def unreachable_pending(self, x: int, y: int,
+                            area: Optional[Tuple[int, int, int, int]] = None) -> List[Tuple[int, int]]:
+        """Необработанные клетки вне компоненты (x, y).
+        area = (x0, y0, x1, y1) — только клетки x0 <= x < x1, y0 <= y < y1 (видимая часть карты):
+        тогда работа пропорциональна площади области, а не числу необработанных клеток"""
+        label = self.label(x, y)
+        width = self.width
+        if area is None:
+            return [(index % width, index // width)
+                    for other, members in self.pending_cells.items() if other != label
+                    for index in members]
+        x0, y0, x1, y1 = max(area[0], 0), max(area[1], 0), min(area[2], width), min(area[3], self.height)
+        labels, pending_cells = self.labels, self.pending_cells
+        result = []
+        for row in range(y0, y1):
+            offset = row * width
+            for index in range(offset + x0, offset + x1):
+                other = labels[index]
+                if other and other != label and index in pending_cells.get(other, ()):
+                    result.append((index - offset, row))
+        return result
+
+    def mission_possible(self, x: int, y: int) -> bool:
+        """Можно ли ещё выполнить миссию, стартуя из (x, y)"""
+        return self.finish_reachable(x, y) and self.reachable_pending(x, y) == self.pending_total
+
+    def impossibility_reason(self, x: int, y: int) -> Optional[str]:
+        """Почему миссия невыполнима (None, если выполнима)"""
+        unreachable = self.pending_total - self.reachable_pending(x, y)
+        reasons = []
+        if not self.finish_reachable(x, y):
+            reasons.append("финиш недостижим")
+        if unreachable:
+            reasons.append(f"недостижимых клеток с пожаром или заливкой: {unreachable}")
+        return "; ".join(reasons) or None
@@ -0,0 +1,414 @@
+"""Экспорт повтора игры в анимацию без окна: GIF или сырое RGB-видео.
+
+Повтор (Replay) — начальная карта и последовательность действий робота
+(индексы в порядке методов RobotFireman, как в пакетной среде и у
+решателя). Кадры рисуются в памяти по сетке кодов клеток, без Tk:
+
+* FrameRenderer держит один кадр (буфер пикселей) и готовые плитки для
+  каждого значения клетки (тип | бит робота). После действия
+  перерисовываются только изменившиеся клетки — одна-две плитки;
+* GifWriter пишет кадр за кадром в открытый файл (LZW-сжатие своё).
+  Кадр GIF — только прямоугольник изменившихся клеток поверх предыдущего
+  кадра; действия без изменений удлиняют показ предыдущего кадра;
+* RawVideoWriter пишет полные кадры RGB24 подряд (для ffmpeg -f rawvideo).
+
+В памяти одновременно только текущий кадр и один ещё не записанный кадр
+GIF, поэтому длина повтора ограничена лишь размером файла.
+
+Файл повтора (.rfr, little-endian):
+    заголовок   REPLAY_HEADER: магия, версия, ширина, высота, начальная
+                позиция робота, длины блоков
+    клетки      3-битные коды типов (savefile.pack_cells)
+    действия    по байту на действие
+    CRC32       контрольная сумма всего, что выше
+
+Пакетный экспорт (для .rfs и .map повторяется план maze_core.solver):
+    python -m maze_core.replay sessions/*.rfr --out videos --workers 4
+"""
+import argparse
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from maze_core.cells import ROBOT_BIT, TYPE_MASK, TYPE_ONLY, WEB_COLORS
+from maze_core.engine import MOVED, PROCESSED, MissionEngine
+from maze_core.savefile import pack_cells, unpack_cells, write_atomic
+
+REPLAY_MAGIC = b"RFRPLY"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<6sBIIIIII")
+REPLAY_CRC = struct.Struct("<I")
+
+# Палитра кадра: коды типов клеток, затем робот, обводка робота и линии сетки
+ROBOT_INDEX = TYPE_MASK + 1
+OUTLINE_INDEX = ROBOT_INDEX + 1
+GRID_INDEX = OUTLINE_INDEX + 1
+PALETTE = [bytes.fromhex(color[1:]) for color in WEB_COLORS] + [
+    bytes.fromhex("0000FF"), bytes.fromhex("FFFFFF"), bytes.fromhex("404040")]
+PALETTE += [b"\0\0\0"] * (16 - len(PALETTE))
+
+# Размер клетки по умолчанию: кадр не больше MAX_FRAME_PIXELS по большей стороне
+MAX_CELL_PIXELS = 24
+MAX_FRAME_PIXELS = 720
+
+DEFAULT_FPS = 10
+# Сколько показывать последний кадр GIF, мс
+FINAL_HOLD_MS = 1500
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class Replay(NamedTuple):
+    width: int
+    height: int
+    grid: bytes      # начальная карта, индекс y * width + x (бит робота не учитывается)
+    robot_x: int
+    robot_y: int
+    actions: bytes   # индексы действий
+
+
+def dumps_replay(replay: Replay) -> bytes:
+    cells = pack_cells(bytes(replay.grid))
+    data = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, replay.width, replay.height,
+                              replay.robot_x, replay.robot_y, len(cells), len(replay.actions))
+    data += cells + bytes(replay.actions)
+    return data + REPLAY_CRC.pack(zlib.crc32(data))
+
+
+def loads_replay(data: bytes) -> Replay:
+    if len(data) < REPLAY_HEADER.size + REPLAY_CRC.size:
+        raise ValueError("Файл повтора обрезан")
+    body, (crc,) = data[:-REPLAY_CRC.size], REPLAY_CRC.unpack(data[-REPLAY_CRC.size:])
+    if zlib.crc32(body) != crc:
+        raise ValueError("Повтор повреждён: не совпадает контрольная сумма")
+    magic, version, width, height, robot_x, robot_y, cells_size, actions_size = REPLAY_HEADER.unpack_from(body)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("Неизвестный формат повтора")
+    start = REPLAY_HEADER.size
+    if len(body) != start + cells_size + actions_size:
+        raise ValueError("Повтор повреждён: длины блоков не совпадают с заголовком")
+    grid = unpack_cells(body[start:start + cells_size], width * height)
+    actions = body[start + cells_size:]
+    if not (0 <= robot_x < width and 0 <= robot_y < height) or any(action > 5 for action in set(actions)):
+        raise ValueError("Повтор повреждён: неверная позиция робота или действие")
+    return Replay(width, height, bytes(grid), robot_x, robot_y, bytes(actions))
+
+
+def save_replay(path: str, replay: Replay):
+    write_atomic(path, dumps_replay(replay))
+
+
+def load_replay(path: str) -> Replay:
+    with open(path, "rb") as file:
+        return loads_replay(file.read())
+
+
+def replay_steps(width: int, height: int, grid: bytearray, position: int,
+                 actions: bytes) -> Iterator[Tuple[int, ...]]:
+    """Выполняет действия на сетке grid (с битом робота) движком миссии; для каждого — номера изменившихся клеток"""
+    engine = MissionEngine(width, height, grid)
+    engine.place_robot(position % width, position // width)
+    for action in actions:
+        position = engine.position
+        outcome = engine.step(action).outcome
+        if outcome == MOVED:
+            yield position, engine.position
+        elif outcome == PROCESSED:
+            yield (position,)
+        else:
+            yield ()
+
+
+def default_cell_pixels(width: int, height: int) -> int:
+    return max(1, min(MAX_CELL_PIXELS, MAX_FRAME_PIXELS // max(width, height)))
+
+
+def _tile(value: int, size: int) -> List[bytes]:
+    """Строки плитки клетки со значением value (номера цветов палитры), сверху вниз"""
+    rows = []
+    centre = (size - 1) / 2
+    radius = size * 0.35
+    for row in range(size):
+        pixels = bytearray([value & TYPE_MASK]) * size
+        if value & ROBOT_BIT:
+            for column in range(size):
+                distance = ((row - centre) ** 2 + (column - centre) ** 2) ** 0.5
+                if size < 5:
+                    pixels[column] = ROBOT_INDEX if distance <= radius else OUTLINE_INDEX
+                elif distance <= radius:
+                    pixels[column] = ROBOT_INDEX if distance <= radius - 1 else OUTLINE_INDEX
+        if size >= 4:
+            pixels[-1] = GRID_INDEX
+            if row == size - 1:
+                pixels[:] = bytes([GRID_INDEX]) * size
+        rows.append(bytes(pixels))
+    return rows
+
+
+class FrameRenderer:
+    """Кадр карты в памяти; bytes_per_pixel — 1 (номера палитры) или 3 (RGB)"""
+
+    def __init__(self, width: int, height: int, grid: bytes, cell_pixels: int, bytes_per_pixel: int = 1):
+        self.width = width
+        self.height = height
+        self.cell_pixels = cell_pixels
+        self.bytes_per_pixel = bytes_per_pixel
+        self.pixel_width = width * cell_pixels
+        self.pixel_height = height * cell_pixels
+        self.stride = self.pixel_width * bytes_per_pixel
+        # Плитки по значению клетки (тип | бит робота): строки уже в формате кадра
+        self.tiles = []
+        for value in range(2 * ROBOT_BIT):
+            rows = _tile(value, cell_pixels)
+            if bytes_per_pixel == 3:
+                rows = [b"".join(PALETTE[index] for index in row) for row in rows]
+            self.tiles.append(rows)
+
+        # Первый кадр — строками: каждая строка пикселей склеивается из строк плиток
+        parts = []
+        for y in range(height - 1, -1, -1):
+            values = grid[y * width:(y + 1) * width]
+            for row in range(cell_pixels):
+                parts.append(b"".join([self.tiles[value & 0xF][row] for value in values]))
+        self.frame = bytearray(b"".join(parts))
+
+    def paint(self, index: int, value: int):
+        """Перерисовывает одну клетку"""
+        size, stride = self.cell_pixels, self.stride
+        x, y = index % self.width, index // self.width
+        start = (self.height - 1 - y) * size * stride + x * size * self.bytes_per_pixel
+        span = size * self.bytes_per_pixel
+        for row in self.tiles[value & 0xF]:
+            self.frame[start:start + span] = row
+            start += stride
+
+    def cell_rect(self, index: int) -> Tuple[int, int, int, int]:
+        """Прямоугольник клетки в пикселях: (left, top, right, bottom)"""
+        size = self.cell_pixels
+        x, y = index % self.width, index // self.width
+        top = (self.height - 1 - y) * size
+        return x * size, top, x * size + size, top + size
+
+    def region(self, left: int, top: int, right: int, bottom: int) -> bytes:
+        """Пиксели прямоугольника, построчно"""
+        bpp, stride = self.bytes_per_pixel, self.stride
+        return b"".join([self.frame[row * stride + left * bpp:row * stride + right * bpp]
+                         for row in range(top, bottom)])
+
+
+def lzw_encode(data: bytes, min_code_size: int) -> bytes:
+    """Сжатие LZW для GIF: коды переменной длины (до 12 бит), младшие биты первыми"""
+    clear = 1 << min_code_size
+    end = clear + 1
+    out = bytearray()
+    size = min_code_size + 1
+    next_code = end + 1
+    codes = {}
+
+    bits, count = clear, size
+    prefix = data[0]
+    for byte in data[1:]:
+        key = prefix << 8 | byte
+        code = codes.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        bits |= prefix << count
+        count += size
+        while count >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            count -= 8
+        if next_code < 4096:
+            codes[key] = next_code
+            if next_code == 1 << size:
+                size += 1
+            next_code += 1
+        else:
+            # Таблица заполнена: код очистки и словарь заново
+            bits |= clear << count
+            count += size
+            codes.clear()
+            size = min_code_size + 1
+            next_code = end + 1
+        prefix = byte
+
+    bits |= prefix << count
+    count += size
+    # Декодер добавит ещё одну запись после последнего кода и может перейти на следующую длину
+    if next_code == 1 << size and size < 12:
+        size += 1
+    bits |= end << count
+    count += size
+    while count > 0:
+        out.append(bits & 0xFF)
+        bits >>= 8
+        count -= 8
+    return bytes(out)
+
+
+class GifWriter:
+    """Анимированный GIF с палитрой из 16 цветов; кадры пишутся в файл сразу"""
+
+    MIN_CODE_SIZE = 4
+
+    def __init__(self, file: BinaryIO, width: int, height: int, palette: Sequence[bytes] = PALETTE):
+        if not (0 < width <= 0xFFFF and 0 < height <= 0xFFFF):
+            raise ValueError("Кадр GIF не может быть больше 65535 пикселей по стороне")
+        self.file = file
+        file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF3, 0, 0))
+        file.write(b"".join(palette))
+        # Бесконечный повтор анимации
+        file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def frame(self, pixels: bytes, left: int, top: int, width: int, height: int, delay_ms: int):
+        """Кадр — прямоугольник поверх предыдущего кадра (он не стирается)"""
+        delay = max(2, round(delay_ms / 10))
+        self.file.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, min(delay, 0xFFFF), 0, 0))
+        self.file.write(struct.pack("<BHHHHB", 0x2C, left, top, width, height, 0))
+        data = lzw_encode(pixels, self.MIN_CODE_SIZE)
+        self.file.write(bytes([self.MIN_CODE_SIZE]))
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            self.file.write(bytes([len(block)]) + block)
+        self.file.write(b"\0")
+
+    def close(self):
+        self.file.write(b"\x3B")
+
+
+class RawVideoWriter:
+    """Полные кадры RGB24 подряд, без заголовка"""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    def frame(self, pixels: bytes):
+        self.file.write(pixels)
+
+
+class ExportResult(NamedTuple):
+    frames: int
+    pixel_width: int
+    pixel_height: int
+
+
+def export_replay(replay: Replay, path: str, cell_pixels: Optional[int] = None, fps: float = DEFAULT_FPS,
+                  actions_per_frame: int = 1, progress: Progress = None) -> ExportResult:
+    """Пишет повтор в path: .gif — анимация, иначе сырое видео RGB24.
+
+    Один кадр приходится на actions_per_frame действий. progress(сделано, всего)
+    вызывается по ходу работы; исключение из него прерывает экспорт.
+    """
+    if actions_per_frame < 1 or fps <= 0:
+        raise ValueError("Частота кадров и число действий на кадр должны быть положительными")
+    width, height = replay.width, replay.height
+    cell_pixels = cell_pixels or default_cell_pixels(width, height)
+    grid = bytearray(bytes(replay.grid).translate(TYPE_ONLY))
+    position = replay.robot_y * width + replay.robot_x
+    grid[position] |= ROBOT_BIT
+    gif = path.lower().endswith(".gif")
+    renderer = FrameRenderer(width, height, grid, cell_pixels, 1 if gif else 3)
+    frame_ms = 1000 / fps
+    total = len(replay.actions)
+
+    with open(path, "wb") as file:
+        if gif:
+            writer = GifWriter(file, renderer.pixel_width, renderer.pixel_height)
+            # Кадр ждёт записи, пока неизвестно, сколько его показывать
+            pending = (bytes(renderer.frame), 0, 0, renderer.pixel_width, renderer.pixel_height)
+            pending_ms = frame_ms
+        else:
+            writer = RawVideoWriter(file)
+            writer.frame(renderer.frame)
+        frames = 1
+        dirty: List[int] = []
+        for number, changed in enumerate(replay_steps(width, height, grid, position, replay.actions), 1):
+            for index in changed:
+                renderer.paint(index, grid[index])
+            dirty.extend(changed)
+            if number % actions_per_frame and number != total:
+                continue
+            if progress:
+                progress(number, total)
+            if not gif:
+                writer.frame(renderer.frame)
+                frames += 1
+            elif not dirty:
+                pending_ms += frame_ms
+            else:
+                writer.frame(*pending, pending_ms)
+                rects = [renderer.cell_rect(index) for index in set(dirty)]
+                left, top = min(rect[0] for rect in rects), min(rect[1] for rect in rects)
+                right, bottom = max(rect[2] for rect in rects), max(rect[3] for rect in rects)
+                pending = (renderer.region(left, top, right, bottom), left, top, right - left, bottom - top)
+                pending_ms = frame_ms
+                frames += 1
+            dirty.clear()
+        if gif:
+            writer.frame(*pending, pending_ms + FINAL_HOLD_MS)
+            writer.close()
+    return ExportResult(frames, renderer.pixel_width, renderer.pixel_height)
+
+
+def load_session(path: str) -> Replay:
+    """Повтор из файла: .rfr — записанный; .rfs и .map — план решателя от позиции робота"""
+    from maze_core.generator import read_map_file
+    from maze_core.savefile import load_game
+    from maze_core.solver import solve_mission
+
+    if path.lower().endswith(".rfr"):
+        return load_replay(path)
+    if path.lower().endswith(".map"):
+        width, height, grid = read_map_file(path)
+        robot_x = robot_y = 0
+    else:
+        saved = load_game(path)
+        width, height, grid, robot_x, robot_y = saved.width, saved.height, saved.grid, saved.robot_x, saved.robot_y
+    grid = bytes(grid).translate(TYPE_ONLY)
+    plan = solve_mission(width, height, grid, (robot_x, robot_y))
+    if plan is None:
+        raise ValueError(f"{path}: миссия невыполнима, повторять нечего")
+    return Replay(width, height, grid, robot_x, robot_y, bytes(plan))
+
+
+def _export_file(path: str, out: str, extension: str, cell_pixels: Optional[int], fps: float,
+                 actions_per_frame: int) -> Tuple[str, str]:
+    """Задача процесса пула: (путь результата, строка отчёта)"""
+    target = os.path.join(out, os.path.splitext(os.path.basename(path))[0] + extension)
+    try:
+        replay = load_session(path)
+        result = export_replay(replay, target, cell_pixels, fps, actions_per_frame)
+    except (OSError, ValueError) as error:
+        return target, f"ошибка: {error}"
+    return target, (f"{len(replay.actions)} действий, {result.frames} кадров "
+                    f"{result.pixel_width}x{result.pixel_height}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт повторов игры в GIF или сырое RGB-видео")
+    parser.add_argument("sessions", nargs="+", help="файлы .rfr (или .rfs/.map — повторяется план решателя)")
+    parser.add_argument("--out", default=".", help="каталог для результатов")
+    parser.add_argument("--format", choices=("gif", "rgb"), default="gif")
+    parser.add_argument("--cell-pixels", type=int, help="размер клетки в пикселях (по умолчанию — по размеру карты)")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+    parser.add_argument("--every", type=int, default=1, help="действий на кадр")
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    extension = "." + args.format
+    count = len(args.sessions)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = pool.map(_export_file, args.sessions, [args.out] * count, [extension] * count,
+                           [args.cell_pixels] * count, [args.fps] * count, [args.every] * count)
+        for target, report in results:
+            print(f"{target}: {report}")
+    if args.format == "rgb":
+        print(f"Сборка видео: ffmpeg -f rawvideo -pix_fmt rgb24 -s ШxВ -r {args.fps:g} -i файл.rgb видео.mp4")
+
+
+if __name__ == "__main__":
+    main()
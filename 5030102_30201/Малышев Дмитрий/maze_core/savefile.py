@@ -0,0 +1,226 @@
+"""Компактное сохранение и загрузка состояния игры.
+
+Формат файла (little-endian):
+    заголовок   SAVE_HEADER: магия, версия формата, ширина, высота,
+                позиция робота, флаги миссии, длины блоков
+    клетки      3-битные коды типов, упакованные подряд (8 клеток = 3 байта)
+    история     JSON-список записей [время, вид, x, y, текст] в UTF-8
+                (в версии 1 — список строк; см. maze_core.history)
+    CRC32       контрольная сумма всего, что выше
+
+Упаковка и распаковка клеток делаются целиком на уровне C: коды
+переводятся в восьмеричные цифры через bytes.translate, а строка цифр —
+в одно большое целое (и обратно), без цикла по клеткам.
+
+История передаётся списком записей или срезом HistoryStore.checkpoint().
+Autosaver хранит уже закодированный JSON истории для каждого файла и при
+следующей контрольной точке того же файла кодирует только новые события,
+так что ни поток интерфейса, ни поток записи не перебирают всю историю
+на каждом действии.
+"""
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from maze_core.history import HistorySlice
+
+SAVE_MAGIC = b"RFSAVE"
+SAVE_VERSION = 2
+# Версии, которые ещё читаются (в версии 1 история — список строк)
+READABLE_VERSIONS = (1, 2)
+SAVE_HEADER = struct.Struct("<6sBIIIIBII")
+SAVE_CRC = struct.Struct("<I")
+
+FLAG_MISSION_COMPLETED = 0x1
+
+# Для скольких файлов Autosaver помнит закодированную историю (веб пишет по файлу на игру)
+ENCODED_HISTORY_FILES = 16
+
+# Код клетки (с битом робота или без) -> восьмеричная цифра и обратно
+_TO_OCTAL = bytes(ord("0") + (value & 0x7) for value in range(256))
+_FROM_OCTAL = bytes((value - ord("0")) & 0x7 for value in range(256))
+
+
+class SavedGame(NamedTuple):
+    width: int
+    height: int
+    grid: bytearray  # коды типов клеток, индекс y * width + x
+    robot_x: int
+    robot_y: int
+    mission_completed: bool
+    history: list  # записи HistoryStore.to_records() или строки версии 1
+
+
+def pack_cells(grid: bytes) -> bytes:
+    """Упаковывает коды клеток по 3 бита (бит робота отбрасывается)"""
+    # Ведущая единица сохраняет нули в начале карты
+    number = int(b"1" + grid.translate(_TO_OCTAL), 8)
+    return number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def unpack_cells(data: bytes, count: int) -> bytearray:
+    """Распаковывает count 3-битных кодов клеток"""
+    digits = format(int.from_bytes(data, "big"), "o")
+    if len(digits) != count + 1 or digits[0] != "1":
+        raise ValueError("Повреждённый блок клеток")
+    return bytearray(digits[1:].encode("ascii").translate(_FROM_OCTAL))
+
+
+def encode_history(history) -> bytes:
+    """JSON истории: список записей или срез HistorySlice"""
+    if isinstance(history, HistorySlice):
+        history = history.events[:history.count]
+    return json.dumps(list(history or []), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(width: int, height: int, grid: bytes, robot_x: int, robot_y: int,
+          mission_completed: bool = False, history=None) -> bytes:
+    """Сериализует состояние игры в байты (history — список записей или срез HistorySlice)"""
+    return _pack(width, height, grid, robot_x, robot_y, mission_completed, encode_history(history))
+
+
+def _pack(width: int, height: int, grid: bytes, robot_x: int, robot_y: int,
+          mission_completed: bool, history_data: bytes) -> bytes:
+    if len(grid) != width * height:
+        raise ValueError("Размер сетки не совпадает с шириной и высотой")
+    cells = pack_cells(grid)
+    flags = FLAG_MISSION_COMPLETED if mission_completed else 0
+    header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, width, height, robot_x, robot_y,
+                              flags, len(cells), len(history_data))
+    body = header + cells + history_data
+    return body + SAVE_CRC.pack(zlib.crc32(body))
+
+
+def loads(data: bytes) -> SavedGame:
+    """Разбирает сохранение, проверяя версию и контрольную сумму"""
+    if len(data) < SAVE_HEADER.size + SAVE_CRC.size:
+        raise ValueError("Файл сохранения слишком короткий")
+    body, (checksum,) = data[:-SAVE_CRC.size], SAVE_CRC.unpack(data[-SAVE_CRC.size:])
+    if zlib.crc32(body) != checksum:
+        raise ValueError("Контрольная сумма сохранения не совпадает")
+
+    (magic, version, width, height, robot_x, robot_y,
+     flags, cells_size, history_size) = SAVE_HEADER.unpack_from(body)
+    if magic != SAVE_MAGIC:
+        raise ValueError("Это не файл сохранения игры")
+    if version not in READABLE_VERSIONS:
+        raise ValueError(f"Неподдерживаемая версия сохранения: {version}")
+    if SAVE_HEADER.size + cells_size + history_size != len(body):
+        raise ValueError("Размеры блоков сохранения не совпадают")
+    if robot_x >= width or robot_y >= height:
+        raise ValueError("Робот в сохранении за границей карты")
+
+    offset = SAVE_HEADER.size
+    grid = unpack_cells(body[offset:offset + cells_size], width * height)
+    offset += cells_size
+    history = json.loads(body[offset:offset + history_size].decode("utf-8"))
+    return SavedGame(width, height, grid, robot_x, robot_y,
+                     bool(flags & FLAG_MISSION_COMPLETED), history)
+
+
+def write_atomic(path: str, data: bytes):
+    """Записывает файл через временный, чтобы не оставить обрезанное сохранение"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def save_game(path: str, **state):
+    write_atomic(path, dumps(**state))
+
+
+def load_game(path: str) -> SavedGame:
+    with open(path, "rb") as file:
+        return loads(file.read())
+
+
+class Autosaver:
+    """Фоновая запись контрольных точек.
+
+    submit() только запоминает снимок состояния (копию сетки и срез
+    истории) и сразу возвращается; упаковка и запись идут в отдельном
+    потоке. Если поток не успевает, промежуточные снимки для того же файла
+    заменяются последним.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._busy = False
+        self.last_error: Optional[Exception] = None
+        # путь -> (список событий, сколько из них закодировано, JSON записей без скобок)
+        self._encoded: 'OrderedDict[str, Tuple[list, int, bytearray]]' = OrderedDict()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, width: int, height: int, grid: bytes, robot_x: int, robot_y: int,
+               mission_completed: bool = False, history=None):
+        if not isinstance(history, HistorySlice):
+            history = list(history or [])
+        snapshot = dict(width=width, height=height, grid=bytes(grid), robot_x=robot_x, robot_y=robot_y,
+                        mission_completed=mission_completed, history=history)
+        with self._condition:
+            self._pending[path] = snapshot
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                path, snapshot = self._pending.popitem()
+                self._busy = True
+            try:
+                history_data = self._encode_history(path, snapshot.pop("history"))
+                write_atomic(path, _pack(history_data=history_data, **snapshot))
+            except (OSError, ValueError) as error:
+                self.last_error = error
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _encode_history(self, path: str, history) -> bytes:
+        """JSON истории; для среза того же списка, что в прошлый раз, кодируются только новые события"""
+        if not isinstance(history, HistorySlice):
+            self._encoded.pop(path, None)
+            return encode_history(history)
+        cached = self._encoded.pop(path, None)
+        if cached is None or cached[0] is not history.events or cached[1] > history.count:
+            cached = (history.events, 0, bytearray())
+        events, count, body = cached
+        if history.count > count:
+            if body:
+                body += b", "
+            body += json.dumps(events[count:history.count], ensure_ascii=False).encode("utf-8")[1:-1]
+        self._encoded[path] = (events, history.count, body)
+        while len(self._encoded) > ENCODED_HISTORY_FILES:
+            self._encoded.popitem(last=False)
+        return b"[" + body + b"]"
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока все снимки будут записаны"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
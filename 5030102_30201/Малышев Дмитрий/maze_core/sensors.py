@@ -0,0 +1,94 @@
+"""Обзор окрестности: окно типов клеток радиуса r вокруг позиции.
+
+Окно — bytes длины (2r+1)^2, строки снизу вверх (как сетка лабиринта),
+в каждой строке слева направо; центр окна — позиция робота. Значения —
+коды типов без бита робота, клетки за границей карты получают OUTSIDE.
+Окно собирается срезами строк сетки, без цикла по клеткам.
+
+* scan — одно окно по сетке лабиринта;
+* scan_batch — окна для N одинаковых по размеру карт, лежащих подряд в
+  одном буфере (как в пакетной среде), одним вызовом;
+* Sensor — производная структура над одной картой: хранит копию сетки
+  с рамкой шириной r, поэтому окно любой позиции — это 2r+1 срезов без
+  проверок границ; windows() отдаёт окна для многих позиций сразу.
+"""
+from typing import Iterable, Sequence, Tuple
+
+from maze_core.cells import TYPE_MASK, TYPE_ONLY, UNKNOWN_CODE
+
+# Код «клетки» за границей карты (незанятый код типа)
+OUTSIDE = UNKNOWN_CODE
+
+
+def window_size(radius: int) -> int:
+    return (2 * radius + 1) ** 2
+
+
+def _append_window(out: bytearray, grid, offset: int, width: int, height: int,
+                   x: int, y: int, radius: int, pad: bytes):
+    """Дописывает в out окно позиции (x, y) карты, начинающейся в grid с offset"""
+    side = 2 * radius + 1
+    left = max(0, radius - x)
+    right = max(0, x + radius + 1 - width)
+    x0, x1 = max(0, x - radius), min(width, x + radius + 1)
+    for row in range(y - radius, y + radius + 1):
+        if 0 <= row < height:
+            start = offset + row * width
+            out += pad[:left]
+            out += grid[start + x0:start + x1]
+            out += pad[:right]
+        else:
+            out += pad[:side]
+
+
+def scan(grid, width: int, height: int, x: int, y: int, radius: int, pad: int = OUTSIDE) -> bytes:
+    """Окно радиуса radius вокруг (x, y) одной карты"""
+    out = bytearray()
+    _append_window(out, grid, 0, width, height, x, y, radius, bytes([pad]) * (2 * radius + 1))
+    return bytes(out.translate(TYPE_ONLY))
+
+
+def scan_batch(grids, width: int, height: int, positions: Sequence[int], radius: int,
+               pad: int = OUTSIDE) -> bytearray:
+    """Окна для карт, лежащих подряд по width*height байт; positions[i] — индекс клетки в карте i"""
+    out = bytearray()
+    padding = bytes([pad]) * (2 * radius + 1)
+    cell_count = width * height
+    for env, position in enumerate(positions):
+        _append_window(out, grids, env * cell_count, width, height,
+                       position % width, position // width, radius, padding)
+    return out.translate(TYPE_ONLY)
+
+
+class Sensor:
+    def __init__(self, width: int, height: int, grid: bytes, radius: int, pad: int = OUTSIDE):
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.side = 2 * radius + 1
+        self.padded_width = width + 2 * radius
+        # Копия сетки (только типы) в рамке из pad шириной radius
+        self.padded = bytearray([pad]) * (self.padded_width * (height + 2 * radius))
+        types = bytes(grid).translate(TYPE_ONLY)
+        for y in range(height):
+            start = (y + radius) * self.padded_width + radius
+            self.padded[start:start + width] = types[y * width:(y + 1) * width]
+
+    def cell_changed(self, x: int, y: int, old_value: int, new_value: int):
+        self.padded[(y + self.radius) * self.padded_width + x + self.radius] = new_value & TYPE_MASK
+
+    def window(self, x: int, y: int) -> bytes:
+        """Окно вокруг (x, y); клетка (x, y) — в центре"""
+        padded, stride, side = self.padded, self.padded_width, self.side
+        start = y * stride + x  # левый нижний угол окна в координатах рамки
+        return b"".join(padded[offset:offset + side] for offset in range(start, start + side * stride, stride))
+
+    def windows(self, positions: Iterable[Tuple[int, int]]) -> bytearray:
+        """Окна для многих позиций одним буфером (по window_size(radius) байт на позицию)"""
+        padded, stride, side = self.padded, self.padded_width, self.side
+        out = bytearray()
+        for x, y in positions:
+            start = y * stride + x
+            for offset in range(start, start + side * stride, stride):
+                out += padded[offset:offset + side]
+        return out
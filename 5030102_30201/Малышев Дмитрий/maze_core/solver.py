@@ -0,0 +1,203 @@
+"""Решение миссии: последовательность действий робота до её выполнения.
+
+Действия — индексы в порядке методов RobotFireman (attack, retreat,
+move_left, move_right, process_fire, process_filled), как в пакетной
+среде и программах робота.
+
+* Если пространство состояний (клетка робота x оставшаяся работа на
+  каждой необработанной клетке) не больше EXACT_STATE_LIMIT, делается
+  BFS по нему — план кратчайший. Для каждого состояния хранится только
+  байт «каким действием сюда пришли»: все действия обратимы, поэтому
+  путь восстанавливается без словаря родителей.
+* Иначе план жадный: дойти (BFS) до ближайшей необработанной клетки,
+  обработать её до поста, повторить, затем дойти до ближайшего финиша.
+
+progress(сделано, всего, текст) вызывается по ходу работы; исключение из
+него (например, отмена фоновой задачи) прерывает решение.
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from maze_core.cells import FIRE, IS_FINISH, PASSABLE, PENDING, TYPE_MASK, flagged
+from maze_core.engine import MOVES, PROCESS_FILLED, PROCESS_FIRE, move_target
+
+# Наибольшее число состояний (клеток x вариантов работы) для точного решения
+EXACT_STATE_LIMIT = 4_000_000
+
+Progress = Optional[Callable[[float, float, str], None]]
+
+
+Neighbors = List[Tuple[Tuple[int, int], ...]]
+
+
+def _neighbor_table(width: int, height: int) -> Neighbors:
+    """Для каждой клетки — пары (действие, соседняя клетка) по правилам хода движка (move_target)"""
+    table = []
+    for index in range(width * height):
+        moves = ((action, move_target(width, height, index, action)) for action in range(PROCESS_FIRE))
+        table.append(tuple(move for move in moves if move[1] >= 0))
+    return table
+
+
+def _component(grid: bytes, neighbors: Neighbors, start: int, progress: Progress) -> set:
+    size = len(grid)
+    seen = {start}
+    frontier = [start]
+    while frontier:
+        if progress:
+            progress(len(seen), size, f"Поиск достижимых клеток: {len(seen)}")
+        reached = []
+        for index in frontier:
+            for _, neighbor in neighbors[index]:
+                if neighbor not in seen and PASSABLE[grid[neighbor]]:
+                    seen.add(neighbor)
+                    reached.append(neighbor)
+        frontier = reached
+    return seen
+
+
+def solve_mission(width: int, height: int, grid: bytes, start: Tuple[int, int],
+                  progress: Progress = None) -> Optional[List[int]]:
+    """План действий от позиции start; None — миссия невыполнима"""
+    grid = bytes(grid)
+    start_index = start[1] * width + start[0]
+    neighbors = _neighbor_table(width, height)
+    component = _component(grid, neighbors, start_index, progress)
+    pending = [index for index in sorted(component) if PENDING[grid[index]]]
+    if len(pending) != grid.translate(PENDING).count(1):
+        return None  # есть недостижимые пожары или залитые клетки
+    if not any(IS_FINISH[grid[index]] for index in component):
+        return None
+
+    # Работа на клетке: пожар — 2 действия (в залитое, в пост), залитое — 1
+    work = [2 if grid[index] & TYPE_MASK == FIRE else 1 for index in pending]
+    states = width * height
+    for amount in work:
+        states *= amount + 1
+    if states <= EXACT_STATE_LIMIT:
+        return _solve_exact(grid, neighbors, width, start_index, pending, work, progress)
+    return _solve_greedy(grid, neighbors, start_index, pending, work, progress)
+
+
+def _solve_exact(grid: bytes, neighbors: Neighbors, width: int, start: int, pending: List[int], work: List[int],
+                 progress: Progress) -> Optional[List[int]]:
+    size = len(grid)
+    # Маска — число в смешанной системе счисления: разряд i — оставшаяся работа на pending[i]
+    place = []
+    total = 1
+    for amount in work:
+        place.append(total)
+        total *= amount + 1
+    slot_of: Dict[int, int] = {index: slot for slot, index in enumerate(pending)}
+    start_mask = sum(amount * value for amount, value in zip(work, place))
+
+    # came_by[mask * size + клетка] = действие + 1 (0 — не посещено)
+    came_by = bytearray(total * size)
+    start_key = start_mask * size + start
+    came_by[start_key] = 0xFF
+    frontier = [start_key]
+    visited = 1
+    goal = None
+    while frontier and goal is None:
+        if progress:
+            progress(visited, total * size, f"Точный поиск: состояний {visited}")
+        reached = []
+        for key in frontier:
+            mask, index = divmod(key, size)
+            if mask == 0 and IS_FINISH[grid[index]]:
+                goal = key
+                break
+            slot = slot_of.get(index)
+            remaining = mask // place[slot] % (work[slot] + 1) if slot is not None else 0
+            if remaining:
+                action = PROCESS_FIRE if remaining == 2 else PROCESS_FILLED
+                next_key = key - place[slot] * size
+                if not came_by[next_key]:
+                    came_by[next_key] = action + 1
+                    reached.append(next_key)
+            base = mask * size
+            for action, neighbor in neighbors[index]:
+                next_key = base + neighbor
+                if not came_by[next_key] and PASSABLE[grid[neighbor]]:
+                    came_by[next_key] = action + 1
+                    reached.append(next_key)
+        visited += len(reached)
+        frontier = reached
+    if goal is None:
+        return None
+
+    # Обратный ход: каждое действие однозначно отменяется
+    undo = {action: -(dy * width + dx) for action, (dx, dy) in enumerate(MOVES)}
+    actions = []
+    key = goal
+    while key != start_key:
+        action = came_by[key] - 1
+        actions.append(action)
+        if action in undo:
+            key += undo[action]
+        else:
+            key += place[slot_of[key % size]] * size
+    actions.reverse()
+    return actions
+
+
+def _path_to_nearest(grid: bytes, neighbors: Neighbors, start: int, targets) -> Optional[Tuple[int, List[int]]]:
+    """BFS до ближайшей клетки из targets: (клетка, действия движения)"""
+    if start in targets:
+        return start, []
+    came = {start: None}
+    frontier = [start]
+    while frontier:
+        reached = []
+        for index in frontier:
+            for action, neighbor in neighbors[index]:
+                if neighbor in came or not PASSABLE[grid[neighbor]]:
+                    continue
+                came[neighbor] = (index, action)
+                if neighbor in targets:
+                    actions = []
+                    cell = neighbor
+                    while came[cell] is not None:
+                        cell, action = came[cell]
+                        actions.append(action)
+                    actions.reverse()
+                    return neighbor, actions
+                reached.append(neighbor)
+        frontier = reached
+    return None
+
+
+def _solve_greedy(grid: bytes, neighbors: Neighbors, start: int, pending: List[int], work: List[int],
+                  progress: Progress) -> Optional[List[int]]:
+    remaining = dict(zip(pending, work))
+    actions: List[int] = []
+    position = start
+    count = len(pending)
+    while remaining:
+        if progress:
+            progress(count - len(remaining), count + 1, f"Жадный план: обработано {count - len(remaining)} из {count}")
+        found = _path_to_nearest(grid, neighbors, position, remaining)
+        if found is None:
+            return None
+        position, path = found
+        actions.extend(path)
+        actions.extend((PROCESS_FIRE, PROCESS_FILLED) if remaining.pop(position) == 2 else (PROCESS_FILLED,))
+    if progress:
+        progress(count, count + 1, "Жадный план: путь к финишу")
+    finishes = set(flagged(grid.translate(IS_FINISH)))
+    found = _path_to_nearest(grid, neighbors, position, finishes)
+    if found is None:
+        return None
+    actions.extend(found[1])
+    return actions
+
+
+def plan_positions(width: int, start: Tuple[int, int], actions: Sequence[int]) -> List[Tuple[int, int]]:
+    """Клетки, через которые проходит робот по плану (для отрисовки маршрута)"""
+    x, y = start
+    positions = [(x, y)]
+    for action in actions:
+        if action < PROCESS_FIRE:
+            dx, dy = MOVES[action]
+            x, y = x + dx, y + dy
+            positions.append((x, y))
+    return positions
@@ -0,0 +1,246 @@
+"""Пакетная среда для обучения и оценки политик робота-пожарного.
+
+N независимых лабиринтов хранятся в одном bytearray (по width*height байт на
+среду, значения в формате RobotMaze: тип клетки | 0x8 для робота), поэтому
+наблюдение — это сам буфер, без копирования и без объектов RobotCell.
+Правила — те же, что у движка maze_core.engine (и значит у RobotFireman):
+таблицы ходов строятся его move_target, обработка идёт по TRANSITIONS,
+завершение проверяет mission_complete. Движение на непроходимую клетку или
+за границу отклоняется, process_fire переводит ПОЖАР в ЗАЛИТОЕ,
+process_filled — ЗАЛИТОЕ в ПОСТ, миссия завершена, когда робот на финише и
+не осталось пожаров и залитых клеток.
+
+Для политик с локальным обзором observe_windows(r) отдаёт окна вокруг
+роботов всех сред (см. maze_core.sensors).
+
+По умолчанию карты — случайные 5x5 того же состава, что у
+RobotMaze.create_random_maze_5x5; при сбросе шаблон клеток перемешивается
+генератором среды прямо в буфер self.grids, без RobotMaze и объектов
+клеток. map_factory нужен только для своих карт.
+
+Замер скорости: python batch_env.py --envs 4096 --steps 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import catalog, cells
+from maze_core.cells import ROAD, ROBOT_BIT
+# Индексы действий совпадают с порядком методов RobotFireman
+from maze_core.engine import ACTIONS, PROCESS_FIRE, TRANSITIONS, mission_complete, move_target
+from maze_core.sensors import scan_batch
+
+if TYPE_CHECKING:
+    from desktop_app import RobotMaze  # только для аннотаций: desktop_app тянет tkinter
+
+# Награды
+REWARD_STEP = -0.01
+REWARD_INVALID = -0.1
+REWARD_PROCESS = 1.0
+REWARD_COMPLETE = 10.0
+
+# Случайная карта по умолчанию (состав — как у каталога миссий): робот на дороге в (0, 0),
+# остальные клетки — перестановка шаблона
+RANDOM_SIZE = catalog.SIZE
+RANDOM_TEMPLATE = list(catalog.MISSION_CELLS) + [ROAD] * (catalog.CELL_COUNT - 1 - len(catalog.MISSION_CELLS))
+RANDOM_PENDING = bytes(catalog.MISSION_CELLS).translate(cells.PENDING).count(1)
+
+
+class BatchRobotEnv:
+    """N независимых миссий в общем буфере; reset и step проходят по средам одним циклом Python"""
+
+    def __init__(self, num_envs: int, seed: Optional[int] = None,
+                 map_factory: Optional[Callable[[random.Random], 'RobotMaze']] = None,
+                 max_steps: int = 200, auto_reset: bool = True):
+        """map_factory(rng) -> RobotMaze — свои карты; None — случайные 5x5 из шаблона"""
+        self.num_envs = num_envs
+        self.map_factory = map_factory
+        self.max_steps = max_steps
+        self.auto_reset = auto_reset
+
+        base_seed = seed if seed is not None else random.randrange(1 << 30)
+        self.rngs = [random.Random(f"{base_seed}:{i}") for i in range(num_envs)]
+
+        if map_factory is None:
+            self.width = self.height = RANDOM_SIZE
+        else:
+            sample = map_factory(random.Random(base_seed))
+            self.width = sample.width
+            self.height = sample.height
+        self.cell_count = self.width * self.height
+
+        self.grids = bytearray(num_envs * self.cell_count)
+        self.positions = array("l", [0] * num_envs)
+        self.pending = array("l", [0] * num_envs)
+        self.steps = array("l", [0] * num_envs)
+        self.completed = bytearray(num_envs)
+        self.finished = bytearray(num_envs)  # эпизод окончен (миссия или лимит шагов), среда ждёт reset
+        self._build_move_tables()
+
+    def _build_move_tables(self):
+        """Для каждого направления — локальный индекс соседней клетки или -1 (move_target движка)"""
+        self.move_targets = [array("l", (move_target(self.width, self.height, local, action)
+                                         for local in range(self.cell_count)))
+                             for action in range(PROCESS_FIRE)]
+
+    def _load_random(self, env: int):
+        """Случайная карта из шаблона: первые клетки перестановки выбираются частичной перестановкой Фишера — Йетса"""
+        cells_left = RANDOM_TEMPLATE[:]
+        size = len(cells_left)
+        uniform = self.rngs[env].random
+        for i in range(len(catalog.MISSION_CELLS)):
+            j = i + int(uniform() * (size - i))
+            cells_left[i], cells_left[j] = cells_left[j], cells_left[i]
+        base = env * self.cell_count
+        self.grids[base] = ROAD | ROBOT_BIT
+        self.grids[base + 1:base + self.cell_count] = bytes(cells_left)
+        self.positions[env] = 0
+        self.pending[env] = RANDOM_PENDING
+        self.steps[env] = 0
+        self.completed[env] = 0
+        self.finished[env] = 0
+
+    def _load_map(self, env: int):
+        if self.map_factory is None:
+            self._load_random(env)
+            return
+        maze = self.map_factory(self.rngs[env])
+        if (maze.width, maze.height) != (self.width, self.height):
+            raise ValueError("Все карты пакетной среды должны быть одного размера")
+
+        values = bytes(maze.grid)
+        base = env * self.cell_count
+        self.grids[base:base + self.cell_count] = values
+
+        self.positions[env] = next(i for i, value in enumerate(values) if value & ROBOT_BIT)
+        self.pending[env] = values.translate(cells.PENDING).count(1)
+        self.steps[env] = 0
+        self.completed[env] = 0
+        self.finished[env] = 0
+
+    def reset(self, envs: Optional[Sequence[int]] = None) -> bytearray:
+        """Сбрасывает указанные (или все) среды; возвращает буфер наблюдений"""
+        for env in (range(self.num_envs) if envs is None else envs):
+            self._load_map(env)
+        return self.grids
+
+    def observation(self, env: int) -> bytes:
+        """Копия наблюдения одной среды (width*height значений, строки снизу вверх)"""
+        base = env * self.cell_count
+        return bytes(self.grids[base:base + self.cell_count])
+
+    def observe_windows(self, radius: int) -> bytearray:
+        """Окна радиуса radius вокруг роботов всех сред одним буфером (по (2r+1)^2 байт на среду)"""
+        return scan_batch(self.grids, self.width, self.height, self.positions, radius)
+
+    def step(self, actions: Sequence[int]):
+        """Выполняет по одному действию в каждой среде.
+
+        Возвращает (наблюдения, награды, флаги завершения). Наблюдения — общий
+        буфер self.grids, изменяемый на месте; завершившиеся среды при
+        auto_reset сразу перезапускаются, и их наблюдение — уже новая карта.
+        Без auto_reset окончившаяся среда до reset не меняется: её действие
+        пропускается, награда 0, флаг завершения остаётся 1.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Ожидалось {self.num_envs} действий, получено {len(actions)}")
+        if actions and (min(actions) < 0 or max(actions) >= len(ACTIONS)):
+            raise ValueError(f"Недопустимое действие: допустимы 0..{len(ACTIONS) - 1}")
+
+        grids = self.grids
+        positions = self.positions
+        pending = self.pending
+        steps = self.steps
+        completed = self.completed
+        finished_envs = self.finished
+        targets = self.move_targets
+        cell_count = self.cell_count
+        max_steps = self.max_steps
+        passable = cells.PASSABLE
+        pending_table = cells.PENDING
+
+        rewards = [REWARD_STEP] * self.num_envs
+        dones = bytearray(self.num_envs)
+        finished = []
+
+        base = 0
+        for env, action in enumerate(actions):
+            if finished_envs[env]:
+                rewards[env] = 0.0
+                dones[env] = 1
+                base += cell_count
+                continue
+            local = positions[env]
+            if action < PROCESS_FIRE:
+                target = targets[action][local]
+                if target < 0 or not passable[grids[base + target]]:
+                    rewards[env] = REWARD_INVALID
+                else:
+                    grids[base + local] ^= ROBOT_BIT
+                    grids[base + target] |= ROBOT_BIT
+                    positions[env] = local = target
+            else:
+                index = base + local
+                value = grids[index]
+                new_value = TRANSITIONS[action - PROCESS_FIRE][value]
+                if new_value == value:
+                    rewards[env] = REWARD_INVALID
+                else:
+                    grids[index] = new_value
+                    pending[env] += pending_table[new_value] - pending_table[value]
+                    rewards[env] = REWARD_PROCESS
+
+            steps[env] += 1
+            if mission_complete(grids[base + local], pending[env]):
+                completed[env] = finished_envs[env] = 1
+                rewards[env] += REWARD_COMPLETE
+                dones[env] = 1
+                finished.append(env)
+            elif steps[env] >= max_steps:
+                finished_envs[env] = 1
+                dones[env] = 1
+                finished.append(env)
+            base += cell_count
+
+        if self.auto_reset:
+            for env in finished:
+                self._load_map(env)
+
+        return grids, rewards, dones
+
+
+def benchmark(num_envs: int, num_steps: int, seed: int, max_steps: int = 200):
+    env = BatchRobotEnv(num_envs, seed=seed, max_steps=max_steps)
+    env.reset()
+    rng = random.Random(seed)
+    batches: List[List[int]] = [[rng.randrange(len(ACTIONS)) for _ in range(num_envs)] for _ in range(16)]
+
+    started = time.perf_counter()
+    episodes = 0
+    for step in range(num_steps):
+        _, _, dones = env.step(batches[step % len(batches)])
+        episodes += dones.count(1)
+    elapsed = time.perf_counter() - started
+
+    total = num_envs * num_steps
+    print(f"Сред: {num_envs}, шагов: {total}, эпизодов завершено: {episodes}")
+    print(f"Время: {elapsed:.2f} с, шагов среды в секунду: {total / elapsed:,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер скорости пакетной среды")
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=200, help="длина эпизода (чаще сбросы — меньше)")
+    args = parser.parse_args()
+    benchmark(args.envs, args.steps, args.seed, args.max_steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,62 @@
 import tkinter as tk
-from tkinter import scrolledtext, messagebox
+from tkinter import scrolledtext, messagebox, filedialog, ttk
 from enum import Enum
-from typing import Optional, List
+from typing import Callable, Optional, List, Tuple
+import os
 import random
-import time
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import catalog, cells, history, savefile
+from maze_core.generator import MapGenerator, read_map_file
+from maze_core.history import HistoryStore
+from maze_core.jobs import Job, JobPool
+from maze_core.minimap import Minimap
+from maze_core.distance import FIELD_SOURCES, DistanceField, heat_color
+from maze_core.engine import (ATTACK, BLOCKED, DEFAULT_MISSION_SIZE, MOVE_LEFT, MOVE_RIGHT, MOVED, NO_ROBOT, OUTSIDE,
+                               PROCESS_FILLED, PROCESS_FIRE, PROCESSED, RETREAT, MissionEngine, default_mission)
+from maze_core.pathfinding import HierarchicalPathfinder
+from maze_core.reachability import Reachability
+from maze_core.replay import Replay, export_replay, save_replay
+from maze_core.sensors import Sensor
+from maze_core.solver import plan_positions, solve_mission
+from robot_program import ACTIONS, DEFAULT_BUDGET, STATUS_NAMES, ProgramRunner, RunResult, compile_program
+
+# Файл контрольной точки, которая пишется в фоне после каждого действия
+AUTOSAVE_PATH = os.path.join(os.path.expanduser("~"), ".robot_fireman", "autosave.rfs")
+
+# Сколько клеток по стороне показывает основной вид (большие карты листаются)
+VIEW_CELLS = 30
+# Размер мини-карты в пикселях (по большей стороне)
+MINIMAP_PIXELS = 160
+
+# Период опроса очереди фоновых задач, мс
+JOB_POLL_MS = 50
+
+# Сколько событий истории на одной странице панели
+HISTORY_PAGE_SIZE = 40
+# Фильтр вида событий в панели истории: подпись -> вид (None — все)
+HISTORY_KIND_FILTERS = {"Все события": None, **{name: kind for kind, name in history.KIND_NAMES.items()}}
+
+# Сложность «Нового лабиринта»: подпись -> уровень каталога миссий (None — любой)
+DIFFICULTY_CHOICES = {"Любая сложность": None, **{name: level for level, name in catalog.LEVEL_NAMES.items()}}
+
+# Программа, с которой открывается окно программы робота
+PROGRAM_EXAMPLE = """# Обход по правой руке с обработкой клеток
+while true:
+    if here fire:
+        process_fire
+    if here filled:
+        process_filled
+    if right open:
+        move_right
+    elif forward open:
+        attack
+    elif left open:
+        move_left
+    else:
+        retreat
+"""
 
 
 class DirectionType(Enum):
@@ -15,54 +68,79 @@ class DirectionType(Enum):
     DIAG_DOWN = "DiagDown"
 
 
-class CellType(Enum):
-    ROAD = 0x0
-    FIRE = 0x1
-    FILLED = 0x2
-    WATER = 0x3
-    BARRIER = 0x4
-    FINISH = 0x5
-    POST = 0x6
-
+class _CellTypeBase(Enum):
     @classmethod
     def from_value(cls, value: int) -> 'CellType':
-        base_value = value & 0x7
-        for cell_type in cls:
-            if cell_type.value == base_value:
-                return cell_type
-        return cls.ROAD
+        return _CELL_TYPE_BY_CODE[value & 0x7]
 
     def get_color(self):
-        colors = {
-            CellType.ROAD: "white",
-            CellType.FIRE: "red",
-            CellType.FILLED: "orange",
-            CellType.WATER: "blue",
-            CellType.BARRIER: "black",
-            CellType.FINISH: "green",
-            CellType.POST: "purple",
-        }
-        return colors.get(self, "gray")
+        return cells.COLORS[self.value]
 
     def get_symbol(self):
-        symbols = {
-            CellType.ROAD: "ДОРОГА",
-            CellType.FIRE: "ПОЖАР",
-            CellType.FILLED: "ЗАЛИТОЕ",
-            CellType.WATER: "ВОДА",
-            CellType.BARRIER: "БАРЬЕР",
-            CellType.FINISH: "ФИНИШ",
-            CellType.POST: "ПОСТ",
-        }
-        return symbols.get(self, "?")
+        return cells.SYMBOLS[self.value]
+
+
+# Члены CellType (ROAD, FIRE, ...) объявляются в реестре maze_core.cells
+CellType = _CellTypeBase("CellType", [(info.key.upper(), info.code) for info in cells.CELL_TYPES],
+                         module=__name__)
+
+# Неизвестные коды считаются дорогой
+_CELL_TYPE_BY_CODE = [CellType.ROAD] * 8
+for _cell_type in CellType:
+    _CELL_TYPE_BY_CODE[_cell_type.value] = _cell_type
+
+DIRECTION_OFFSETS = {
+    DirectionType.FORWARD: (0, 1),
+    DirectionType.BACKWARD: (0, -1),
+    DirectionType.LEFT: (-1, 0),
+    DirectionType.RIGHT: (1, 0),
+    DirectionType.DIAG_UP: (-1, 1),
+    DirectionType.DIAG_DOWN: (1, -1),
+}
 
 
 class RobotCell:
-    def __init__(self, x: int = 0, y: int = 0, cell_value: int = 0x0):
+    """Клетка лабиринта.
+
+    Клетка, полученная из RobotMaze, — это представление над его компактной
+    сеткой: чтение и запись cell_type/has_robot идут прямо в RobotMaze.grid.
+    """
+
+    def __init__(self, x: int = 0, y: int = 0, cell_value: int = 0x0, maze: 'RobotMaze' = None):
         self.x = x
         self.y = y
-        self.has_robot = (cell_value & 0x8) != 0
-        self.cell_type = CellType.from_value(cell_value)
+        self.maze = maze
+        self._value = cell_value & 0xF
+
+    @property
+    def value(self) -> int:
+        """Значение клетки: код типа | 0x8, если в клетке робот"""
+        if self.maze is not None:
+            return self.maze.grid[self.y * self.maze.width + self.x]
+        return self._value
+
+    @value.setter
+    def value(self, value: int):
+        if self.maze is not None:
+            self.maze.set_value(self.x, self.y, value)
+        else:
+            self._value = value
+
+    @property
+    def has_robot(self) -> bool:
+        return (self.value & 0x8) != 0
+
+    @has_robot.setter
+    def has_robot(self, has_robot: bool):
+        self.value = (self.value & 0x7) | (0x8 if has_robot else 0x0)
+
+    @property
+    def cell_type(self) -> CellType:
+        return CellType.from_value(self.value)
+
+    @cell_type.setter
+    def cell_type(self, cell_type: CellType):
+        self.value = (self.value & 0x8) | cell_type.value
 
     def get_display_text(self):
         return self.cell_type.get_symbol()
@@ -72,135 +150,162 @@ class RobotCell:
 
     def is_forbidden(self):
         """Проверяет, является ли клетка запрещенной для захода"""
-        return self.cell_type in [CellType.BARRIER]
+        return not cells.PASSABLE[self.value]
 
 
 class RobotMaze:
+    """Лабиринт: компактная сетка значений клеток (индекс y * width + x, y = 0 — нижняя строка).
+
+    Сетка, позиция робота и правила миссии живут в maze_core.engine.MissionEngine
+    (общем с веб-приложением); здесь — клетки-представления и производные
+    структуры (граф кластеров для поиска пути, компоненты связности, поля
+    расстояний, мини-карта), которые обновляются через слушателей движка
+    и сбрасываются при замене всей сетки.
+    """
+
     def __init__(self, width: int = None, height: int = None, cells: List[List[int]] = None):
-        self.width = width if width is not None else 0
-        self.height = height if height is not None else 0
-        self.cells = []
+        self.engine = MissionEngine()
 
         if cells is not None:
             self.load_from_values(cells)
         elif width is not None and height is not None:
-            self.initialize_maze()
+            self._replace_grid(width, height, bytearray(width * height))
+
+    @property
+    def width(self) -> int:
+        return self.engine.width
+
+    @property
+    def height(self) -> int:
+        return self.engine.height
+
+    @property
+    def grid(self) -> bytearray:
+        return self.engine.grid
+
+    @property
+    def listeners(self) -> List[Callable[[int, int, int, int], None]]:
+        return self.engine.listeners
 
     def load_from_values(self, cell_values: List[List[int]]):
         if not cell_values:
-            self.height = 0
-            self.width = 0
-            self.cells = []
+            self._replace_grid(0, 0, bytearray())
             return
 
-        self.height = len(cell_values)
-        self.width = len(cell_values[0]) if self.height > 0 else 0
+        height = len(cell_values)
+        width = len(cell_values[0]) if height > 0 else 0
+
+        grid = bytearray(width * height)
+        for y in range(height):
+            offset = y * width
+            grid[offset:offset + width] = bytes(value & 0xF for value in cell_values[y][:width])
+        self._replace_grid(width, height, grid)
+
+    def load_from_grid(self, width: int, height: int, grid: bytes):
+        """Загружает карту из компактного буфера (индекс y * width + x)"""
+        if len(grid) != width * height:
+            raise ValueError("Размер сетки не совпадает с шириной и высотой")
+        self._replace_grid(width, height, bytearray(grid))
 
-        self.cells = []
-        for row_idx in range(self.height - 1, -1, -1):
-            y = row_idx
-            row = []
-            for x in range(self.width):
-                cell_value = cell_values[row_idx][x]
-                cell = RobotCell(x, y, cell_value)
-                row.append(cell)
-            self.cells.append(row)
+    def generate_random_map(self, width: int, height: int, seed: int = None, **options):
+        """Процедурная карта произвольного размера (параметры — как у MapGenerator)"""
+        grid = MapGenerator(width, height, seed=seed, **options).generate()
+        grid[0] |= 0x8  # Робот начинает в (0, 0)
+        self.load_from_grid(width, height, grid)
 
     def initialize_maze(self, cell_type: CellType = None):
         if cell_type is None:
             cell_type = CellType.ROAD
 
-        self.cells = []
-        for list_y in range(self.height):
-            y = self.height - 1 - list_y
-            row = []
-            for x in range(self.width):
-                cell_value = cell_type.value
-                cell = RobotCell(x, y, cell_value)
-                row.append(cell)
-            self.cells.append(row)
+        self._replace_grid(self.width, self.height, bytearray([cell_type.value]) * (self.width * self.height))
+
+    def _replace_grid(self, width: int, height: int, grid: bytearray):
+        """Заменяет сетку целиком и сбрасывает производные структуры"""
+        self.engine.load(width, height, grid)
+
+    def _derived_index(self, name: str, factory):
+        """Производная структура над сеткой: строится при первом обращении и обновляется через cell_changed"""
+        return self.engine.derived(name, factory)
+
+    def set_value(self, x: int, y: int, value: int):
+        """Записывает значение клетки и сообщает слушателям, если изменился тип клетки"""
+        self.engine.set_value(x, y, value)
+
+    def get_pathfinder(self) -> HierarchicalPathfinder:
+        """Иерархический поиск пути по текущей сетке (граф кластеров кэшируется)"""
+        return self._derived_index(
+            "pathfinder", lambda: HierarchicalPathfinder(self.width, self.height, self.grid))
+
+    def get_reachability(self) -> Reachability:
+        """Компоненты связности проходимых клеток (обновляются при изменении клеток)"""
+        return self._derived_index("reachability", lambda: Reachability(self.width, self.height, self.grid))
+
+    def get_distance_field(self, target: str) -> DistanceField:
+        """Поле расстояний до целей target ("finish" или "pending"), обновляется инкрементально"""
+        sources, _ = FIELD_SOURCES[target]
+        return self._derived_index(f"distance:{target}",
+                                   lambda: DistanceField(self.width, self.height, self.grid, sources))
+
+    def get_minimap(self) -> Minimap:
+        """Мини-карта (пересчитываются только плитки с изменёнными клетками)"""
+        return self._derived_index("minimap", lambda: Minimap(self.width, self.height, self.grid))
+
+    def get_sensor(self, radius: int) -> Sensor:
+        """Обзор окрестностей радиуса radius (копия сетки в рамке, обновляется при изменении клеток)"""
+        return self._derived_index(f"sensor:{radius}", lambda: Sensor(self.width, self.height, self.grid, radius))
+
+    def find_cell(self, cell_type: CellType) -> Optional[Tuple[int, int]]:
+        """Координаты первой клетки заданного типа (с роботом или без)"""
+        positions = [index for index in (self.grid.find(cell_type.value), self.grid.find(cell_type.value | 0x8))
+                     if index >= 0]
+        if not positions:
+            return None
+        index = min(positions)
+        return index % self.width, index // self.width
+
+    def to_values(self) -> List[List[int]]:
+        """Возвращает значения клеток (тип | 0x8 для робота) в формате load_from_values"""
+        return [list(self.grid[y * self.width:(y + 1) * self.width]) for y in range(self.height)]
+
+    def find_robot(self) -> Optional[RobotCell]:
+        """Клетка с роботом (позицию отслеживает движок)"""
+        robot = self.engine.robot
+        return self.get_cell_by_coordinates(*robot) if robot else None
+
+    def has_unprocessed_cells(self) -> bool:
+        """Есть ли на карте клетки ПОЖАР или ЗАЛИТОЕ (счётчик движка, без просмотра карты)"""
+        return self.engine.pending > 0
 
     def get_cell_by_coordinates(self, x: int, y: int) -> Optional[RobotCell]:
         if 0 <= x < self.width and 0 <= y < self.height:
-            list_y = self.height - 1 - y
-            return self.cells[list_y][x]
+            return RobotCell(x, y, maze=self)
         return None
 
     def get_neighbor_cell(self, current_cell: RobotCell,
                           search_direction: DirectionType) -> Optional[RobotCell]:
-        if not self.cells or not current_cell:
+        if not self.grid or not current_cell:
             return None
 
         x, y = current_cell.x, current_cell.y
-
-        offsets = {
-            DirectionType.FORWARD.value: (0, 1),
-            DirectionType.BACKWARD.value: (0, -1),
-            DirectionType.LEFT.value: (-1, 0),
-            DirectionType.RIGHT.value: (1, 0),
-            DirectionType.DIAG_UP.value: (-1, 1),
-            DirectionType.DIAG_DOWN.value: (1, -1),
-        }
-
-        dx, dy = offsets.get(search_direction.value, (0, 0))
+        dx, dy = DIRECTION_OFFSETS.get(search_direction, (0, 0))
         return self.get_cell_by_coordinates(x + dx, y + dy)
 
     def initialize_mission_map(self):
-        """Инициализация конкретной карты для миссии 5x5"""
-        self.width = 5
-        self.height = 5
-        self.cells = []
-
-        for list_y in range(self.height):
-            y = self.height - 1 - list_y
-            row = []
-            for x in range(self.width):
-                cell = RobotCell(x, y, CellType.ROAD.value)
-                row.append(cell)
-            self.cells.append(row)
-
-        # Устанавливаем специальные клетки
-        self.get_cell_by_coordinates(4, 4).cell_type = CellType.FINISH  # Финиш
-        self.get_cell_by_coordinates(3, 4).cell_type = CellType.BARRIER  # Барьер
-        self.get_cell_by_coordinates(2, 4).cell_type = CellType.POST  # Пост
-        self.get_cell_by_coordinates(1, 4).cell_type = CellType.FIRE  # Пожар
-
-        self.get_cell_by_coordinates(3, 3).cell_type = CellType.FIRE  # Пожар
-        self.get_cell_by_coordinates(1, 3).cell_type = CellType.FILLED  # Залитое
-
-        self.get_cell_by_coordinates(3, 2).cell_type = CellType.POST  # Пост
-        self.get_cell_by_coordinates(1, 2).cell_type = CellType.FIRE  # Пожар
-        self.get_cell_by_coordinates(0, 2).cell_type = CellType.BARRIER  # Барьер
-
-        self.get_cell_by_coordinates(2, 1).cell_type = CellType.FILLED  # Залитое
-
-        self.get_cell_by_coordinates(4, 0).cell_type = CellType.POST  # Пост
-        self.get_cell_by_coordinates(3, 0).cell_type = CellType.BARRIER  # Барьер
-
-        # Начальная позиция робота в (0, 0)
-        start_cell = self.get_cell_by_coordinates(0, 0)
-        start_cell.has_robot = True
+        """Инициализация конкретной карты для миссии 5x5 (общей с веб-приложением, робот в (0, 0))"""
+        self._replace_grid(DEFAULT_MISSION_SIZE, DEFAULT_MISSION_SIZE, default_mission())
 
-    def create_random_maze_5x5(self):
+    def create_random_maze_5x5(self, rng: random.Random = None):
         """Создает случайный лабиринт 5x5 с гарантией, что робот начинает на разрешенной клетке"""
-        self.width = 5
-        self.height = 5
-        self.cells = []
-
+        if rng is None:
+            rng = random
         # Создаем все клетки
-        for list_y in range(self.height):
-            y = self.height - 1 - list_y
-            row = []
-            for x in range(self.width):
-                cell = RobotCell(x, y, CellType.ROAD.value)
-                row.append(cell)
-            self.cells.append(row)
+        self._replace_grid(5, 5, bytearray(25))
 
         start_cell = self.get_cell_by_coordinates(0, 0)
         start_cell.cell_type = CellType.ROAD
 
         all_positions = [(x, y) for x in range(5) for y in range(5) if not (x == 0 and y == 0)]
-        random.shuffle(all_positions)
+        rng.shuffle(all_positions)
 
         # Распределяем типы клеток
         cell_types = [
@@ -217,193 +322,254 @@ class RobotMaze:
 
         start_cell.has_robot = True
 
+    def create_mission_maze_5x5(self, level: Optional[str] = None, rng: random.Random = None) -> int:
+        """Выполнимая миссия 5x5 уровня level из каталога миссий; длина её кратчайшего решения.
+
+        Без каталога миссия — случайная раскладка, проверенная решателем (без учёта уровня).
+        """
+        mission = catalog.random_mission(level, rng)
+        mission.grid[0] |= 0x8  # Робот начинает в (0, 0)
+        self.load_from_grid(catalog.SIZE, catalog.SIZE, mission.grid)
+        return mission.length
+
 
 class RobotFireman:
+    """Робот на лабиринте: действия выполняет движок лабиринта, здесь — журнал и запись повтора"""
+
     def __init__(self, labyrinth: RobotMaze):
         self.labyrinth = labyrinth
-        self.action_history: List[str] = []
+        self.engine = labyrinth.engine
+        self.action_history = HistoryStore()
         self.mission_completed = False
         self.notification_shown = False
+        self.impossible_notified = False
+
+        if self.engine.position < 0 and labyrinth.width and labyrinth.height:
+            self.engine.place_robot(0, 0)
+
+        # Запись для повтора (maze_core.replay): начальная карта и индексы всех действий
+        self.replay_start = (bytes(labyrinth.grid), self.current_x, self.current_y)
+        self.recorded_actions = bytearray()
+
+        self._log_action(f"Начало миссии в ({self.current_x},{self.current_y}).",
+                         cell=(self.current_x, self.current_y))
+
+    @property
+    def current_x(self) -> int:
+        return self.engine.position % self.engine.width
+
+    @property
+    def current_y(self) -> int:
+        return self.engine.position // self.engine.width
+
+    @property
+    def current_cell(self) -> Optional[RobotCell]:
+        robot = self.engine.robot
+        return self.labyrinth.get_cell_by_coordinates(*robot) if robot else None
+
+    @property
+    def mission_completed(self) -> bool:
+        return self.engine.completed
+
+    @mission_completed.setter
+    def mission_completed(self, completed: bool):
+        self.engine.completed = completed
+
+    def _log_action(self, action: str, kind: str = history.INFO, cell: Optional[Tuple[int, int]] = None):
+        """Вспомогательный метод для записи действия с временной меткой (вид и клетка — для фильтров истории)."""
+        self.action_history.append(action, kind, cell)
+
+    def _move(self, action: int, direction: str) -> bool:
+        """Шаг робота через движок и запись исхода в журнал"""
+        self.recorded_actions.append(action)
+        outcome, x, y = self.engine.step(action)
+        if outcome == MOVED:
+            cell_name = cells.NAMES[self.engine.value(x, y) & 0x7]
+            self._log_action(f"Перемещение: ({x},{y}). Тип: {cell_name}", history.MOVE, (x, y))
+            return True
+        if outcome == BLOCKED:
+            self._log_action(f"Невозможно двигаться {direction} - клетка ({x},{y}) запрещена!", history.BLOCKED, (x, y))
+        elif outcome == OUTSIDE:
+            self._log_action(f"Не могу двигаться {direction} - клетка за границей!", history.BLOCKED, (x, y))
+        return False
 
-        self.current_cell: Optional[RobotCell] = None
-        for y in range(labyrinth.height):
-            for x in range(labyrinth.width):
-                cell = labyrinth.get_cell_by_coordinates(x, y)
-                if cell and cell.has_robot:
-                    self.current_cell = cell
-                    self.current_x = x
-                    self.current_y = y
-                    break
-            if self.current_cell:
-                break
-
-        if not self.current_cell:
-            self.current_cell = labyrinth.get_cell_by_coordinates(0, 0)
-            if self.current_cell:
-                self.current_cell.has_robot = True
-                self.current_x = 0
-                self.current_y = 0
-
-        self._log_action(f"Начало миссии в ({self.current_x},{self.current_y}).")
-
-    def _log_action(self, action: str):
-        """Вспомогательный метод для записи действия с временной меткой."""
-        timestamp = time.strftime("%H:%M:%S")
-        self.action_history.append(f"[{timestamp}] {action}")
-
-    def _move_robot(self, target: RobotCell) -> bool:
-        """Внутренный метод для перемещения робота в указанную клетку."""
-        if not self.current_cell or not target:
-            self._log_action("Ошибка: нет текущей клетки или целевой клетки!")
-            return False
-
-        # Проверяем, не запрещенная ли клетка
-        if target.is_forbidden():
-            self._log_action(f"Невозможно переместиться на ЗАПРЕЩЕННУЮ клетку ({target.x},{target.y})!")
-            return False
-
-        # Проверяем, что клетка соседняя (не телепортация)
-        dx = abs(target.x - self.current_x)
-        dy = abs(target.y - self.current_y)
-
-        if dx > 1 or dy > 1:
-            self._log_action(
-                f"Попытка телепортации с ({self.current_x},{self.current_y}) на ({target.x},{target.y})! Отменено.")
-            return False
-
-        # Перемещаем робота
-        self.current_cell.has_robot = False
-        target.has_robot = True
-        self.current_cell = target
-        self.current_x = target.x
-        self.current_y = target.y
-
-        cell_type_names = {
-            CellType.ROAD: "Дорога",
-            CellType.FIRE: "Пожар",
-            CellType.FILLED: "Залитое",
-            CellType.WATER: "Вода",
-            CellType.BARRIER: "Барьер",
-            CellType.FINISH: "Финиш",
-            CellType.POST: "Пост",
-        }
-
-        cell_name = cell_type_names.get(target.cell_type, "Неизвестно")
-        self._log_action(f"Перемещение: ({target.x},{target.y}). Тип: {cell_name}")
-
-        return True
+    def _process(self, action: int, done: str, missed: str, kind: str) -> bool:
+        """Обработка клетки робота через движок; done и missed — окончания сообщений журнала"""
+        self.recorded_actions.append(action)
+        outcome, x, y = self.engine.step(action)
+        if outcome == PROCESSED:
+            self._log_action(f"В клетке ({x},{y}): {done}", kind, (x, y))
+            return True
+        if outcome != NO_ROBOT:
+            self._log_action(f"В клетке ({x},{y}): {missed}", history.MISSED, (x, y))
+        return False
 
     def attack(self) -> bool:
         """Штурмовать - движение вперед (север, Y+1)"""
-        if self.labyrinth and self.current_cell:
-            new_cell = self.labyrinth.get_neighbor_cell(
-                self.current_cell, DirectionType.FORWARD
-            )
-            if new_cell:
-                if new_cell.is_forbidden():
-                    self._log_action(f"Невозможно двигаться вперед - клетка ({new_cell.x},{new_cell.y}) запрещена!")
-                    return False
-                return self._move_robot(new_cell)
-            else:
-                self._log_action("Не могу двигаться вперед - клетка за границей!")
-        return False
+        return self._move(ATTACK, "вперед")
 
     def retreat(self) -> bool:
         """Отойти - движение назад (юг, Y-1)"""
-        if self.labyrinth and self.current_cell:
-            new_cell = self.labyrinth.get_neighbor_cell(
-                self.current_cell, DirectionType.BACKWARD
-            )
-            if new_cell:
-                if new_cell.is_forbidden():
-                    self._log_action(f"Невозможно двигаться назад - клетка ({new_cell.x},{new_cell.y}) запрещена!")
-                    return False
-                return self._move_robot(new_cell)
-            else:
-                self._log_action("Не могу двигаться назад - клетка за границей!")
-        return False
+        return self._move(RETREAT, "назад")
 
     def move_left(self) -> bool:
         """СдвинутьЛево - движение влево (запад, X-1)"""
-        if self.labyrinth and self.current_cell:
-            new_cell = self.labyrinth.get_neighbor_cell(
-                self.current_cell, DirectionType.LEFT
-            )
-            if new_cell:
-                if new_cell.is_forbidden():
-                    self._log_action(f"Невозможно двигаться влево - клетка ({new_cell.x},{new_cell.y}) запрещена!")
-                    return False
-                return self._move_robot(new_cell)
-            else:
-                self._log_action("Не могу двигаться влево - клетка за границей!")
-        return False
+        return self._move(MOVE_LEFT, "влево")
 
     def move_right(self) -> bool:
         """СдвинутьПраво - движение вправо (восток, X+1)"""
-        if self.labyrinth and self.current_cell:
-            new_cell = self.labyrinth.get_neighbor_cell(
-                self.current_cell, DirectionType.RIGHT
-            )
-            if new_cell:
-                if new_cell.is_forbidden():
-                    self._log_action(f"Невозможно двигаться вправо - клетка ({new_cell.x},{new_cell.y}) запрещена!")
-                    return False
-                return self._move_robot(new_cell)
-            else:
-                self._log_action("Не могу двигаться вправо - клетка за границей!")
-        return False
+        return self._move(MOVE_RIGHT, "вправо")
 
     def process_fire(self) -> bool:
         """Обработка Пожар -> Залитое"""
-        if self.current_cell and self.current_cell.cell_type == CellType.FIRE:
-            self.current_cell.cell_type = CellType.FILLED
-            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Найден ПОЖАР. Обработка в ЗАЛИТОЕ.")
-            return True
-        elif self.current_cell and self.current_cell.cell_type != CellType.FIRE:
-            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Нет пожара для обработки.")
-        return False
+        return self._process(PROCESS_FIRE, "Найден ПОЖАР. Обработка в ЗАЛИТОЕ.", "Нет пожара для обработки.",
+                             history.EXTINGUISH)
 
     def process_filled(self) -> bool:
         """Обработка Залитое -> Пост"""
-        if self.current_cell and self.current_cell.cell_type == CellType.FILLED:
-            self.current_cell.cell_type = CellType.POST
-            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Найдено ЗАЛИТОЕ. Обработка в ПОСТ.")
-            return True
-        elif self.current_cell and self.current_cell.cell_type != CellType.FILLED:
-            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Нет залитого для обработки.")
-        return False
+        return self._process(PROCESS_FILLED, "Найдено ЗАЛИТОЕ. Обработка в ПОСТ.", "Нет залитого для обработки.",
+                             history.POST)
+
+    def scan(self, radius: int = 1) -> bytes:
+        """Коды типов клеток в квадрате радиуса radius вокруг робота (строки снизу вверх, за границей — OUTSIDE)"""
+        return self.labyrinth.get_sensor(radius).window(self.current_x, self.current_y)
+
+    def scan_positions(self, positions: List[Tuple[int, int]], radius: int = 1) -> bytearray:
+        """Окна вокруг многих клеток одним буфером (например, для оценки кандидатов планировщиком)"""
+        return self.labyrinth.get_sensor(radius).windows(positions)
+
+    def plan_route(self, x: int, y: int) -> Optional[List[Tuple[int, int]]]:
+        """Путь от робота до клетки (x, y) через граф кластеров или None, если она недостижима.
+        Путь приближённый: он может быть длиннее кратчайшего (HPA* не гарантирует оптимальности)"""
+        if self.engine.position < 0:
+            return None
+        return self.labyrinth.get_pathfinder().find_path((self.current_x, self.current_y), (x, y))
+
+    def is_reachable(self, x: int, y: int) -> bool:
+        """Может ли робот вообще дойти до клетки (x, y)"""
+        return self.labyrinth.get_reachability().reachable((self.current_x, self.current_y), (x, y))
+
+    def unreachable_cells(self, area: Optional[Tuple[int, int, int, int]] = None) -> List[Tuple[int, int]]:
+        """Пожары и залитые клетки, до которых робот не может дойти (area = (x0, y0, x1, y1) — только в ней)"""
+        return self.labyrinth.get_reachability().unreachable_pending(self.current_x, self.current_y, area)
+
+    def mission_impossible_reason(self) -> Optional[str]:
+        """Почему миссию уже нельзя выполнить (None, если ещё можно)"""
+        if self.mission_completed:
+            return None
+        return self.labyrinth.get_reachability().impossibility_reason(self.current_x, self.current_y)
+
+    def distance_to(self, target: str) -> Optional[int]:
+        """Шагов от робота до ближайшей цели target ("finish" или "pending"); None — недостижимо"""
+        return self.labyrinth.get_distance_field(target).distance(self.current_x, self.current_y)
+
+    def run_program(self, source: str, max_steps: int = DEFAULT_BUDGET) -> RunResult:
+        """Компилирует и выполняет программу робота (без журнала и отрисовки на каждом шаге)"""
+        return ProgramRunner(compile_program(source), self).run(max_steps)
+
+    def replay(self) -> Replay:
+        """Повтор игры с момента создания робота (для экспорта в анимацию)"""
+        grid, x, y = self.replay_start
+        return Replay(self.labyrinth.width, self.labyrinth.height, grid, x, y, bytes(self.recorded_actions))
 
     def is_mission_complete(self) -> bool:
         """Проверка завершения миссии: Финиш достигнут И нет необработанных клеток."""
-        if self.mission_completed:
-            return True
+        return self.engine.is_complete()
 
-        if not (self.current_cell and self.current_cell.cell_type == CellType.FINISH):
-            return False
+    def snapshot(self) -> dict:
+        """Состояние миссии в виде аргументов savefile.dumps/Autosaver.submit"""
+        return dict(width=self.labyrinth.width, height=self.labyrinth.height, grid=self.labyrinth.grid,
+                    robot_x=self.current_x, robot_y=self.current_y,
+                    mission_completed=self.mission_completed, history=self.action_history.checkpoint())
 
-        for y in range(self.labyrinth.height):
-            for x in range(self.labyrinth.width):
-                cell = self.labyrinth.get_cell_by_coordinates(x, y)
-                if cell and cell.cell_type in (CellType.FIRE, CellType.FILLED):
-                    return False
+    def save_game(self, path: str):
+        """Сохраняет лабиринт, позицию робота, флаги миссии и историю в файл"""
+        savefile.save_game(path, **self.snapshot())
 
-        self.mission_completed = True
-        return True
+    @classmethod
+    def load_game(cls, path: str) -> 'RobotFireman':
+        """Загружает сохраненную игру (сетка распаковывается целиком, без объектов клеток)"""
+        return cls.from_saved(savefile.load_game(path))
+
+    @classmethod
+    def from_saved(cls, saved: savefile.SavedGame) -> 'RobotFireman':
+        """Робот и лабиринт из разобранного сохранения"""
+        labyrinth = RobotMaze()
+        labyrinth.load_from_grid(saved.width, saved.height, saved.grid)
+        labyrinth.get_cell_by_coordinates(saved.robot_x, saved.robot_y).has_robot = True
+
+        robot = cls(labyrinth)
+        robot.action_history = HistoryStore.from_records(saved.history)
+        robot.mission_completed = saved.mission_completed
+        robot.notification_shown = saved.mission_completed
+        return robot
+
+
+def generate_map_job(context, width: int, height: int, seed: Optional[int]) -> bytearray:
+    """Фоновая задача: процедурная карта по порциям, с прогрессом и отменой"""
+    generator = MapGenerator(width, height, seed=seed)
+    grid = bytearray()
+    for y0, chunk in generator.iter_chunks():
+        grid += chunk
+        context.progress(y0 + len(chunk) // width, height, f"Генерация: строк {y0 + len(chunk) // width} из {height}")
+    grid[0] |= 0x8  # Робот начинает в (0, 0)
+    return grid
+
+
+def load_file_job(context, path: str) -> savefile.SavedGame:
+    """Фоновая задача: чтение сохранения или файла карты (.map) в SavedGame"""
+    context.progress(0, 1, f"Чтение {os.path.basename(path)}")
+    if path.endswith(".map"):
+        width, height, grid = read_map_file(path)
+        return savefile.SavedGame(width, height, grid, 0, 0, False, [])
+    return savefile.load_game(path)
+
+
+def solve_job(context, width: int, height: int, grid: bytes, start: Tuple[int, int]) -> Optional[List[int]]:
+    return solve_mission(width, height, grid, start, progress=context.progress)
+
+
+def export_replay_job(context, replay: Replay, path: str):
+    """Фоновая задача: повтор в GIF или сырое видео; прерванный экспорт не оставляет файла"""
+    try:
+        return export_replay(replay, path, progress=lambda done, total: context.progress(
+            done, total, f"Экспорт повтора: действий {done} из {total}"))
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
 
 
 class RobotApp:
-    def __init__(self, master):
+    def __init__(self, master, jobs: Optional[JobPool] = None, autosave_path: str = AUTOSAVE_PATH):
         self.master = master
-        master.title("Робот-Пожарный Лабиринт 5x5")
+        master.winfo_toplevel().title("Робот-Пожарный Лабиринт")
+        self.autosave_path = autosave_path
+
+        # Фоновые задачи: общий пул вкладок или свой, который приложение опрашивает само
+        self.owns_jobs = jobs is None
+        self.jobs = jobs or JobPool()
+        self.job: Optional[Job] = None
+        self.plan: Optional[List[int]] = None
 
         self.W, self.H = 5, 5
         self.CELL_SIZE = 80
         self.ROBOT_COLOR = "#0000FF"
 
+        # Видимая часть карты: левый нижний угол и размер в клетках
+        self.view_x, self.view_y = 0, 0
+        self.view_w, self.view_h = self.W, self.H
+        self._last_robot_position = None
+
         self.labyrinth = RobotMaze(self.W, self.H)
         self.labyrinth.initialize_mission_map()
         self.robot = RobotFireman(self.labyrinth)
         self.robot_oval = None
+        self.route: Optional[List[Tuple[int, int]]] = None
+        self.heatmap_mode = tk.StringVar(master, value="off")
+        self.program_window = None
+        self.program_runner: Optional[ProgramRunner] = None
+        self.autosaver = savefile.Autosaver()
 
         main_frame = tk.Frame(master)
         main_frame.pack(padx=10, pady=10)
@@ -411,14 +577,23 @@ class RobotApp:
         # 1. Фрейм карты
         map_frame = tk.LabelFrame(main_frame, text="Карта 5x5", padx=5, pady=5)
         map_frame.pack(side=tk.LEFT, padx=10)
+        self.map_frame = map_frame
 
-        canvas_width = self.W * self.CELL_SIZE + 50
-        canvas_height = self.H * self.CELL_SIZE + 50
+        canvas_width = self.view_w * self.CELL_SIZE + 50
+        canvas_height = self.view_h * self.CELL_SIZE + 50
         self.canvas = tk.Canvas(map_frame, width=canvas_width, height=canvas_height, bg="lightgrey")
         self.canvas.pack()
 
         self.draw_map_elements()
 
+        # Мини-карта всей карты; щелчок по ней переносит туда основной вид
+        minimap_frame = tk.LabelFrame(map_frame, text="Мини-карта", padx=5, pady=5)
+        minimap_frame.pack(pady=5)
+        self.minimap_canvas = tk.Canvas(minimap_frame, bg="lightgrey", highlightthickness=0)
+        self.minimap_canvas.pack()
+        self.minimap_canvas.bind("<Button-1>", self.on_minimap_click)
+        self.reset_minimap()
+
         # 2. Фрейм управления и истории
         control_frame = tk.Frame(main_frame)
         control_frame.pack(side=tk.RIGHT, padx=10, fill=tk.Y)
@@ -429,6 +604,18 @@ class RobotApp:
 
         tk.Button(button_frame, text="Проверить цель", command=self.check_goal,
                   width=25).pack(pady=5)
+        tk.Button(button_frame, text="Маршрут к финишу", command=self.show_route,
+                  width=25).pack(pady=5)
+        tk.Button(button_frame, text="Программа робота", command=self.open_program_window,
+                  width=25).pack(pady=5)
+
+        # Тепловая карта расстояний поверх клеток
+        for text, value in (("Без тепловой карты", "off"), ("Расстояние до финиша", "finish"),
+                            ("Расстояние до пожаров", "pending")):
+            tk.Radiobutton(button_frame, text=text, variable=self.heatmap_mode, value=value,
+                           command=self.update_display).pack(anchor=tk.W)
+        self.hint_label = tk.Label(button_frame, text="", justify=tk.LEFT)
+        self.hint_label.pack(anchor=tk.W)
 
         manual_frame = tk.LabelFrame(control_frame, text="Ручное управление", padx=10, pady=10)
         manual_frame.pack(pady=10, fill=tk.X)
@@ -459,22 +646,77 @@ class RobotApp:
                   width=25).pack(pady=5)
         tk.Button(maze_control_frame, text="Новый лабиринт", command=self.new_maze,
                   width=25).pack(pady=5)
+        self.difficulty = tk.StringVar(master, value="Любая сложность")
+        tk.OptionMenu(maze_control_frame, self.difficulty, *DIFFICULTY_CHOICES).pack()
+        tk.Button(maze_control_frame, text="Сохранить игру", command=self.save_game,
+                  width=25).pack(pady=5)
+        tk.Button(maze_control_frame, text="Загрузить игру", command=self.load_game,
+                  width=25).pack(pady=5)
+        tk.Button(maze_control_frame, text="Экспорт повтора", command=self.export_replay,
+                  width=25).pack(pady=5)
+
+        # Долгие операции идут в пуле потоков; окно остаётся отзывчивым
+        job_frame = tk.LabelFrame(control_frame, text="Фоновые задачи", padx=10, pady=10)
+        job_frame.pack(pady=10, fill=tk.X)
+        size_frame = tk.Frame(job_frame)
+        size_frame.pack(fill=tk.X)
+        tk.Label(size_frame, text="Размер карты:").pack(side=tk.LEFT)
+        self.map_size_entry = tk.Entry(size_frame, width=10)
+        self.map_size_entry.insert(0, "200x200")
+        self.map_size_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(job_frame, text="Сгенерировать карту", command=self.generate_map, width=25).pack(pady=2)
+        tk.Button(job_frame, text="Решить миссию", command=self.solve, width=25).pack(pady=2)
+        tk.Button(job_frame, text="Выполнить план", command=self.execute_plan, width=25).pack(pady=2)
+        self.job_progress = ttk.Progressbar(job_frame, maximum=100, length=200)
+        self.job_progress.pack(pady=2, fill=tk.X)
+        self.job_label = tk.Label(job_frame, text="Нет задач", justify=tk.LEFT)
+        self.job_label.pack(anchor=tk.W)
+        tk.Button(job_frame, text="Отмена", command=self.cancel_job, width=25).pack(pady=2)
 
         # История действий
         history_frame = tk.LabelFrame(control_frame, text="История Действий", padx=5, pady=5)
         history_frame.pack(expand=True, fill=tk.BOTH)
 
+        # Фильтры: вид события, клетка «x,y», интервал времени «ЧЧ:ММ-ЧЧ:ММ»
+        filter_frame = tk.Frame(history_frame)
+        filter_frame.pack(fill=tk.X)
+        self.history_kind = tk.StringVar(master, value="Все события")
+        tk.OptionMenu(filter_frame, self.history_kind, *HISTORY_KIND_FILTERS,
+                      command=lambda _: self.apply_history_filter()).grid(row=0, column=0, columnspan=2, sticky=tk.W)
+        tk.Label(filter_frame, text="Клетка x,y:").grid(row=1, column=0, sticky=tk.W)
+        self.history_cell_entry = tk.Entry(filter_frame, width=12)
+        self.history_cell_entry.grid(row=1, column=1, sticky=tk.W)
+        tk.Label(filter_frame, text="Время:").grid(row=2, column=0, sticky=tk.W)
+        self.history_time_entry = tk.Entry(filter_frame, width=12)
+        self.history_time_entry.grid(row=2, column=1, sticky=tk.W)
+        tk.Button(filter_frame, text="Найти", command=self.apply_history_filter).grid(row=1, column=2, rowspan=2)
+        for entry in (self.history_cell_entry, self.history_time_entry):
+            entry.bind("<Return>", lambda _: self.apply_history_filter())
+
         self.history_text = scrolledtext.ScrolledText(history_frame, wrap=tk.WORD, height=18, width=35,
                                                       state='disabled', font=('Courier', 9))
         self.history_text.pack(expand=True, fill=tk.BOTH)
 
+        # Листание: None — последняя страница (следует за новыми событиями)
+        self.history_filter = {}
+        self.history_page: Optional[int] = None
+        pager_frame = tk.Frame(history_frame)
+        pager_frame.pack(fill=tk.X)
+        tk.Button(pager_frame, text="◀", command=lambda: self.turn_history_page(-1)).pack(side=tk.LEFT)
+        tk.Button(pager_frame, text="▶", command=lambda: self.turn_history_page(1)).pack(side=tk.LEFT)
+        tk.Button(pager_frame, text="Последние", command=lambda: self.turn_history_page(None)).pack(side=tk.LEFT)
+        self.history_page_label = tk.Label(pager_frame, text="")
+        self.history_page_label.pack(side=tk.LEFT, padx=5)
+
         self.update_display()
+        if self.owns_jobs:
+            self.poll_jobs()
 
     def get_canvas_coords(self, x: int, y: int):
         """Преобразует координаты (x, y) лабиринта в координаты пикселей Canvas."""
-        canvas_y = self.H - 1 - y
+        canvas_y = self.view_y + self.view_h - 1 - y
 
-        x1 = x * self.CELL_SIZE + 25
+        x1 = (x - self.view_x) * self.CELL_SIZE + 25
         y1 = canvas_y * self.CELL_SIZE + 25
         x2 = x1 + self.CELL_SIZE
         y2 = y1 + self.CELL_SIZE
@@ -483,9 +725,16 @@ class RobotApp:
     def draw_map_elements(self):
         """Отрисовывает статические элементы карты (сетку, подписи, текст клеток)."""
         self.canvas.delete("all")
+        unreachable = set(self.robot.unreachable_cells(
+            (self.view_x, self.view_y, self.view_x + self.view_w, self.view_y + self.view_h)))
+
+        field = None
+        if self.heatmap_mode.get() in FIELD_SOURCES:
+            field = self.labyrinth.get_distance_field(self.heatmap_mode.get())
+            max_distance = field.max_distance()
 
-        for y in range(self.H):
-            for x in range(self.W):
+        for y in range(self.view_y, self.view_y + self.view_h):
+            for x in range(self.view_x, self.view_x + self.view_w):
                 x1, y1, x2, y2 = self.get_canvas_coords(x, y)
                 cell = self.labyrinth.get_cell_by_coordinates(x, y)
 
@@ -493,32 +742,60 @@ class RobotApp:
                     self.canvas.create_rectangle(x1, y1, x2, y2,
                                                  fill=cell.get_color(),
                                                  outline="black", width=1)
-
-                    text_color = 'white' if cell.get_color() in ["black", "#0000FF"] else 'black'
+                    if field is not None:
+                        distance = field.distance(x, y)
+                        color = heat_color(distance, max_distance)
+                        if color:
+                            self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, stipple="gray50", outline="")
+                            if self.CELL_SIZE >= 50:
+                                self.canvas.create_text(x1 + 4, y1 + 2, text=str(distance), anchor=tk.NW,
+                                                        font=("Arial", 7), fill="black")
+
+                    # Недостижимые пожары перечеркиваются
+                    if (x, y) in unreachable:
+                        self.canvas.create_line(x1, y1, x2, y2, fill="#400000", width=2)
+                        self.canvas.create_line(x1, y2, x2, y1, fill="#400000", width=2)
+
+                    # На крупных картах клетки мелкие, и подписи в них не помещаются
+                    if self.CELL_SIZE < 50:
+                        continue
+                    text_color = cells.TEXT_COLORS[cell.value & 0x7]
                     self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2,
                                             text=cell.get_display_text(),
                                             font=("Arial", 8, "bold"),
                                             fill=text_color)
 
-        for x in range(self.W):
-            self.canvas.create_text(x * self.CELL_SIZE + 25 + self.CELL_SIZE / 2, 10,
+        if self.CELL_SIZE < 30:
+            return
+        for x in range(self.view_x, self.view_x + self.view_w):
+            self.canvas.create_text((x - self.view_x) * self.CELL_SIZE + 25 + self.CELL_SIZE / 2, 10,
                                     text=f"X={x}", fill='black')
-        for y in range(self.H):
-            self.canvas.create_text(15, (self.H - 1 - y) * self.CELL_SIZE + 25 + self.CELL_SIZE / 2,
+        for y in range(self.view_y, self.view_y + self.view_h):
+            self.canvas.create_text(15, (self.view_y + self.view_h - 1 - y) * self.CELL_SIZE + 25 + self.CELL_SIZE / 2,
                                     text=f"Y={y}", fill='black')
 
     def update_display(self):
         """Обновляет карту и историю действий."""
+        self.follow_robot()
         self.draw_map_elements()
 
         x_robot, y_robot = self.robot.current_x, self.robot.current_y
 
+        # Маршрут показывается, пока робот стоит в его начале
+        if self.route and self.route[0] == (x_robot, y_robot):
+            points = []
+            for x, y in self.route:
+                x1, y1, x2, y2 = self.get_canvas_coords(x, y)
+                points.extend(((x1 + x2) / 2, (y1 + y2) / 2))
+            if len(points) >= 4:
+                self.canvas.create_line(*points, fill="#00BFFF", width=3)
+
         if x_robot is not None and y_robot is not None:
             x1, y1, x2, y2 = self.get_canvas_coords(x_robot, y_robot)
             center_x = (x1 + x2) / 2
             center_y = (y1 + y2) / 2
 
-            radius = 15
+            radius = self.CELL_SIZE * 3 // 16
 
             self.robot_oval = self.canvas.create_oval(
                 center_x - radius, center_y - radius,
@@ -531,17 +808,150 @@ class RobotApp:
                                     font=("Arial", 10, "bold"),
                                     fill="white")
 
-        self.history_text.config(state='normal')
-        self.history_text.delete('1.0', tk.END)
-        for action in self.robot.action_history:
-            self.history_text.insert(tk.END, action + '\n')
-        self.history_text.see(tk.END)
-        self.history_text.config(state='disabled')
+        self.update_hint()
+
+        reason = self.robot.mission_impossible_reason()
+        if reason and not self.robot.impossible_notified:
+            self.robot.impossible_notified = True
+            self.robot._log_action(f"Миссия невыполнима: {reason}.")
+
+        self.render_history()
 
         if self.robot.is_mission_complete() and not self.robot.notification_shown:
             self.robot.notification_shown = True
             messagebox.showinfo("Миссия завершена", "Робот завершил обход и обработал все пожары!")
 
+        self.update_minimap()
+        self.autosaver.submit(self.autosave_path, **self.robot.snapshot())
+
+    def centre_view(self, x: int, y: int):
+        """Сдвигает видимую часть карты так, чтобы клетка (x, y) оказалась в центре"""
+        self.view_x = max(0, min(x - self.view_w // 2, self.W - self.view_w))
+        self.view_y = max(0, min(y - self.view_h // 2, self.H - self.view_h))
+
+    def follow_robot(self):
+        """Если робот переместился за край видимой части, центрирует вид на нём"""
+        position = (self.robot.current_x, self.robot.current_y)
+        if position == self._last_robot_position:
+            return
+        self._last_robot_position = position
+        x, y = position
+        if not (self.view_x <= x < self.view_x + self.view_w and self.view_y <= y < self.view_y + self.view_h):
+            self.centre_view(x, y)
+
+    def reset_minimap(self):
+        """Создает изображение мини-карты для текущего лабиринта"""
+        self.minimap = self.labyrinth.get_minimap()
+        self.minimap_scale = max(1, MINIMAP_PIXELS // max(self.minimap.map_width, self.minimap.map_height))
+        width = self.minimap.map_width * self.minimap_scale
+        height = self.minimap.map_height * self.minimap_scale
+        self.minimap_image = tk.PhotoImage(master=self.master, width=width, height=height)
+        self.minimap_canvas.config(width=width, height=height)
+        self.minimap_canvas.delete("all")
+        self.minimap_canvas.create_image(0, 0, image=self.minimap_image, anchor=tk.NW)
+
+    def update_minimap(self):
+        """Перерисовывает изменившиеся плитки мини-карты, робота и рамку видимой части"""
+        if self.labyrinth.get_minimap() is not self.minimap:
+            self.reset_minimap()
+        minimap, scale = self.minimap, self.minimap_scale
+        image_height = minimap.map_height * scale
+
+        for tile in minimap.update():
+            px0, py0, px1, py1 = minimap.tile_bounds(tile)
+            rows = []
+            for py in range(py1 - 1, py0 - 1, -1):
+                codes = minimap.pixels[py * minimap.map_width + px0:py * minimap.map_width + px1]
+                row = "{" + " ".join(cells.WEB_COLORS[code] for code in codes for _ in range(scale)) + "}"
+                rows.extend([row] * scale)
+            self.minimap_image.put(" ".join(rows), to=(px0 * scale, image_height - py1 * scale))
+
+        self.minimap_canvas.delete("overlay")
+        zoom = scale / minimap.block
+        self.minimap_canvas.create_rectangle(self.view_x * zoom, image_height - (self.view_y + self.view_h) * zoom,
+                                             (self.view_x + self.view_w) * zoom, image_height - self.view_y * zoom,
+                                             outline="#00BFFF", width=2, tags="overlay")
+        px, py = minimap.cell_to_pixel(self.robot.current_x, self.robot.current_y)
+        radius = max(2, scale)
+        center_x, center_y = (px + 0.5) * scale, image_height - (py + 0.5) * scale
+        self.minimap_canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                                        fill=self.ROBOT_COLOR, outline="white", tags="overlay")
+
+    def on_minimap_click(self, event):
+        """Переносит основной вид в точку мини-карты, по которой щелкнули"""
+        minimap = self.minimap
+        px = event.x // self.minimap_scale
+        py = minimap.map_height - 1 - event.y // self.minimap_scale
+        if 0 <= px < minimap.map_width and 0 <= py < minimap.map_height:
+            self.centre_view(*minimap.pixel_center(px, py))
+            self.update_display()
+
+    def render_history(self):
+        """Показывает одну страницу отфильтрованной истории (остальные события не перебираются)"""
+        view = self.robot.action_history.select(**self.history_filter)
+        pages = view.page_count(HISTORY_PAGE_SIZE)
+        page = pages - 1 if self.history_page is None else min(self.history_page, pages - 1)
+
+        self.history_text.config(state='normal')
+        self.history_text.delete('1.0', tk.END)
+        for event in view.page(page, HISTORY_PAGE_SIZE):
+            self.history_text.insert(tk.END, event.format() + '\n')
+        if self.history_page is None:
+            self.history_text.see(tk.END)
+        self.history_text.config(state='disabled')
+        self.history_page_label.config(text=f"Стр. {page + 1} из {pages}, событий: {len(view)}")
+
+    def turn_history_page(self, delta: Optional[int]):
+        """Листает историю на delta страниц (None — к последней странице)"""
+        if delta is None:
+            self.history_page = None
+        else:
+            pages = self.robot.action_history.select(**self.history_filter).page_count(HISTORY_PAGE_SIZE)
+            current = pages - 1 if self.history_page is None else min(self.history_page, pages - 1)
+            page = max(0, current + delta)
+            self.history_page = None if page >= pages - 1 else page
+        self.render_history()
+
+    def apply_history_filter(self):
+        """Применяет фильтры истории из полей панели"""
+        try:
+            cell = history.parse_cell(self.history_cell_entry.get())
+            last = self.robot.action_history.last(1)
+            since, until = history.parse_time_range(self.history_time_entry.get(),
+                                                    last[0].time if last and last[0].time else None)
+        except ValueError as error:
+            messagebox.showerror("Фильтр истории", str(error))
+            return
+        self.history_filter = dict(kind=HISTORY_KIND_FILTERS.get(self.history_kind.get()), cell=cell,
+                                   since=since, until=until)
+        self.history_page = None
+        self.render_history()
+
+    def update_hint(self):
+        """Подсказка с расстояниями от робота (только при включенной тепловой карте)"""
+        if self.heatmap_mode.get() not in FIELD_SOURCES:
+            self.hint_label.config(text="")
+            return
+        lines = []
+        for target, (_, caption) in FIELD_SOURCES.items():
+            distance = self.robot.distance_to(target)
+            lines.append(f"{caption.capitalize()}: {'недостижимо' if distance is None else distance}")
+        self.hint_label.config(text="\n".join(lines))
+
+    def set_robot(self, robot: RobotFireman):
+        """Переключает приложение на другого робота и его лабиринт (размер карты может измениться)."""
+        self.robot = robot
+        self.labyrinth = robot.labyrinth
+        self.W, self.H = self.labyrinth.width, self.labyrinth.height
+        self.view_w, self.view_h = min(self.W, VIEW_CELLS), min(self.H, VIEW_CELLS)
+        self.CELL_SIZE = max(12, min(80, 400 // max(self.view_w, self.view_h, 1)))
+        self._last_robot_position = None
+        self.centre_view(robot.current_x, robot.current_y)
+
+        self.map_frame.config(text=f"Карта {self.W}x{self.H}")
+        self.canvas.config(width=self.view_w * self.CELL_SIZE + 50, height=self.view_h * self.CELL_SIZE + 50)
+        self.reset_minimap()
+
     def move_forward(self):
         if not self.robot.is_mission_complete():
             self.robot.attack()
@@ -586,24 +996,268 @@ class RobotApp:
 
     def reset_app(self):
         """Сброс состояния приложения."""
-        self.labyrinth = RobotMaze(self.W, self.H)
-        self.labyrinth.initialize_mission_map()
-        self.robot = RobotFireman(self.labyrinth)
+        labyrinth = RobotMaze(5, 5)
+        labyrinth.initialize_mission_map()
+        self.set_robot(RobotFireman(labyrinth))
 
         self.update_display()
 
-        self.robot.action_history = []
+        self.robot.action_history = HistoryStore()
         self.robot._log_action("Симулятор сброшен. Миссия началась снова.")
         self.update_display()
 
     def new_maze(self):
-        """Создает новый случайный лабиринт 5x5"""
-        self.labyrinth = RobotMaze(self.W, self.H)
-        self.labyrinth.create_random_maze_5x5()
-        self.robot = RobotFireman(self.labyrinth)
+        """Создает новый случайный лабиринт 5x5 выбранной сложности"""
+        labyrinth = RobotMaze(5, 5)
+        level = DIFFICULTY_CHOICES.get(self.difficulty.get())
+        length = labyrinth.create_mission_maze_5x5(level)
+        self.set_robot(RobotFireman(labyrinth))
 
         self.update_display()
-        self.robot._log_action("Новый случайный лабиринт 5x5 создан.")
+        if level and catalog.default_catalog() is None:
+            self.robot._log_action(f"Новый лабиринт 5x5 создан (каталога миссий нет, сложность не выбрана; "
+                                   f"длина кратчайшего решения — {length}).")
+        else:
+            difficulty = f"сложность: {catalog.LEVEL_NAMES[level].lower()}, " if level else ""
+            self.robot._log_action(f"Новый лабиринт 5x5 создан ({difficulty}длина кратчайшего решения — {length}).")
+
+    def save_game(self):
+        """Сохраняет текущую игру в выбранный файл"""
+        path = filedialog.asksaveasfilename(title="Сохранить игру", defaultextension=".rfs",
+                                            filetypes=[("Сохранения", "*.rfs"), ("Все файлы", "*.*")])
+        if not path:
+            return
+        try:
+            self.robot.save_game(path)
+        except OSError as error:
+            messagebox.showerror("Ошибка сохранения", str(error))
+            return
+        self.robot._log_action(f"Игра сохранена в {os.path.basename(path)}.")
+        self.update_display()
+
+    def load_game(self):
+        """Загружает игру (в том числе контрольную точку) или файл карты в фоне"""
+        path = filedialog.askopenfilename(title="Загрузить игру",
+                                          initialdir=os.path.dirname(self.autosave_path),
+                                          filetypes=[("Сохранения", "*.rfs"), ("Карты", "*.map"),
+                                                     ("Все файлы", "*.*")])
+        if not path:
+            return
+
+        def loaded(saved: savefile.SavedGame):
+            self.set_robot(RobotFireman.from_saved(saved))
+            self.robot._log_action(f"Игра загружена из {os.path.basename(path)}.")
+            self.update_display()
+
+        self.start_job(f"Загрузка {os.path.basename(path)}", loaded, load_file_job, path)
+
+    def export_replay(self):
+        """Повтор игры с момента создания робота: .rfr пишется сразу, GIF и сырое видео — в фоне"""
+        path = filedialog.asksaveasfilename(title="Экспорт повтора", defaultextension=".gif",
+                                            filetypes=[("Анимация GIF", "*.gif"), ("Сырое видео RGB24", "*.rgb"),
+                                                       ("Повтор", "*.rfr")])
+        if not path:
+            return
+        replay = self.robot.replay()
+        if path.lower().endswith(".rfr"):
+            try:
+                save_replay(path, replay)
+            except OSError as error:
+                messagebox.showerror("Ошибка сохранения", str(error))
+                return
+            self.robot._log_action(f"Повтор сохранён в {os.path.basename(path)}.")
+            self.update_display()
+            return
+
+        def exported(result):
+            self.robot._log_action(f"Повтор ({len(replay.actions)} действий) записан в {os.path.basename(path)}: "
+                                   f"{result.frames} кадров {result.pixel_width}x{result.pixel_height}.")
+            self.update_display()
+
+        self.start_job("Экспорт повтора", exported, export_replay_job, replay, path)
+
+    # ---------- фоновые задачи ----------
+
+    def poll_jobs(self):
+        """Раздаёт события фоновых задач (вызывается по таймеру Tk, если пул свой)"""
+        # Следующий опрос ставится до разбора событий, чтобы ошибка не остановила опрос
+        self.master.after(JOB_POLL_MS, self.poll_jobs)
+        self.jobs.dispatch()
+
+    def start_job(self, name: str, on_done: Callable, function: Callable, *args) -> Optional[Job]:
+        """Запускает задачу вкладки; одновременно у вкладки выполняется одна задача"""
+        if self.job is not None:
+            messagebox.showinfo("Фоновая задача", f"Уже выполняется: {self.job.name}")
+            return None
+
+        def finished(text: str):
+            self.job = None
+            self.job_progress.config(value=0)
+            self.job_label.config(text=text)
+
+        def done(result):
+            finished(f"Готово: {name}")
+            on_done(result)
+
+        def failed(error: BaseException):
+            finished(f"Ошибка: {name}")
+            messagebox.showerror(name, str(error))
+
+        self.job = Job(name, on_progress=self.show_job_progress, on_done=done, on_error=failed,
+                       on_cancel=lambda: finished(f"Отменено: {name}"))
+        self.job_label.config(text=name)
+        return self.jobs.submit(self.job, function, *args)
+
+    def show_job_progress(self, fraction: float, text: str):
+        self.job_progress.config(value=fraction * 100)
+        self.job_label.config(text=text)
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job_label.config(text=f"Отмена: {self.job.name}…")
+
+    def generate_map(self):
+        """Генерирует процедурную карту размера из поля «Размер карты» в фоне"""
+        try:
+            width, height = (int(part) for part in self.map_size_entry.get().lower().split("x"))
+            if width < 1 or height < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Размер карты", "Размер задаётся как ШИРИНАxВЫСОТА, например 200x200")
+            return
+
+        def generated(grid: bytearray):
+            labyrinth = RobotMaze()
+            labyrinth.load_from_grid(width, height, grid)
+            self.set_robot(RobotFireman(labyrinth))
+            self.robot._log_action(f"Сгенерирована карта {width}x{height}.")
+            self.update_display()
+
+        self.start_job(f"Генерация карты {width}x{height}", generated, generate_map_job, width, height, None)
+
+    def solve(self):
+        """Ищет план выполнения миссии в фоне (по снимку текущей карты)"""
+        robot = self.robot
+        grid = bytes(self.labyrinth.grid)
+        start = (robot.current_x, robot.current_y)
+
+        def solved(plan: Optional[List[int]]):
+            if self.robot is not robot or (robot.current_x, robot.current_y) != start \
+                    or self.labyrinth.grid != grid:
+                self.job_label.config(text="Карта изменилась, план устарел")
+                return
+            self.plan = plan
+            if plan is None:
+                robot._log_action("Решение: миссия невыполнима.")
+                self.route = None
+            else:
+                robot._log_action(f"Решение: план из {len(plan)} действий.")
+                self.route = plan_positions(self.labyrinth.width, start, plan)
+            self.update_display()
+
+        self.start_job("Решение миссии", solved, solve_job, self.labyrinth.width, self.labyrinth.height,
+                       grid, start)
+
+    def execute_plan(self):
+        """Выполняет найденный план действиями робота"""
+        if not self.plan:
+            messagebox.showinfo("План", "Сначала найдите план кнопкой «Решить миссию».")
+            return
+        plan, self.plan = self.plan, None
+        for action in plan:
+            if not getattr(self.robot, ACTIONS[action])():
+                break
+        self.route = None
+        self.update_display()
+
+    def shutdown(self):
+        """Отменяет задачу вкладки и дожидается записи последней контрольной точки"""
+        if self.job is not None:
+            # Виджеты вкладки уничтожаются — поздние события задачи не должны их трогать
+            self.job.cancel()
+            self.job.detach()
+            self.job = None
+        self.autosaver.flush(timeout=2.0)
+
+    def close(self):
+        """Дожидается записи последней контрольной точки и закрывает окно"""
+        self.shutdown()
+        if self.owns_jobs:
+            self.jobs.shutdown()
+        self.master.destroy()
+
+    def show_route(self):
+        """Прокладывает маршрут от робота до финиша и показывает его на карте"""
+        finish = self.labyrinth.find_cell(CellType.FINISH)
+        if finish is None:
+            self.route = None
+            self.robot._log_action("На карте нет финиша.")
+        else:
+            self.route = self.robot.plan_route(*finish)
+            if self.route is None:
+                self.robot._log_action(f"Финиш ({finish[0]},{finish[1]}) недостижим.")
+            else:
+                self.robot._log_action(f"Маршрут до финиша ({finish[0]},{finish[1]}), шагов: {len(self.route) - 1}.")
+        self.update_display()
+
+    def open_program_window(self):
+        """Окно с текстом программы робота, точками останова и запуском"""
+        if self.program_window is not None and self.program_window.winfo_exists():
+            self.program_window.lift()
+            return
+        window = tk.Toplevel(self.master)
+        window.title("Программа робота")
+        self.program_window = window
+
+        self.program_text = scrolledtext.ScrolledText(window, wrap=tk.NONE, height=20, width=50,
+                                                      font=('Courier', 10))
+        self.program_text.pack(padx=5, pady=5, expand=True, fill=tk.BOTH)
+        self.program_text.insert(tk.END, PROGRAM_EXAMPLE)
+
+        options_frame = tk.Frame(window)
+        options_frame.pack(fill=tk.X, padx=5)
+        tk.Label(options_frame, text="Точки останова (строки):").grid(row=0, column=0, sticky=tk.W)
+        self.breakpoints_entry = tk.Entry(options_frame, width=20)
+        self.breakpoints_entry.grid(row=0, column=1, sticky=tk.W)
+        tk.Label(options_frame, text="Бюджет шагов:").grid(row=1, column=0, sticky=tk.W)
+        self.budget_entry = tk.Entry(options_frame, width=20)
+        self.budget_entry.insert(0, str(DEFAULT_BUDGET))
+        self.budget_entry.grid(row=1, column=1, sticky=tk.W)
+
+        buttons_frame = tk.Frame(window)
+        buttons_frame.pack(pady=5)
+        tk.Button(buttons_frame, text="Выполнить", command=self.run_program, width=15).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Продолжить", command=self.continue_program,
+                  width=15).pack(side=tk.LEFT, padx=5)
+        self.program_status = tk.Label(window, text="", justify=tk.LEFT)
+        self.program_status.pack(anchor=tk.W, padx=5, pady=5)
+
+    def run_program(self):
+        """Компилирует программу из окна и выполняет её с начала"""
+        try:
+            breakpoints = [int(part) for part in self.breakpoints_entry.get().replace(",", " ").split()]
+            self.program_runner = ProgramRunner(compile_program(self.program_text.get("1.0", tk.END)),
+                                                self.robot, breakpoints)
+        except ValueError as error:
+            messagebox.showerror("Ошибка в программе", str(error))
+            return
+        self.continue_program()
+
+    def continue_program(self):
+        """Продолжает программу после точки останова или исчерпанного бюджета"""
+        if self.program_runner is None or self.program_runner.robot is not self.robot:
+            self.program_status.config(text="Сначала нажмите «Выполнить».")
+            return
+        try:
+            budget = int(self.budget_entry.get())
+        except ValueError:
+            messagebox.showerror("Ошибка", "Бюджет шагов должен быть целым числом")
+            return
+        result = self.program_runner.run(budget)
+        self.program_status.config(text=f"{STATUS_NAMES[result.status].capitalize()}, строка {result.line}.\n"
+                                        f"Инструкций: {result.steps}, действий: {result.actions}.")
+        self.update_display()
 
     def check_goal(self):
         """Проверяет, достигнута ли цель"""
@@ -614,6 +1268,10 @@ class RobotApp:
                                     "Все пожары потушены и робот на финише!")
             else:
                 messagebox.showinfo("Миссия завершена", "Миссия уже выполнена!")
+        elif self.robot.mission_impossible_reason():
+            messagebox.showwarning("Миссия невыполнима",
+                                   f"Цель недостижима: {self.robot.mission_impossible_reason()}.\n"
+                                   "Недостижимые клетки перечеркнуты на карте.")
         else:
             messagebox.showinfo("Цель не достигнута",
                                 "Цель еще не достигнута.\nУбедитесь, что:\n"
@@ -621,10 +1279,62 @@ class RobotApp:
                                 "2. Робот находится на ячейке 'Финиш'")
 
 
+class MazeTabs:
+    """Несколько лабиринтов во вкладках с общим пулом фоновых задач"""
+
+    def __init__(self, master):
+        self.master = master
+        self.jobs = JobPool()
+        self.apps: List[RobotApp] = []
+        self._opened = 0
+
+        toolbar = tk.Frame(master)
+        toolbar.pack(fill=tk.X, padx=10, pady=(5, 0))
+        tk.Button(toolbar, text="Новая вкладка", command=self.add_tab).pack(side=tk.LEFT)
+        tk.Button(toolbar, text="Закрыть вкладку", command=self.close_tab).pack(side=tk.LEFT, padx=5)
+
+        self.notebook = ttk.Notebook(master)
+        self.notebook.pack(expand=True, fill=tk.BOTH)
+        self.add_tab()
+        self.poll_jobs()
+
+    def add_tab(self) -> RobotApp:
+        self._opened += 1
+        frame = tk.Frame(self.notebook)
+        # У каждой вкладки своя контрольная точка
+        path = AUTOSAVE_PATH if self._opened == 1 else \
+            os.path.join(os.path.dirname(AUTOSAVE_PATH), f"autosave-{self._opened}.rfs")
+        app = RobotApp(frame, jobs=self.jobs, autosave_path=path)
+        self.apps.append(app)
+        self.notebook.add(frame, text=f"Лабиринт {self._opened}")
+        self.notebook.select(frame)
+        return app
+
+    def close_tab(self):
+        if len(self.apps) <= 1:
+            return
+        index = self.notebook.index(self.notebook.select())
+        app = self.apps.pop(index)
+        app.shutdown()
+        self.notebook.forget(index)
+        app.master.destroy()
+
+    def poll_jobs(self):
+        self.master.after(JOB_POLL_MS, self.poll_jobs)
+        self.jobs.dispatch()
+
+    def close(self):
+        for app in self.apps:
+            app.shutdown()
+        self.jobs.shutdown()
+        self.master.destroy()
+
+
 def main():
     # Запуск UI
     root = tk.Tk()
-    app = RobotApp(root)
+    tabs = MazeTabs(root)
+    root.protocol("WM_DELETE_WINDOW", tabs.close)
     root.mainloop()
 
 
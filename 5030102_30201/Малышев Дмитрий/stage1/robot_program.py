@@ -0,0 +1,577 @@
+"""Программы робота-пожарного: маленький язык, байткод и интерпретатор.
+
+Программа записывается с отступами, как в Python:
+
+    # обойти карту вдоль правой стены
+    while pending or not here finish:
+        if here fire:
+            process_fire
+        if here filled:
+            process_filled
+        if right open:
+            move_right
+        elif forward open:
+            attack
+        else:
+            stop
+
+Команды: attack, retreat, move_left, move_right, process_fire,
+process_filled (как методы RobotFireman), stop, break.
+Блоки: repeat N:, while УСЛОВИЕ:, if/elif/else.
+Условия: МЕСТО ТИП, где МЕСТО — here, forward, backward, left, right,
+а ТИП — ключ клетки (road, fire, filled, water, barrier, finish, post),
+open (можно зайти), blocked (нельзя зайти или граница карты), edge (граница);
+near ТИП R — клетка типа ТИП есть в квадрате радиуса R вокруг робота
+(окно датчика maze_core.sensors, одна операция на проверку); флаги ok (последнее действие удалось), pending (остались пожары или
+залитые клетки), true; связки not, and, or и скобки.
+
+Программа компилируется в массив инструкций по 4 целых (код, a, b, c).
+Интерпретатор работает прямо с сеткой лабиринта, без объектов клеток,
+журнала и отрисовки на каждом шаге, но по правилам maze_core.engine
+(move_target, TRANSITIONS, mission_complete); клетки меняются через
+set_value движка, поэтому счётчик и производные структуры остаются верными.
+Число выполненных инструкций ограничено бюджетом, а точки останова
+подменяют код инструкции, так что без них проверок на шаге нет.
+
+Замер скорости: python robot_program.py программа.txt --size 200x200 --steps 5000000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import cells, history
+from maze_core.cells import ROBOT_BIT, TYPE_MASK
+# Действия в порядке методов RobotFireman; правила ходов, обработки и завершения — общие с движком
+from maze_core.engine import ACTIONS, MOVES, PROCESS_FIRE, TRANSITIONS, mission_complete, move_target
+
+# Места в условиях: направления в порядке действий движения, затем текущая клетка
+PLACES = ("forward", "backward", "left", "right", "here")
+HERE = 4
+DX = tuple(dx for dx, _ in MOVES)
+DY = tuple(dy for _, dy in MOVES)
+FLAGS = ("ok", "pending")
+FLAG_OK, FLAG_PENDING = range(len(FLAGS))
+
+# Коды инструкций
+OP_CELL, OP_ACT, OP_JUMP, OP_LOOP, OP_FLAG, OP_NEAR, OP_SET, OP_HALT, OP_BREAK = range(9)
+
+# Значение «клетки» за границей карты в таблицах условий
+EDGE = 256
+
+# Состояния выполнения
+HALTED = "halted"
+COMPLETED = "completed"
+BUDGET = "budget"
+BREAKPOINT = "breakpoint"
+STATUS_NAMES = {
+    HALTED: "программа завершена",
+    COMPLETED: "миссия выполнена",
+    BUDGET: "исчерпан бюджет шагов",
+    BREAKPOINT: "точка останова",
+}
+
+DEFAULT_BUDGET = 1_000_000
+
+
+class ProgramError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Строка {line}: {message}")
+        self.line = line
+
+
+def _kind_table(kind: str) -> bytes:
+    """Таблица условия по значению клетки (257 байт, последний — граница карты)"""
+    if kind == "open":
+        return cells.PASSABLE + b"\x00"
+    if kind == "blocked":
+        return bytes(1 - passable for passable in cells.PASSABLE) + b"\x01"
+    if kind == "edge":
+        return bytes(256) + b"\x01"
+    if kind in cells.CODE_BY_KEY:
+        code = cells.CODE_BY_KEY[kind]
+        return bytes(1 if value & TYPE_MASK == code else 0 for value in range(256)) + b"\x00"
+    raise KeyError(kind)
+
+
+_CONDITION_KINDS = ("open", "blocked", "edge") + tuple(cells.CODE_BY_KEY)
+_TOKEN = re.compile(r"[()]|[^\s()]+")
+
+
+class Program(NamedTuple):
+    code: array               # инструкции по 4 целых: код, a, b, c (c — адрес перехода)
+    tables: List[bytes]       # таблицы условий OP_CELL
+    counters: int             # число счётчиков repeat
+    lines: array              # строка исходника для каждой инструкции
+    line_starts: Dict[int, int]  # строка -> адрес её первой инструкции (для точек останова)
+
+
+# ---------- разбор ----------
+
+def _split_lines(source: str) -> List[Tuple[int, int, str]]:
+    result = []
+    for number, text in enumerate(source.splitlines(), 1):
+        text = text.split("#", 1)[0].rstrip().expandtabs(4)
+        if text.strip():
+            result.append((number, len(text) - len(text.lstrip()), text.strip()))
+    return result
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.lines = _split_lines(source)
+        self.position = 0
+
+    def parse(self) -> list:
+        if not self.lines:
+            return []
+        if self.lines[0][1] != 0:
+            raise ProgramError(self.lines[0][0], "лишний отступ")
+        body = self._block(0)
+        if self.position < len(self.lines):
+            raise ProgramError(self.lines[self.position][0], "неверный отступ")
+        return body
+
+    def _block(self, indent: int) -> list:
+        statements = []
+        while self.position < len(self.lines):
+            line, current, text = self.lines[self.position]
+            if current < indent:
+                break
+            if current > indent:
+                raise ProgramError(line, "лишний отступ")
+            statements.append(self._statement(line, indent, text))
+        return statements
+
+    def _body(self, line: int, indent: int) -> list:
+        if self.position >= len(self.lines) or self.lines[self.position][1] <= indent:
+            raise ProgramError(line, "после двоеточия нужен блок с отступом")
+        return self._block(self.lines[self.position][1])
+
+    def _statement(self, line: int, indent: int, text: str):
+        self.position += 1
+        if not text.endswith(":"):
+            if text in ACTIONS:
+                return ("action", line, ACTIONS.index(text))
+            if text in ("stop", "break"):
+                return (text, line)
+            raise ProgramError(line, f"неизвестная команда «{text}»")
+
+        keyword, _, rest = text[:-1].strip().partition(" ")
+        if keyword == "repeat":
+            if not rest.strip().isdigit():
+                raise ProgramError(line, "после repeat нужно неотрицательное число")
+            return ("repeat", line, int(rest), self._body(line, indent))
+        if keyword == "while":
+            return ("while", line, self._condition(line, rest), self._body(line, indent))
+        if keyword == "if":
+            branches = [(line, self._condition(line, rest), self._body(line, indent))]
+            else_body = None
+            while self.position < len(self.lines):
+                next_line, next_indent, next_text = self.lines[self.position]
+                if next_indent != indent or not next_text.endswith(":"):
+                    break
+                next_keyword, _, next_rest = next_text[:-1].strip().partition(" ")
+                if next_keyword == "elif":
+                    self.position += 1
+                    branches.append((next_line, self._condition(next_line, next_rest),
+                                     self._body(next_line, indent)))
+                elif next_keyword == "else" and not next_rest.strip():
+                    self.position += 1
+                    else_body = self._body(next_line, indent)
+                    break
+                else:
+                    break
+            return ("if", line, branches, else_body)
+        raise ProgramError(line, f"неизвестный блок «{keyword}»")
+
+    def _condition(self, line: int, text: str):
+        tokens = _TOKEN.findall(text)
+        if not tokens:
+            raise ProgramError(line, "пустое условие")
+        condition, position = self._or(line, tokens, 0)
+        if position != len(tokens):
+            raise ProgramError(line, f"лишнее в условии: «{' '.join(tokens[position:])}»")
+        return condition
+
+    def _or(self, line, tokens, position):
+        left, position = self._and(line, tokens, position)
+        while position < len(tokens) and tokens[position] == "or":
+            right, position = self._and(line, tokens, position + 1)
+            left = ("or", left, right)
+        return left, position
+
+    def _and(self, line, tokens, position):
+        left, position = self._not(line, tokens, position)
+        while position < len(tokens) and tokens[position] == "and":
+            right, position = self._not(line, tokens, position + 1)
+            left = ("and", left, right)
+        return left, position
+
+    def _not(self, line, tokens, position):
+        if position < len(tokens) and tokens[position] == "not":
+            operand, position = self._not(line, tokens, position + 1)
+            return ("not", operand), position
+        return self._atom(line, tokens, position)
+
+    def _atom(self, line, tokens, position):
+        if position >= len(tokens):
+            raise ProgramError(line, "условие оборвано")
+        token = tokens[position]
+        if token == "(":
+            condition, position = self._or(line, tokens, position + 1)
+            if position >= len(tokens) or tokens[position] != ")":
+                raise ProgramError(line, "не закрыта скобка")
+            return condition, position + 1
+        if token == "true":
+            return ("true",), position + 1
+        if token in FLAGS:
+            return ("flag", FLAGS.index(token)), position + 1
+        if token == "near":
+            kind = tokens[position + 1] if position + 1 < len(tokens) else None
+            radius = tokens[position + 2] if position + 2 < len(tokens) else ""
+            if kind not in cells.CODE_BY_KEY or not radius.isdigit() or int(radius) < 1:
+                raise ProgramError(line, f"near: нужен тип клетки ({', '.join(cells.CODE_BY_KEY)}) "
+                                         "и радиус не меньше 1")
+            return ("near", cells.CODE_BY_KEY[kind], int(radius)), position + 3
+        if token in PLACES:
+            if position + 1 >= len(tokens) or tokens[position + 1] not in _CONDITION_KINDS:
+                raise ProgramError(line, f"после «{token}» нужен тип клетки: {', '.join(_CONDITION_KINDS)}")
+            return ("cell", PLACES.index(token), tokens[position + 1]), position + 2
+        raise ProgramError(line, f"неизвестное условие «{token}»")
+
+
+# ---------- генерация кода ----------
+
+class _Compiler:
+    def __init__(self):
+        self.code = array("i")
+        self.lines = array("i")
+        self.line_starts: Dict[int, int] = {}
+        self.tables: List[bytes] = []
+        self._table_ids: Dict[Tuple[str, bool], int] = {}
+        self.counters = 0
+        self.line = 0
+        self._breaks: List[List[int]] = []  # адреса переходов break для вложенных циклов
+
+    def emit(self, op: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+        pc = len(self.code)
+        self.code.extend((op, a, b, c))
+        self.lines.append(self.line)
+        return pc
+
+    def here(self) -> int:
+        return len(self.code)
+
+    def patch(self, fixups: List[int], target: int):
+        for pc in fixups:
+            self.code[pc + 3] = target
+
+    def mark(self, line: int):
+        self.line = line
+        self.line_starts.setdefault(line, self.here())
+
+    def table(self, kind: str, negate: bool) -> int:
+        key = (kind, negate)
+        if key not in self._table_ids:
+            table = _kind_table(kind)
+            if negate:
+                table = bytes(1 - value for value in table)
+            self._table_ids[key] = len(self.tables)
+            self.tables.append(table)
+        return self._table_ids[key]
+
+    def condition(self, condition, jump_if: bool, fixups: List[int]):
+        """Переход (адрес дописывается позже) при condition == jump_if, иначе выполнение идёт дальше"""
+        kind = condition[0]
+        if kind == "true":
+            if jump_if:
+                fixups.append(self.emit(OP_JUMP))
+        elif kind == "flag":
+            fixups.append(self.emit(OP_FLAG, condition[1], int(jump_if)))
+        elif kind == "cell":
+            # OP_CELL переходит, когда таблица даёт 0
+            fixups.append(self.emit(OP_CELL, condition[1], self.table(condition[2], jump_if)))
+        elif kind == "near":
+            # b: код типа * 2 + ожидаемый результат проверки, при котором нужен переход
+            fixups.append(self.emit(OP_NEAR, condition[2], condition[1] * 2 + int(jump_if)))
+        elif kind == "not":
+            self.condition(condition[1], not jump_if, fixups)
+        else:
+            # and: ложь первого операнда решает всё; or — то же для истины
+            short = kind == "or"
+            if jump_if == short:
+                self.condition(condition[1], jump_if, fixups)
+                self.condition(condition[2], jump_if, fixups)
+            else:
+                skip: List[int] = []
+                self.condition(condition[1], short, skip)
+                self.condition(condition[2], jump_if, fixups)
+                self.patch(skip, self.here())
+
+    def block(self, statements: list):
+        for statement in statements:
+            self.statement(statement)
+
+    def statement(self, statement):
+        kind, line = statement[0], statement[1]
+        self.mark(line)
+        if kind == "action":
+            self.emit(OP_ACT, statement[2])
+        elif kind == "stop":
+            self.emit(OP_HALT)
+        elif kind == "break":
+            if not self._breaks:
+                raise ProgramError(line, "break вне цикла")
+            self._breaks[-1].append(self.emit(OP_JUMP))
+        elif kind == "repeat":
+            slot = self.counters
+            self.counters += 1
+            self.emit(OP_SET, slot, statement[2])
+            # Точка останова на строке repeat срабатывает на каждом проходе
+            head = self.line_starts[line] = self.here()
+            exits = [self.emit(OP_LOOP, slot)]
+            self.loop_body(statement[3], head, exits)
+        elif kind == "while":
+            head = self.here()
+            exits: List[int] = []
+            self.condition(statement[2], False, exits)
+            self.loop_body(statement[3], head, exits)
+        elif kind == "if":
+            ends: List[int] = []
+            branches, else_body = statement[2], statement[3]
+            for number, (branch_line, condition, body) in enumerate(branches):
+                self.mark(branch_line)
+                skip: List[int] = []
+                self.condition(condition, False, skip)
+                self.block(body)
+                if number < len(branches) - 1 or else_body:
+                    self.line = branch_line
+                    ends.append(self.emit(OP_JUMP))
+                self.patch(skip, self.here())
+            if else_body:
+                self.block(else_body)
+            self.patch(ends, self.here())
+
+    def loop_body(self, body: list, head: int, exits: List[int]):
+        self._breaks.append(exits)
+        self.block(body)
+        self._breaks.pop()
+        self.emit(OP_JUMP, c=head)
+        self.patch(exits, self.here())
+
+
+def compile_program(source: str) -> Program:
+    """Компилирует текст программы в байткод (ProgramError — ошибка с номером строки)"""
+    compiler = _Compiler()
+    compiler.block(_Parser(source).parse())
+    compiler.emit(OP_HALT)
+    return Program(compiler.code, compiler.tables, compiler.counters, compiler.lines, compiler.line_starts)
+
+
+# ---------- выполнение ----------
+
+class RunResult(NamedTuple):
+    status: str   # HALTED, COMPLETED, BUDGET или BREAKPOINT
+    steps: int    # выполнено инструкций за этот запуск
+    actions: int  # из них действий робота
+    line: int     # строка, на которой остановилось выполнение
+
+
+class ProgramRunner:
+    """Выполняет программу для RobotFireman; после точки останова run() продолжает с того же места"""
+
+    def __init__(self, program: Program, robot, breakpoints: Iterable[int] = ()):
+        self.program = program
+        self.robot = robot
+        self.code = array("i", program.code)  # копия, в которой стоят точки останова
+        self.counters = array("i", [0]) * program.counters
+        self.pc = 0
+        self.ok = 1
+        self.status: Optional[str] = None
+        self.total_steps = 0
+        self._breakpoints: Dict[int, int] = {}  # адрес -> исходный код инструкции
+        # адрес -> строки с точками останова на нём (у «while true:» и первой строки тела адрес общий)
+        self._breakpoint_lines: Dict[int, Set[int]] = {}
+        for line in breakpoints:
+            self.add_breakpoint(line)
+
+    def add_breakpoint(self, line: int):
+        pc = self.program.line_starts.get(line)
+        if pc is None:
+            raise ProgramError(line, "в строке нет команд для точки останова")
+        if pc not in self._breakpoints:
+            self._breakpoints[pc] = self.code[pc]
+            self.code[pc] = OP_BREAK
+        self._breakpoint_lines.setdefault(pc, set()).add(line)
+
+    def remove_breakpoint(self, line: int):
+        pc = self.program.line_starts.get(line)
+        lines = self._breakpoint_lines.get(pc)
+        if not lines or line not in lines:
+            return
+        lines.discard(line)
+        if not lines:
+            # Инструкция восстанавливается, только когда на её адресе не осталось точек останова
+            del self._breakpoint_lines[pc]
+            self.code[pc] = self._breakpoints.pop(pc)
+
+    @property
+    def line(self) -> int:
+        return self.program.lines[self.pc // 4]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (HALTED, COMPLETED)
+
+    def run(self, max_steps: int = DEFAULT_BUDGET) -> RunResult:
+        """Выполняет не больше max_steps инструкций и записывает итог одной строкой в журнал робота"""
+        robot = self.robot
+        if robot.is_mission_complete():
+            self.status = COMPLETED
+        if self.finished:
+            return RunResult(self.status, 0, 0, self.line)
+
+        steps = actions = 0
+        if self.status == BREAKPOINT and self.pc in self._breakpoints and max_steps > 0:
+            # Продолжение с точки останова: её инструкция выполняется один раз без подмены
+            self.code[self.pc], pc = self._breakpoints[self.pc], self.pc
+            steps, actions = self._execute(1)
+            self.code[pc] = OP_BREAK
+        if self.status not in (HALTED, COMPLETED) and steps < max_steps:
+            more_steps, more_actions = self._execute(max_steps - steps)
+            steps += more_steps
+            actions += more_actions
+
+        self.total_steps += steps
+        robot.is_mission_complete()
+        robot._log_action(f"Программа: {STATUS_NAMES[self.status]} (строка {self.line}), "
+                          f"инструкций: {steps}, действий: {actions}. "
+                          f"Позиция ({robot.current_x},{robot.current_y}).",
+                          history.PROGRAM, (robot.current_x, robot.current_y))
+        return RunResult(self.status, steps, actions, self.line)
+
+    def _execute(self, budget: int) -> Tuple[int, int]:
+        """Основной цикл интерпретатора; возвращает (инструкций, действий)"""
+        robot = self.robot
+        maze = robot.labyrinth
+        grid, width, height = maze.grid, maze.width, maze.height
+        code, counters, tables = self.code, self.counters, self.program.tables
+        recorded = robot.recorded_actions
+        passable = cells.PASSABLE
+        offsets = tuple(dy * width + dx for dx, dy in MOVES)
+        engine = maze.engine
+        position = engine.position
+        x, y = position % width, position // width
+        pending = engine.pending
+        pc, ok = self.pc, self.ok
+        actions = 0
+        status = BUDGET
+        executed = budget
+
+        for step in range(budget):
+            op = code[pc]
+            if op == OP_CELL:
+                place = code[pc + 1]
+                if place == HERE:
+                    value = grid[position]
+                else:
+                    nx, ny = x + DX[place], y + DY[place]
+                    value = grid[position + offsets[place]] if 0 <= nx < width and 0 <= ny < height else EDGE
+                pc = pc + 4 if tables[code[pc + 2]][value] else code[pc + 3]
+            elif op == OP_ACT:
+                actions += 1
+                action = code[pc + 1]
+                recorded.append(action)
+                pc += 4
+                if action < PROCESS_FIRE:
+                    target = move_target(width, height, position, action)
+                    if target >= 0 and passable[grid[target]]:
+                        grid[position] &= ~ROBOT_BIT
+                        grid[target] |= ROBOT_BIT
+                        position, x, y, ok = target, x + DX[action], y + DY[action], 1
+                    else:
+                        ok = 0
+                else:
+                    value = grid[position]
+                    new_value = TRANSITIONS[action - PROCESS_FIRE][value]
+                    ok = int(new_value != value)
+                    if ok:
+                        # Тип клетки меняется — через set_value, чтобы обновились производные структуры
+                        maze.set_value(x, y, new_value)
+                        pending = engine.pending
+                if ok and mission_complete(grid[position], pending):
+                    status, executed = COMPLETED, step + 1
+                    break
+            elif op == OP_JUMP:
+                pc = code[pc + 3]
+            elif op == OP_LOOP:
+                slot = code[pc + 1]
+                counters[slot] -= 1
+                pc = pc + 4 if counters[slot] >= 0 else code[pc + 3]
+            elif op == OP_FLAG:
+                flag = ok if code[pc + 1] == FLAG_OK else int(pending > 0)
+                pc = code[pc + 3] if flag == code[pc + 2] else pc + 4
+            elif op == OP_NEAR:
+                code_and_expected = code[pc + 2]
+                found = (code_and_expected >> 1) in maze.get_sensor(code[pc + 1]).window(x, y)
+                pc = code[pc + 3] if found == (code_and_expected & 1) else pc + 4
+            elif op == OP_SET:
+                counters[code[pc + 1]] = code[pc + 2]
+                pc += 4
+            elif op == OP_HALT:
+                status, executed = HALTED, step + 1
+                break
+            else:  # OP_BREAK
+                status, executed = BREAKPOINT, step
+                break
+
+        self.pc, self.ok, self.status = pc, ok, status
+        # Ходы пишут бит робота прямо в сетку — позицию движку сообщаем один раз в конце
+        engine.position = position
+        return executed, actions
+
+
+def benchmark(source: str, width: int, height: int, seed: int, max_steps: int):
+    from desktop_app import RobotFireman, RobotMaze
+
+    program = compile_program(source)
+    maze = RobotMaze()
+    if (width, height) == (5, 5):
+        maze.initialize_mission_map()
+    else:
+        maze.generate_random_map(width, height, seed=seed)
+    robot = RobotFireman(maze)
+
+    started = time.perf_counter()
+    result = ProgramRunner(program, robot).run(max_steps)
+    elapsed = time.perf_counter() - started
+
+    print(f"Карта {width}x{height}, инструкций в байткоде: {len(program.code) // 4}")
+    print(f"Итог: {STATUS_NAMES[result.status]}, строка {result.line}, "
+          f"инструкций: {result.steps}, действий: {result.actions}")
+    print(f"Время: {elapsed:.2f} с, инструкций в секунду: {result.steps / max(elapsed, 1e-9):,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск программы робота без интерфейса")
+    parser.add_argument("program", help="файл с текстом программы")
+    parser.add_argument("--size", default="5x5", help="размер карты ШxВ (5x5 — карта миссии)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=DEFAULT_BUDGET, help="бюджет инструкций")
+    args = parser.parse_args()
+    width, height = (int(part) for part in args.size.lower().split("x"))
+    with open(args.program, encoding="utf-8") as file:
+        source = file.read()
+    try:
+        benchmark(source, width, height, args.seed, args.steps)
+    except ProgramError as error:
+        parser.exit(1, f"{error}\n")
+
+
+if __name__ == "__main__":
+    main()
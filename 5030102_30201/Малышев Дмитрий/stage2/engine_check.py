@@ -0,0 +1,287 @@
+"""Сверка и замер общего движка правил (maze_core.engine) со всеми его пользователями.
+
+Сверка: одинаковые потоки действий прогоняются через MissionEngine,
+RobotFireman (stage1), Maze (stage2), интерпретатор программ ProgramRunner,
+пакетную среду BatchRobotEnv и через замороженный код правил до движка
+(engine_legacy.py — RobotFireman, RobotMaze и Maze исходной версии b629d54
+с их собственными таблицами и строками журнала).
+После каждого действия сравниваются успех действия, позиция робота, все
+клетки, выполнение миссии и последнее событие журнала: текст — с исходной
+версией, вид и клетка — между двумя приложениями (в исходной их не было).
+Исходный веб знал только карту 5x5 без воды и участвует лишь на таких
+картах. Карты — карта по умолчанию, случайные миссии 5x5 и процедурные
+карты разных размеров; половина потоков — план решателя с вставленными
+случайными действиями, чтобы миссии доходили до конца.
+
+Замер (действий в секунду, лучший из нескольких прогонов) на большой
+процедурной карте, где у финиша остаётся необработанный пожар:
+
+* случайные действия и проверка миссии после каждого, как при отрисовке;
+* шаги на финиш и обратно — здесь прежние правила на каждой проверке
+  просматривают карту, а движок отвечает по счётчику за O(1);
+* ход сервера игры: действие, проверка и коды всех клеток для ответа
+  (сервера в исходной версии не было — сравниваются только новые реализации).
+
+Запуск: python engine_check.py --trials 300 --bench-size 100
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+STAGE2_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(STAGE2_DIR), "stage1"))
+from batch_env import REWARD_COMPLETE, REWARD_INVALID, BatchRobotEnv
+from desktop_app import RobotFireman, RobotMaze
+from maze_core import catalog, cells
+from maze_core.engine import ACTIONS, MOVE_LEFT, MOVE_RIGHT, MOVES, PROCESS_FIRE, MissionEngine, default_mission
+from maze_core.generator import MapGenerator
+from maze_core.solver import solve_mission
+from robot_program import ProgramRunner, compile_program
+import engine_legacy as legacy
+from game_server import encode_cells
+from web_maze import Maze
+
+# Направления для сообщений: как на кнопках веб-приложения
+WEB_DIRECTIONS = ("Вперед", "Назад", "Влево", "Вправо")
+
+
+def web_act(maze, action):
+    if action < PROCESS_FIRE:
+        return maze.move_robot(*MOVES[action], WEB_DIRECTIONS[action])
+    return maze.extinguish_fire() if action == PROCESS_FIRE else maze.place_post()
+
+
+class Runners:
+    """Одна карта и один поток действий во всех реализациях правил"""
+
+    def __init__(self, width, height, grid, actions):
+        grid = bytearray(bytes(grid).translate(cells.TYPE_ONLY))
+        grid[0] |= cells.ROBOT_BIT  # Робот начинает в (0, 0)
+        self.width = width
+        self.engine = MissionEngine(width, height, bytearray(grid))
+        self.robot = RobotFireman(labyrinth_copy(width, height, grid))
+        self.maze = Maze()
+        self.maze.load_grid(width, height, grid)
+        self.legacy_robot = legacy.RobotFireman(legacy.load_desktop(width, height, grid))
+        # Прежний веб знал только карту 5x5: на остальных картах он не участвует
+        self.legacy_maze = legacy.load_web(grid) if legacy.web_supports(width, height, grid) else None
+        # Интерпретатор выполняет тот же поток как программу из одних действий, по инструкции за run(1)
+        self.program_robot = RobotFireman(labyrinth_copy(width, height, grid))
+        self.runner = ProgramRunner(compile_program("\n".join(ACTIONS[action] for action in actions)),
+                                    self.program_robot)
+        # Пакетная среда из одной миссии на той же карте, без автосброса и без лимита шагов
+        self.batch = BatchRobotEnv(1, map_factory=lambda rng: labyrinth_copy(width, height, grid),
+                                   max_steps=len(actions) + 1, auto_reset=False)
+        self.batch.reset()
+
+    def step(self, action):
+        """Действие во всех реализациях; возвращает описание первого расхождения или None"""
+        run = self.runner.run(1)
+        if (run.steps, run.actions) != (1, 1):
+            return f"интерпретатор: {run}"
+        _, rewards, _ = self.batch.step([action])
+        results = {
+            "engine": self.engine.step(action).ok,
+            "RobotFireman": getattr(self.robot, ACTIONS[action])(),
+            "Maze": web_act(self.maze, action),
+            "ProgramRunner": bool(self.runner.ok),
+            "BatchRobotEnv": rewards[0] not in (REWARD_INVALID, REWARD_INVALID + REWARD_COMPLETE),
+            "legacy.RobotFireman": getattr(self.legacy_robot, ACTIONS[action])(),
+        }
+        if self.legacy_maze:
+            results["legacy.Maze"] = web_act(self.legacy_maze, action)
+        if len(set(results.values())) != 1:
+            return f"успех действия: {results}"
+
+        position = self.batch.positions[0]
+        positions = {
+            "engine": self.engine.robot,
+            "RobotFireman": (self.robot.current_x, self.robot.current_y),
+            "Maze": (self.maze.robot_x, self.maze.robot_y),
+            "ProgramRunner": (self.program_robot.current_x, self.program_robot.current_y),
+            "BatchRobotEnv": (position % self.width, position // self.width),
+            "legacy.RobotFireman": (self.legacy_robot.current_x, self.legacy_robot.current_y),
+        }
+        if self.legacy_maze:
+            positions["legacy.Maze"] = (self.legacy_maze.robot_x, self.legacy_maze.robot_y)
+        if len(set(positions.values())) != 1:
+            return f"позиция робота: {positions}"
+
+        grids = {
+            "RobotFireman": self.robot.labyrinth.grid,
+            "Maze": self.maze.get_codes(),
+            "ProgramRunner": self.program_robot.labyrinth.grid,
+            "BatchRobotEnv": self.batch.grids,
+            "legacy.RobotFireman": legacy.desktop_values(self.legacy_robot.labyrinth),
+        }
+        for name, grid in grids.items():
+            if grid != self.engine.grid:
+                return f"клетки {name} расходятся с движком"
+        if self.legacy_maze and legacy.web_codes(self.legacy_maze) != self.engine.grid.translate(cells.TYPE_ONLY):
+            return "клетки legacy.Maze расходятся с движком"
+
+        completed = {
+            "engine": self.engine.is_complete(),
+            "RobotFireman": self.robot.is_mission_complete(),
+            "Maze": self.maze.check_mission_complete(),
+            "ProgramRunner": self.program_robot.is_mission_complete(),
+            "BatchRobotEnv": bool(self.batch.completed[0]),
+            "legacy.RobotFireman": self.legacy_robot.is_mission_complete(),
+        }
+        if self.legacy_maze:
+            completed["legacy.Maze"] = self.legacy_maze.check_mission_complete()
+        if len(set(completed.values())) != 1:
+            return f"выполнение миссии: {completed}"
+
+        # Тексты журналов — как в исходной версии; вид и клетка события (их там не было) — общие у двух приложений
+        desktop_event, web_event = self.robot.action_history.events[-1], self.maze.history.events[-1]
+        texts = [(desktop_event.text, legacy.entry_text(self.legacy_robot.action_history[-1]))]
+        if self.legacy_maze:
+            texts.append((web_event.text, legacy.entry_text(self.legacy_maze.history[-1])))
+        for new, old in texts:
+            if new != old:
+                return f"журнал: «{new}» вместо «{old}»"
+        if desktop_event[1:-1] != web_event[1:-1]:
+            return f"вид и клетка события: {desktop_event[1:-1]} на столе, {web_event[1:-1]} в вебе"
+        return None
+
+
+def labyrinth_copy(width, height, grid):
+    labyrinth = RobotMaze()
+    labyrinth.load_from_grid(width, height, grid)
+    return labyrinth
+
+
+def random_map(rng):
+    """Карта для сверки: (ширина, высота, сетка)"""
+    kind = rng.random()
+    if kind < 0.1:
+        return 5, 5, default_mission()
+    if kind < 0.6:
+        return catalog.SIZE, catalog.SIZE, catalog.random_layout(rng)
+    width, height = rng.randint(2, 16), rng.randint(2, 16)
+    return width, height, MapGenerator(width, height, seed=rng.randrange(1 << 30)).generate()
+
+
+def action_stream(rng, width, height, grid, length):
+    """Случайные действия или (в половине случаев) план решателя со вставками случайных действий"""
+    plan = solve_mission(width, height, grid, (0, 0)) if rng.random() < 0.5 else None
+    if not plan:
+        return [rng.randrange(len(ACTIONS)) for _ in range(length)]
+    actions = []
+    for action in plan:
+        if rng.random() < 0.1:
+            # Лишняя обработка лишь делает раньше то, что сделал бы план, — миссия всё равно выполняется
+            actions.append(rng.randrange(PROCESS_FIRE, len(ACTIONS)))
+        actions.append(action)
+    return actions
+
+
+def check_parity(trials, length, seed):
+    rng = random.Random(seed)
+    total_actions = completed = 0
+    for trial in range(trials):
+        width, height, grid = random_map(rng)
+        actions = action_stream(rng, width, height, grid, length)
+        runners = Runners(width, height, grid, actions)
+        for number, action in enumerate(actions):
+            mismatch = runners.step(action)
+            total_actions += 1
+            if mismatch:
+                print(f"Расхождение: прогон {trial}, карта {width}x{height}, действие {number} "
+                      f"({ACTIONS[action]}): {mismatch}")
+                return False
+            if runners.engine.completed:
+                completed += 1
+                break
+    print(f"Сверка: прогонов {trials}, действий {total_actions}, миссий выполнено {completed} — расхождений нет")
+    return True
+
+
+def bench_map(size, seed):
+    """Процедурная карта конца игры: всё обработано, кроме пожара в дальнем углу; финиш в (1, 0)"""
+    processed = bytes(cells.POST if cells.PENDING[value] else value for value in range(256))
+    grid = MapGenerator(size, size, seed=seed).generate().translate(processed)
+    grid[0], grid[1], grid[-1] = cells.ROAD, cells.FINISH, cells.FIRE
+    return grid
+
+
+def bench(size, actions, seed, repeat):
+    """Действий в секунду для каждой реализации в трёх сценариях (лучший из repeat прогонов)"""
+    rng = random.Random(seed)
+    random_walk = [rng.randrange(len(ACTIONS)) for _ in range(actions)]
+    at_finish = [MOVE_RIGHT, MOVE_LEFT] * (actions // 2)
+    scenarios = (
+        ("случайные действия + проверка миссии", random_walk, False),
+        ("шаги на финиш и обратно + проверка миссии", at_finish, False),
+        ("ход сервера: действие, проверка и коды клеток", at_finish, True),
+    )
+    implementations = (
+        # У исходной версии не было сервера игры, поэтому в его сценарии прежних правил нет
+        ("legacy.Maze (прежний веб)", lambda runners: lambda action: web_act(runners.legacy_maze, action),
+         lambda runners: runners.legacy_maze.check_mission_complete, None),
+        ("Maze (веб поверх движка)", lambda runners: lambda action: web_act(runners.maze, action),
+         lambda runners: runners.maze.check_mission_complete, lambda runners: lambda: encode_cells(runners.maze)),
+        ("legacy.RobotFireman (прежний настольный)",
+         lambda runners: lambda action: getattr(runners.legacy_robot, ACTIONS[action])(),
+         lambda runners: runners.legacy_robot.is_mission_complete, None),
+        ("RobotFireman (поверх движка)", lambda runners: lambda action: getattr(runners.robot, ACTIONS[action])(),
+         lambda runners: runners.robot.is_mission_complete, None),
+        ("MissionEngine", lambda runners: runners.engine.step, lambda runners: runners.engine.is_complete,
+         lambda runners: lambda: runners.engine.grid.translate(cells.TYPE_ONLY)),
+    )
+    grid = bench_map(size, seed)
+    if not legacy.web_supports(size, size, grid):
+        print(f"Замер: прежний веб знал только карту 5x5 без воды — на карте {size}x{size} он не участвует")
+        implementations = [implementation for implementation in implementations
+                           if implementation[0] != "legacy.Maze (прежний веб)"]
+    for title, stream, encode in scenarios:
+        print(f"Замер: карта {size}x{size}, {title}, действий {len(stream)}")
+        rates = {}
+        for name, make_act, make_check, make_encoder in implementations:
+            if encode and make_encoder is None:
+                continue
+            best = float("inf")
+            for _ in range(repeat):
+                runners = Runners(size, size, grid, ())
+                act, check = make_act(runners), make_check(runners)
+                encoder = make_encoder(runners) if encode else None
+                gc.collect()
+                started = time.perf_counter()
+                for action in stream:
+                    act(action)
+                    check()
+                    if encoder:
+                        encoder()
+                best = min(best, time.perf_counter() - started)
+            rates[name] = len(stream) / max(best, 1e-9)
+            print(f"  {name:42} {rates[name]:12,.0f} действий/с")
+        gains = [f"{new.split()[0]} / {old.split()[0]}: {rates[new] / rates[old]:.2f}x"
+                 for old, new in (("legacy.Maze (прежний веб)", "Maze (веб поверх движка)"),
+                                  ("legacy.RobotFireman (прежний настольный)", "RobotFireman (поверх движка)"))
+                 if old in rates and new in rates]
+        if gains:
+            print("  " + ", ".join(gains))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка и замер движка правил миссии")
+    parser.add_argument("--trials", type=int, default=300, help="число прогонов сверки")
+    parser.add_argument("--actions", type=int, default=200, help="длина случайного потока действий")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench-size", type=int, default=100, help="сторона карты для замера (0 — без замера)")
+    parser.add_argument("--bench-actions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов замера на реализацию (берётся лучший)")
+    args = parser.parse_args()
+
+    if not check_parity(args.trials, args.actions, args.seed):
+        sys.exit(1)
+    if args.bench_size:
+        bench(args.bench_size, args.bench_actions, args.seed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""Замороженные правила миссии исходной версии (базовый коммит b629d54) — эталон для engine_check.py.
+
+RobotFireman, RobotMaze, RobotCell и Maze скопированы из desktop_app.py и
+web_app.py базовой версии без изменений: свои перечисления, словари и
+строки, ничего из maze_core. Поэтому ошибка в таблицах maze_core.cells или в
+движке не может одинаково поменять обе стороны сверки. Убрано только то,
+что к правилам не относится: окно Tk, отрисовка Streamlit и генерация
+случайных карт. Модуль больше не правится: если расходится сверка, виноват
+новый код, а не этот.
+
+Внизу — переходник для сверки: загрузка карты из буфера кодов и обратно.
+Прежний веб знал только карту 5x5 без воды (размер зашит в правилах),
+поэтому web_supports отбирает карты, на которых его можно сравнивать.
+"""
+import time
+from enum import Enum
+from typing import List, Optional
+
+
+# ==================== НАСТОЛЬНОЕ ПРИЛОЖЕНИЕ (desktop_app.py) ====================
+
+class DirectionType(Enum):
+    FORWARD = "Forward"
+    BACKWARD = "Backward"
+    LEFT = "Left"
+    RIGHT = "Right"
+    DIAG_UP = "DiagUp"
+    DIAG_DOWN = "DiagDown"
+
+
+class CellType(Enum):
+    ROAD = 0x0
+    FIRE = 0x1
+    FILLED = 0x2
+    WATER = 0x3
+    BARRIER = 0x4
+    FINISH = 0x5
+    POST = 0x6
+
+    @classmethod
+    def from_value(cls, value: int) -> 'CellType':
+        base_value = value & 0x7
+        for cell_type in cls:
+            if cell_type.value == base_value:
+                return cell_type
+        return cls.ROAD
+
+    def get_color(self):
+        colors = {
+            CellType.ROAD: "white",
+            CellType.FIRE: "red",
+            CellType.FILLED: "orange",
+            CellType.WATER: "blue",
+            CellType.BARRIER: "black",
+            CellType.FINISH: "green",
+            CellType.POST: "purple",
+        }
+        return colors.get(self, "gray")
+
+    def get_symbol(self):
+        symbols = {
+            CellType.ROAD: "ДОРОГА",
+            CellType.FIRE: "ПОЖАР",
+            CellType.FILLED: "ЗАЛИТОЕ",
+            CellType.WATER: "ВОДА",
+            CellType.BARRIER: "БАРЬЕР",
+            CellType.FINISH: "ФИНИШ",
+            CellType.POST: "ПОСТ",
+        }
+        return symbols.get(self, "?")
+
+
+class RobotCell:
+    def __init__(self, x: int = 0, y: int = 0, cell_value: int = 0x0):
+        self.x = x
+        self.y = y
+        self.has_robot = (cell_value & 0x8) != 0
+        self.cell_type = CellType.from_value(cell_value)
+
+    def get_display_text(self):
+        return self.cell_type.get_symbol()
+
+    def get_color(self):
+        return self.cell_type.get_color()
+
+    def is_forbidden(self):
+        """Проверяет, является ли клетка запрещенной для захода"""
+        return self.cell_type in [CellType.BARRIER]
+
+
+class RobotMaze:
+    def __init__(self, width: int = None, height: int = None, cells: List[List[int]] = None):
+        self.width = width if width is not None else 0
+        self.height = height if height is not None else 0
+        self.cells = []
+
+        if cells is not None:
+            self.load_from_values(cells)
+        elif width is not None and height is not None:
+            self.initialize_maze()
+
+    def load_from_values(self, cell_values: List[List[int]]):
+        if not cell_values:
+            self.height = 0
+            self.width = 0
+            self.cells = []
+            return
+
+        self.height = len(cell_values)
+        self.width = len(cell_values[0]) if self.height > 0 else 0
+
+        self.cells = []
+        for row_idx in range(self.height - 1, -1, -1):
+            y = row_idx
+            row = []
+            for x in range(self.width):
+                cell_value = cell_values[row_idx][x]
+                cell = RobotCell(x, y, cell_value)
+                row.append(cell)
+            self.cells.append(row)
+
+    def initialize_maze(self, cell_type: CellType = None):
+        if cell_type is None:
+            cell_type = CellType.ROAD
+
+        self.cells = []
+        for list_y in range(self.height):
+            y = self.height - 1 - list_y
+            row = []
+            for x in range(self.width):
+                cell_value = cell_type.value
+                cell = RobotCell(x, y, cell_value)
+                row.append(cell)
+            self.cells.append(row)
+
+    def get_cell_by_coordinates(self, x: int, y: int) -> Optional[RobotCell]:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            list_y = self.height - 1 - y
+            return self.cells[list_y][x]
+        return None
+
+    def get_neighbor_cell(self, current_cell: RobotCell,
+                          search_direction: DirectionType) -> Optional[RobotCell]:
+        if not self.cells or not current_cell:
+            return None
+
+        x, y = current_cell.x, current_cell.y
+
+        offsets = {
+            DirectionType.FORWARD.value: (0, 1),
+            DirectionType.BACKWARD.value: (0, -1),
+            DirectionType.LEFT.value: (-1, 0),
+            DirectionType.RIGHT.value: (1, 0),
+            DirectionType.DIAG_UP.value: (-1, 1),
+            DirectionType.DIAG_DOWN.value: (1, -1),
+        }
+
+        dx, dy = offsets.get(search_direction.value, (0, 0))
+        return self.get_cell_by_coordinates(x + dx, y + dy)
+
+
+class RobotFireman:
+    def __init__(self, labyrinth: RobotMaze):
+        self.labyrinth = labyrinth
+        self.action_history: List[str] = []
+        self.mission_completed = False
+        self.notification_shown = False
+
+        self.current_cell: Optional[RobotCell] = None
+        for y in range(labyrinth.height):
+            for x in range(labyrinth.width):
+                cell = labyrinth.get_cell_by_coordinates(x, y)
+                if cell and cell.has_robot:
+                    self.current_cell = cell
+                    self.current_x = x
+                    self.current_y = y
+                    break
+            if self.current_cell:
+                break
+
+        if not self.current_cell:
+            self.current_cell = labyrinth.get_cell_by_coordinates(0, 0)
+            if self.current_cell:
+                self.current_cell.has_robot = True
+                self.current_x = 0
+                self.current_y = 0
+
+        self._log_action(f"Начало миссии в ({self.current_x},{self.current_y}).")
+
+    def _log_action(self, action: str):
+        """Вспомогательный метод для записи действия с временной меткой."""
+        timestamp = time.strftime("%H:%M:%S")
+        self.action_history.append(f"[{timestamp}] {action}")
+
+    def _move_robot(self, target: RobotCell) -> bool:
+        """Внутренный метод для перемещения робота в указанную клетку."""
+        if not self.current_cell or not target:
+            self._log_action("Ошибка: нет текущей клетки или целевой клетки!")
+            return False
+
+        # Проверяем, не запрещенная ли клетка
+        if target.is_forbidden():
+            self._log_action(f"Невозможно переместиться на ЗАПРЕЩЕННУЮ клетку ({target.x},{target.y})!")
+            return False
+
+        # Проверяем, что клетка соседняя (не телепортация)
+        dx = abs(target.x - self.current_x)
+        dy = abs(target.y - self.current_y)
+
+        if dx > 1 or dy > 1:
+            self._log_action(
+                f"Попытка телепортации с ({self.current_x},{self.current_y}) на ({target.x},{target.y})! Отменено.")
+            return False
+
+        # Перемещаем робота
+        self.current_cell.has_robot = False
+        target.has_robot = True
+        self.current_cell = target
+        self.current_x = target.x
+        self.current_y = target.y
+
+        cell_type_names = {
+            CellType.ROAD: "Дорога",
+            CellType.FIRE: "Пожар",
+            CellType.FILLED: "Залитое",
+            CellType.WATER: "Вода",
+            CellType.BARRIER: "Барьер",
+            CellType.FINISH: "Финиш",
+            CellType.POST: "Пост",
+        }
+
+        cell_name = cell_type_names.get(target.cell_type, "Неизвестно")
+        self._log_action(f"Перемещение: ({target.x},{target.y}). Тип: {cell_name}")
+
+        return True
+
+    def attack(self) -> bool:
+        """Штурмовать - движение вперед (север, Y+1)"""
+        if self.labyrinth and self.current_cell:
+            new_cell = self.labyrinth.get_neighbor_cell(
+                self.current_cell, DirectionType.FORWARD
+            )
+            if new_cell:
+                if new_cell.is_forbidden():
+                    self._log_action(f"Невозможно двигаться вперед - клетка ({new_cell.x},{new_cell.y}) запрещена!")
+                    return False
+                return self._move_robot(new_cell)
+            else:
+                self._log_action("Не могу двигаться вперед - клетка за границей!")
+        return False
+
+    def retreat(self) -> bool:
+        """Отойти - движение назад (юг, Y-1)"""
+        if self.labyrinth and self.current_cell:
+            new_cell = self.labyrinth.get_neighbor_cell(
+                self.current_cell, DirectionType.BACKWARD
+            )
+            if new_cell:
+                if new_cell.is_forbidden():
+                    self._log_action(f"Невозможно двигаться назад - клетка ({new_cell.x},{new_cell.y}) запрещена!")
+                    return False
+                return self._move_robot(new_cell)
+            else:
+                self._log_action("Не могу двигаться назад - клетка за границей!")
+        return False
+
+    def move_left(self) -> bool:
+        """СдвинутьЛево - движение влево (запад, X-1)"""
+        if self.labyrinth and self.current_cell:
+            new_cell = self.labyrinth.get_neighbor_cell(
+                self.current_cell, DirectionType.LEFT
+            )
+            if new_cell:
+                if new_cell.is_forbidden():
+                    self._log_action(f"Невозможно двигаться влево - клетка ({new_cell.x},{new_cell.y}) запрещена!")
+                    return False
+                return self._move_robot(new_cell)
+            else:
+                self._log_action("Не могу двигаться влево - клетка за границей!")
+        return False
+
+    def move_right(self) -> bool:
+        """СдвинутьПраво - движение вправо (восток, X+1)"""
+        if self.labyrinth and self.current_cell:
+            new_cell = self.labyrinth.get_neighbor_cell(
+                self.current_cell, DirectionType.RIGHT
+            )
+            if new_cell:
+                if new_cell.is_forbidden():
+                    self._log_action(f"Невозможно двигаться вправо - клетка ({new_cell.x},{new_cell.y}) запрещена!")
+                    return False
+                return self._move_robot(new_cell)
+            else:
+                self._log_action("Не могу двигаться вправо - клетка за границей!")
+        return False
+
+    def process_fire(self) -> bool:
+        """Обработка Пожар -> Залитое"""
+        if self.current_cell and self.current_cell.cell_type == CellType.FIRE:
+            self.current_cell.cell_type = CellType.FILLED
+            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Найден ПОЖАР. Обработка в ЗАЛИТОЕ.")
+            return True
+        elif self.current_cell and self.current_cell.cell_type != CellType.FIRE:
+            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Нет пожара для обработки.")
+        return False
+
+    def process_filled(self) -> bool:
+        """Обработка Залитое -> Пост"""
+        if self.current_cell and self.current_cell.cell_type == CellType.FILLED:
+            self.current_cell.cell_type = CellType.POST
+            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Найдено ЗАЛИТОЕ. Обработка в ПОСТ.")
+            return True
+        elif self.current_cell and self.current_cell.cell_type != CellType.FILLED:
+            self._log_action(f"В клетке ({self.current_x},{self.current_y}): Нет залитого для обработки.")
+        return False
+
+    def is_mission_complete(self) -> bool:
+        """Проверка завершения миссии: Финиш достигнут И нет необработанных клеток."""
+        if self.mission_completed:
+            return True
+
+        if not (self.current_cell and self.current_cell.cell_type == CellType.FINISH):
+            return False
+
+        for y in range(self.labyrinth.height):
+            for x in range(self.labyrinth.width):
+                cell = self.labyrinth.get_cell_by_coordinates(x, y)
+                if cell and cell.cell_type in (CellType.FIRE, CellType.FILLED):
+                    return False
+
+        self.mission_completed = True
+        return True
+
+
+# ==================== ВЕБ-ПРИЛОЖЕНИЕ (web_app.py) ====================
+
+class Maze:
+    def __init__(self):
+        self.width = 5
+        self.height = 5
+        self.grid = []
+        self.robot_x = 0
+        self.robot_y = 0
+        self.history = []
+        self.mission_completed = False
+        self.finish_x = None
+        self.finish_y = None
+        self.init_default_map()
+
+    def init_default_map(self):
+        """Создает карту по умолчанию"""
+        self.grid = []
+        for y in range(5):
+            row = []
+            for x in range(5):
+                row.append("road")  # Дорога
+            self.grid.append(row)
+
+        self.grid[4][4] = "finish"  # Финиш (4,4)
+        self.grid[4][3] = "barrier"  # Барьер (3,4)
+        self.grid[4][2] = "post"  # Пост (2,4)
+        self.grid[4][1] = "fire"  # Пожар (1,4)
+
+        self.grid[3][3] = "fire"  # Пожар (3,3)
+        self.grid[3][1] = "filled"  # Залитое (1,3)
+
+        self.grid[2][3] = "post"  # Пост (3,2)
+        self.grid[2][1] = "fire"  # Пожар (1,2)
+        self.grid[2][0] = "barrier"  # Барьер (0,2)
+
+        self.grid[1][2] = "filled"  # Залитое (2,1)
+
+        self.grid[0][4] = "post"  # Пост (4,0)
+        self.grid[0][3] = "barrier"  # Барьер (3,0)
+
+        self.robot_x = 0
+        self.robot_y = 0
+        self.mission_completed = False
+
+        self.find_finish_position()
+
+    def find_finish_position(self):
+        """Находит координаты клетки финиша"""
+        self.finish_x = None
+        self.finish_y = None
+        for y in range(5):
+            for x in range(5):
+                if self.grid[y][x] == "finish":
+                    self.finish_x = x
+                    self.finish_y = y
+                    return
+
+    def get_cell_color(self, cell_type):
+        """Возвращает цвет клетки"""
+        colors = {
+            "road": "#FFFFFF",  # Белый
+            "fire": "#FF0000",  # Красный
+            "filled": "#FFA500",  # Оранжевый
+            "finish": "#00FF00",  # Зеленый
+            "post": "#800080",  # Фиолетовый
+            "barrier": "#000000",  # Черный
+        }
+        return colors.get(cell_type, "#808080")  # Серый по умолчанию
+
+    def get_cell_text(self, cell_type):
+        """Возвращает текст для клетки (без робота)"""
+        texts = {
+            "road": "",
+            "fire": "🔥",
+            "filled": "💧",
+            "finish": "🏁",
+            "post": "📯",
+            "barrier": "⬛",
+        }
+        return texts.get(cell_type, "?")
+
+    def get_cell_name(self, cell_type):
+        """Возвращает название типа клетки"""
+        names = {
+            "road": "Дорога",
+            "fire": "Пожар",
+            "filled": "Залитое",
+            "finish": "Финиш",
+            "post": "Пост",
+            "barrier": "Барьер",
+        }
+        return names.get(cell_type, "Неизвестно")
+
+    def can_move_to(self, x, y):
+        """Проверяет, может ли робот переместиться в клетку"""
+        if x < 0 or x >= 5 or y < 0 or y >= 5:
+            return False
+        if self.grid[y][x] == "barrier":
+            return False
+        return True
+
+    def move_robot(self, dx, dy, direction_name):
+        """Перемещает робота"""
+        new_x = self.robot_x + dx
+        new_y = self.robot_y + dy
+
+        if self.can_move_to(new_x, new_y):
+            old_x, old_y = self.robot_x, self.robot_y
+            self.robot_x = new_x
+            self.robot_y = new_y
+
+            self.mission_completed = False
+
+            timestamp = time.strftime("%H:%M:%S")
+            cell_name = self.get_cell_name(self.grid[new_y][new_x])
+            self.history.append(
+                f"[{timestamp}] {direction_name}: ({old_x},{old_y}) → ({new_x},{new_y}) [{cell_name}]")
+            return True
+        else:
+            timestamp = time.strftime("%H:%M:%S")
+            self.history.append(f"[{timestamp}] Не могу двигаться {direction_name}!")
+            return False
+
+    def extinguish_fire(self):
+        """Тушит пожар на текущей клетке (Пожар -> Залитое)"""
+        current_cell = self.grid[self.robot_y][self.robot_x]
+        timestamp = time.strftime("%H:%M:%S")
+
+        if current_cell == "fire":
+            self.grid[self.robot_y][self.robot_x] = "filled"
+
+            self.mission_completed = False
+
+            self.history.append(f"[{timestamp}] Потушен пожар в ({self.robot_x},{self.robot_y})")
+            return True
+        else:
+            self.history.append(f"[{timestamp}] Здесь нет пожара для тушения")
+            return False
+
+    def place_post(self):
+        """Ставит пост на текущей клетке (Залитое -> Пост)"""
+        current_cell = self.grid[self.robot_y][self.robot_x]
+        timestamp = time.strftime("%H:%M:%S")
+
+        if current_cell == "filled":
+            self.grid[self.robot_y][self.robot_x] = "post"
+
+            self.mission_completed = False
+
+            self.history.append(f"[{timestamp}] Поставлен пост в ({self.robot_x},{self.robot_y})")
+            return True
+        else:
+            self.history.append(f"[{timestamp}] Здесь нельзя поставить пост (нужна залитая клетка)")
+            return False
+
+    def check_mission_complete(self):
+        """Проверяет, выполнена ли миссия"""
+        if self.mission_completed:
+            return True
+
+        if self.grid[self.robot_y][self.robot_x] != "finish":
+            return False
+
+        for y in range(5):
+            for x in range(5):
+                cell = self.grid[y][x]
+                if cell in ["fire", "filled"]:
+                    return False
+
+        self.mission_completed = True
+        return True
+
+
+# ==================== ПЕРЕХОДНИК ДЛЯ СВЕРКИ ====================
+
+# Ключи клеток прежнего веба по коду типа (воды и кода 7 в нём не было)
+WEB_KEYS = {0x0: "road", 0x1: "fire", 0x2: "filled", 0x4: "barrier", 0x5: "finish", 0x6: "post"}
+WEB_CODES = {key: code for code, key in WEB_KEYS.items()}
+
+
+def load_desktop(width: int, height: int, grid: bytes) -> RobotMaze:
+    """Прежний RobotMaze из буфера значений (индекс y * width + x, бит робота 0x8)"""
+    return RobotMaze(cells=[list(grid[y * width:(y + 1) * width]) for y in range(height)])
+
+
+def desktop_values(maze: RobotMaze) -> bytes:
+    """Значения клеток прежнего RobotMaze одним буфером (тип | 0x8 для робота)"""
+    return bytes(maze.get_cell_by_coordinates(x, y).cell_type.value
+                 | (0x8 if maze.get_cell_by_coordinates(x, y).has_robot else 0x0)
+                 for y in range(maze.height) for x in range(maze.width))
+
+
+def web_supports(width: int, height: int, grid: bytes) -> bool:
+    """Можно ли сыграть карту в прежнем вебе: только 5x5 и только известные ему клетки"""
+    return (width, height) == (5, 5) and all(value & 0x7 in WEB_KEYS for value in grid)
+
+
+def load_web(grid: bytes) -> Maze:
+    """Прежний Maze с картой 5x5 из буфера кодов; робот в (0, 0)"""
+    maze = Maze()
+    maze.grid = [[WEB_KEYS[grid[y * 5 + x] & 0x7] for x in range(5)] for y in range(5)]
+    maze.find_finish_position()
+    return maze
+
+
+def web_codes(maze: Maze) -> bytes:
+    """Коды типов клеток прежнего Maze одним буфером (индекс y * 5 + x)"""
+    return bytes(WEB_CODES[cell] for row in maze.grid for cell in row)
+
+
+def entry_text(entry: str) -> str:
+    """Текст записи прежнего журнала без метки времени «[ЧЧ:ММ:СС] »"""
+    return entry.split("] ", 1)[1]
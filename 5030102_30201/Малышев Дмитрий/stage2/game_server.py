@@ -0,0 +1,624 @@
+"""Локальный asyncio-сервер игры поверх Maze из web_maze (HTTP + WebSocket) и нагрузочный клиент.
+
+Запуск сервера:      python game_server.py serve --port 8765
+Нагрузочный тест:    python game_server.py bench --spawn --sessions 2000 --actions 20
+
+HTTP API (JSON):
+    POST   /sessions                    создать сессию
+    GET    /sessions/<id>               полное состояние (?format=bin — бинарное)
+    POST   /sessions/<id>/reset         карта по умолчанию
+    POST   /sessions/<id>/random        случайная карта ({"level": "easy" | "medium" | "hard"} — из каталога миссий)
+    POST   /sessions/<id>/move          {"dir": "up" | "down" | "left" | "right"}
+    POST   /sessions/<id>/extinguish    потушить пожар
+    POST   /sessions/<id>/post          поставить пост
+    POST   /sessions/<id>/batch         {"commands": [{"cmd": "move", "dir": "up"}, ...], "since": v}
+    DELETE /sessions/<id>               удалить сессию
+    GET    /sessions/<id>/ws            WebSocket: сообщения в формате тела /batch
+    GET    /stats                       статистика сервера
+
+Ответ на команды — дельта состояния: изменившиеся клетки относительно версии
+"since" (если клиент её прислал и она совпадает с текущей), иначе полное состояние.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import time
+import uuid
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import catalog
+from maze_core.cells import TYPE_ONLY
+from web_maze import Maze
+
+MOVES = {
+    "up": (0, 1, "Вперед"),
+    "down": (0, -1, "Назад"),
+    "left": (-1, 0, "Влево"),
+    "right": (1, 0, "Вправо"),
+}
+
+ACTION_COMMANDS = ("move", "extinguish", "post")
+SESSION_COMMANDS = ("reset", "random")
+
+# Бинарный формат состояния: заголовок + коды клеток (полное) или пары индекс/код (дельта)
+BIN_HEADER = struct.Struct("<BIHHHHB")  # вид (0 — полное, 1 — дельта), версия, w, h, x, y, флаги
+BIN_CHANGE = struct.Struct("<IB")
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY = 1 << 20
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def validate_command(command) -> None:
+    """Проверяет команду до выполнения, чтобы пакет не применялся частично"""
+    if not isinstance(command, dict):
+        raise ApiError(400, "команда должна быть JSON-объектом")
+    name = command.get("cmd")
+    if name not in ACTION_COMMANDS and name not in SESSION_COMMANDS:
+        raise ApiError(400, f"неизвестная команда: {name!r}")
+    if name == "move" and command.get("dir") not in MOVES:
+        raise ApiError(400, f"неизвестное направление: {command.get('dir')!r}")
+    if name == "random" and command.get("level") not in (None, *catalog.LEVELS):
+        raise ApiError(400, f"неизвестная сложность: {command.get('level')!r}")
+
+
+def encode_cells(maze: Maze) -> bytes:
+    """Кодирует сетку Maze в байты (одна клетка — один код, строки снизу вверх)"""
+    return maze.engine.grid.translate(TYPE_ONLY)
+
+
+class GameSession:
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.maze = Maze()
+        self.lock = asyncio.Lock()
+        self.version = 0
+        self.cells = encode_cells(self.maze)
+        self.last_access = time.monotonic()
+
+    def apply(self, command: dict) -> bool:
+        """Выполняет одну команду так же, как кнопки веб-интерфейса"""
+        name = command["cmd"]
+        if name == "reset":
+            self.maze = Maze()
+            return True
+        if name == "random":
+            self.maze = Maze()
+            self.maze.init_random_map(command.get("level"))
+            return True
+
+        # Кнопки действий в интерфейсе отключены после завершения миссии
+        if self.maze.check_mission_complete():
+            return False
+        if name == "move":
+            return self.maze.move_robot(*MOVES[command["dir"]])
+        if name == "extinguish":
+            return self.maze.extinguish_fire()
+        return self.maze.place_post()
+
+    def run_batch(self, commands: list, since=None) -> dict:
+        """Выполняет пакет команд и возвращает дельту состояния"""
+        for command in commands:
+            validate_command(command)
+
+        previous = self.cells
+        previous_version = self.version
+        results = [self.apply(command) for command in commands]
+
+        self.cells = encode_cells(self.maze)
+        if self.cells != previous or any(results):
+            self.version += 1
+
+        if since is None or since != previous_version or len(self.cells) != len(previous):
+            return {"ok": results, **self.state()}
+
+        changes = [i for i, (old, new) in enumerate(zip(previous, self.cells)) if old != new]
+        return {
+            "ok": results,
+            "v": self.version,
+            "robot": [self.maze.robot_x, self.maze.robot_y],
+            "done": self.maze.check_mission_complete(),
+            "changes": [[i % self.maze.width, i // self.maze.width, self.cells[i]] for i in changes],
+        }
+
+    def state(self) -> dict:
+        maze = self.maze
+        return {
+            "id": self.id,
+            "v": self.version,
+            "w": maze.width,
+            "h": maze.height,
+            "robot": [maze.robot_x, maze.robot_y],
+            "done": maze.check_mission_complete(),
+            "cells": "".join(str(code) for code in self.cells),
+        }
+
+    def state_binary(self, delta: dict = None) -> bytes:
+        maze = self.maze
+        if delta is not None and "changes" in delta:
+            header = BIN_HEADER.pack(1, self.version, maze.width, maze.height,
+                                     maze.robot_x, maze.robot_y, int(maze.mission_completed))
+            body = b"".join(BIN_CHANGE.pack(y * maze.width + x, code) for x, y, code in delta["changes"])
+            return header + body
+        header = BIN_HEADER.pack(0, self.version, maze.width, maze.height,
+                                 maze.robot_x, maze.robot_y, int(maze.check_mission_complete()))
+        return header + self.cells
+
+
+class GameServer:
+    def __init__(self, max_sessions: int = 100000, session_ttl: float = 1800.0):
+        self.sessions = {}
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.requests = 0
+        self.started = time.monotonic()
+
+    # ---------- сессии ----------
+
+    def create_session(self) -> GameSession:
+        if len(self.sessions) >= self.max_sessions:
+            raise ApiError(503, "достигнут лимит сессий")
+        session = GameSession(uuid.uuid4().hex[:16])
+        self.sessions[session.id] = session
+        return session
+
+    def get_session(self, session_id: str) -> GameSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ApiError(404, f"сессия {session_id} не найдена")
+        session.last_access = time.monotonic()
+        return session
+
+    async def evict_idle_sessions(self):
+        """Периодически удаляет сессии, к которым давно не обращались"""
+        while True:
+            await asyncio.sleep(max(1.0, self.session_ttl / 10))
+            deadline = time.monotonic() - self.session_ttl
+            for session_id in [s.id for s in self.sessions.values() if s.last_access < deadline]:
+                self.sessions.pop(session_id, None)
+
+    async def execute(self, session: GameSession, commands: list, since=None) -> dict:
+        if not isinstance(commands, list):
+            raise ApiError(400, "commands должен быть списком")
+        async with session.lock:
+            return session.run_batch(commands, since)
+
+    # ---------- HTTP ----------
+
+    async def dispatch(self, method: str, path: str, query: dict, body: bytes):
+        """Возвращает (статус, тело ответа)"""
+        parts = [p for p in path.split("/") if p]
+        binary = query.get("format") == "bin"
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise ApiError(400, "тело запроса должно быть JSON")
+            if not isinstance(payload, dict):
+                raise ApiError(400, "тело запроса должно быть JSON-объектом")
+
+        if parts == ["stats"] and method == "GET":
+            return 200, self.stats()
+        if parts == ["sessions"] and method == "POST":
+            session = self.create_session()
+            return 201, (session.state_binary() if binary else session.state())
+        if len(parts) < 2 or parts[0] != "sessions":
+            raise ApiError(404, "нет такого ресурса")
+
+        session = self.get_session(parts[1])
+        if len(parts) == 2:
+            if method == "GET":
+                return 200, (session.state_binary() if binary else session.state())
+            if method == "DELETE":
+                self.sessions.pop(session.id, None)
+                return 200, {"id": session.id, "deleted": True}
+            raise ApiError(405, "метод не поддерживается")
+
+        if len(parts) != 3 or method != "POST":
+            raise ApiError(405, "метод не поддерживается")
+        name = parts[2]
+        since = payload.get("since")
+        if name == "batch":
+            commands = payload.get("commands", [])
+        elif name in ACTION_COMMANDS or name in SESSION_COMMANDS:
+            commands = [{"cmd": name, "dir": payload.get("dir", query.get("dir")),
+                         "level": payload.get("level", query.get("level"))}]
+        else:
+            raise ApiError(404, f"неизвестная команда: {name}")
+
+        delta = await self.execute(session, commands, since)
+        return 200, (session.state_binary(delta) if binary else delta)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "requests": self.requests,
+            "uptime": round(time.monotonic() - self.started, 1),
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers = await read_headers(reader)
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # Тело без верной длины не прочитать — отвечаем и закрываем соединение
+                    writer.write(http_response(400, {"error": "неверный заголовок Content-Length"}, False))
+                    await writer.drain()
+                    break
+                if length > MAX_BODY:
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self.requests += 1
+
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(url.path, headers, reader, writer)
+                    break
+
+                try:
+                    status, response = await self.dispatch(method, url.path, query, body)
+                except ApiError as error:
+                    status, response = error.status, {"error": error.message}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(http_response(status, response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_websocket(self, path, headers, reader, writer):
+        parts = [p for p in path.split("/") if p]
+        key = headers.get("sec-websocket-key")
+        if len(parts) != 3 or parts[0] != "sessions" or parts[2] != "ws" or not key:
+            writer.write(http_response(400, {"error": "неверный запрос WebSocket"}, False))
+            await writer.drain()
+            return
+        try:
+            session = self.get_session(parts[1])
+        except ApiError as error:
+            writer.write(http_response(error.status, {"error": error.message}, False))
+            await writer.drain()
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        while True:
+            opcode, data = await read_ws_frame(reader)
+            if opcode == 0x8:
+                write_ws_frame(writer, 0x8, data[:2])
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                write_ws_frame(writer, 0xA, data)
+                await writer.drain()
+                continue
+            if opcode not in (0x1, 0x2):
+                continue
+
+            self.requests += 1
+            try:
+                message = json.loads(data)
+                if not isinstance(message, dict):
+                    raise ApiError(400, "сообщение должно быть JSON-объектом")
+                delta = await self.execute(session, message.get("commands", []), message.get("since"))
+            except ValueError:
+                write_ws_frame(writer, 0x1, json.dumps({"error": "сообщение должно быть JSON"}).encode())
+            except ApiError as error:
+                write_ws_frame(writer, 0x1, json.dumps({"error": error.message}).encode())
+            else:
+                if message.get("format") == "bin":
+                    write_ws_frame(writer, 0x2, session.state_binary(delta))
+                else:
+                    write_ws_frame(writer, 0x1, json.dumps(delta, separators=(",", ":")).encode())
+            await writer.drain()
+
+
+# ==================== ПРОТОКОЛ ====================
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+async def read_headers(reader: asyncio.StreamReader) -> dict:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+def http_response(status: int, payload, keep_alive: bool) -> bytes:
+    if isinstance(payload, bytes):
+        body, content_type = payload, "application/octet-stream"
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        content_type = "application/json; charset=utf-8"
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+def apply_ws_mask(data: bytes, mask: bytes) -> bytes:
+    if not data:
+        return data
+    key = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(len(data), "big")
+
+
+async def read_ws_frame(reader: asyncio.StreamReader):
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ConnectionError("слишком большой кадр WebSocket")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    data = await reader.readexactly(length)
+    return opcode, apply_ws_mask(data, mask) if mask else data
+
+
+def write_ws_frame(writer: asyncio.StreamWriter, opcode: int, data: bytes, masked: bool = False):
+    length = len(data)
+    mask_bit = 0x80 if masked else 0
+    if length < 126:
+        header = bytes((0x80 | opcode, mask_bit | length))
+    elif length < 1 << 16:
+        header = bytes((0x80 | opcode, mask_bit | 126)) + struct.pack(">H", length)
+    else:
+        header = bytes((0x80 | opcode, mask_bit | 127)) + struct.pack(">Q", length)
+    if masked:
+        mask = os.urandom(4)
+        header += mask
+        data = apply_ws_mask(data, mask)
+    writer.write(header + data)
+
+
+async def serve(host: str, port: int, max_sessions: int, session_ttl: float):
+    game = GameServer(max_sessions, session_ttl)
+    server = await asyncio.start_server(game.handle_connection, host, port, backlog=4096)
+    eviction = asyncio.create_task(game.evict_idle_sessions())
+    print(f"Сервер игры слушает http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        eviction.cancel()
+
+
+# ==================== НАГРУЗОЧНЫЙ КЛИЕНТ ====================
+
+class HttpClient:
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    async def request(self, method: str, path: str, payload: dict = None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode()
+                          + body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("сервер закрыл соединение")
+        status = int(status_line.split()[1])
+        headers = await read_headers(self.reader)
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        return status, json.loads(data)
+
+
+def random_commands(rng: random.Random, count: int) -> list:
+    commands = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            commands.append({"cmd": "move", "dir": rng.choice(tuple(MOVES))})
+        elif roll < 0.85:
+            commands.append({"cmd": "extinguish"})
+        elif roll < 0.98:
+            commands.append({"cmd": "post"})
+        else:
+            commands.append({"cmd": rng.choice(SESSION_COMMANDS)})
+    return commands
+
+
+async def bench_client(host, port, args, rng, latencies, errors, start_event):
+    reader, writer = await asyncio.open_connection(host, port)
+    client = HttpClient(reader, writer, f"{host}:{port}")
+    try:
+        await start_event.wait()
+        started = time.perf_counter()
+        status, state = await client.request("POST", "/sessions")
+        latencies.append(time.perf_counter() - started)
+        if status != 201:
+            errors.append(status)
+            return
+        path = f"/sessions/{state['id']}"
+        version = state["v"]
+
+        if args.ws:
+            key = base64.b64encode(os.urandom(16)).decode()
+            writer.write((f"GET {path}/ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                          f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                          "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+            await writer.drain()
+            await reader.readline()
+            await read_headers(reader)
+
+        for _ in range(args.actions):
+            commands = random_commands(rng, args.batch)
+            started = time.perf_counter()
+            if args.ws:
+                message = json.dumps({"commands": commands, "since": version}).encode()
+                write_ws_frame(writer, 0x1, message, masked=True)
+                await writer.drain()
+                _, data = await read_ws_frame(reader)
+                status, delta = 200, json.loads(data)
+            elif args.batch == 1:
+                command = commands[0]
+                status, delta = await client.request("POST", f"{path}/{command['cmd']}",
+                                                     {"dir": command.get("dir"), "since": version})
+            else:
+                status, delta = await client.request("POST", f"{path}/batch",
+                                                     {"commands": commands, "since": version})
+            latencies.append(time.perf_counter() - started)
+            if status != 200 or "error" in delta:
+                errors.append(status)
+                continue
+            version = delta["v"]
+
+        if not args.ws:
+            await client.request("DELETE", path)
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as error:
+        errors.append(type(error).__name__)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def wait_for_server(host: str, port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def bench(args):
+    raise_fd_limit()
+    process = None
+    if args.spawn:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve",
+                                    "--host", args.host, "--port", str(args.port)],
+                                   stdout=subprocess.DEVNULL)
+    try:
+        await wait_for_server(args.host, args.port)
+        rng = random.Random(args.seed)
+        latencies, errors = [], []
+        start_event = asyncio.Event()
+        clients = []
+        for _ in range(args.sessions):
+            clients.append(asyncio.create_task(bench_client(args.host, args.port, args,
+                                                            random.Random(rng.random()),
+                                                            latencies, errors, start_event)))
+            # Открываем соединения порциями, чтобы не переполнить очередь accept
+            if len(clients) % 256 == 0:
+                await asyncio.sleep(0)
+
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        start_event.set()
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - started
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    mode = "WebSocket" if args.ws else "HTTP"
+    print(f"Сессий: {args.sessions}, запросов: {len(latencies)} ({mode}, команд в пакете: {args.batch})")
+    print(f"Время: {elapsed:.2f} с, запросов/с: {len(latencies) / elapsed:.0f}, "
+          f"команд/с: {len(latencies) * args.batch / elapsed:.0f}")
+    print("Задержка, мс: " + ", ".join(
+        f"p{int(q * 100)}={percentile(latencies, q) * 1000:.2f}" for q in (0.5, 0.9, 0.99))
+          + f", max={latencies[-1] * 1000 if latencies else 0:.2f}")
+    if errors:
+        print(f"Ошибок: {len(errors)}")
+
+
+def raise_fd_limit():
+    """Поднимает лимит открытых файлов до максимума (для тысяч соединений)"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер игры Робот-Пожарный")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="запустить сервер")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--max-sessions", type=int, default=100000)
+    serve_parser.add_argument("--ttl", type=float, default=1800.0, help="время жизни неактивной сессии, с")
+
+    bench_parser = subparsers.add_parser("bench", help="нагрузочный тест")
+    bench_parser.add_argument("--host", default="127.0.0.1")
+    bench_parser.add_argument("--port", type=int, default=8765)
+    bench_parser.add_argument("--spawn", action="store_true", help="запустить сервер в отдельном процессе")
+    bench_parser.add_argument("--sessions", type=int, default=1000, help="число одновременных сессий")
+    bench_parser.add_argument("--actions", type=int, default=20, help="запросов на сессию")
+    bench_parser.add_argument("--batch", type=int, default=1, help="команд в одном запросе")
+    bench_parser.add_argument("--ws", action="store_true", help="использовать WebSocket вместо HTTP")
+    bench_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.mode == "serve":
+        raise_fd_limit()
+        asyncio.run(serve(args.host, args.port, args.max_sessions, args.ttl))
+    else:
+        asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
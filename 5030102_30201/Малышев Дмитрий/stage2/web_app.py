@@ -1,293 +1,190 @@
 import streamlit as st
-import random
-import time
-
-
-# ==================== КЛАССЫ ====================
-
-class Maze:
-    def __init__(self):
-        self.width = 5
-        self.height = 5
-        self.grid = []
-        self.robot_x = 0
-        self.robot_y = 0
-        self.history = []
-        self.mission_completed = False
-        self.finish_x = None
-        self.finish_y = None
-        self.init_default_map()
-
-    def init_default_map(self):
-        """Создает карту по умолчанию"""
-        self.grid = []
-        for y in range(5):
-            row = []
-            for x in range(5):
-                row.append("road")  # Дорога
-            self.grid.append(row)
-
-        self.grid[4][4] = "finish"  # Финиш (4,4)
-        self.grid[4][3] = "barrier"  # Барьер (3,4)
-        self.grid[4][2] = "post"  # Пост (2,4)
-        self.grid[4][1] = "fire"  # Пожар (1,4)
-
-        self.grid[3][3] = "fire"  # Пожар (3,3)
-        self.grid[3][1] = "filled"  # Залитое (1,3)
-
-        self.grid[2][3] = "post"  # Пост (3,2)
-        self.grid[2][1] = "fire"  # Пожар (1,2)
-        self.grid[2][0] = "barrier"  # Барьер (0,2)
-
-        self.grid[1][2] = "filled"  # Залитое (2,1)
-
-        self.grid[0][4] = "post"  # Пост (4,0)
-        self.grid[0][3] = "barrier"  # Барьер (3,0)
-
-        self.robot_x = 0
-        self.robot_y = 0
-        self.mission_completed = False
-
-        self.find_finish_position()
-
-    def init_random_map(self):
-        """Создает случайную карту"""
-        self.grid = []
-        for y in range(5):
-            row = []
-            for x in range(5):
-                row.append("road")  # Дорога
-            self.grid.append(row)
-
-        cell_types = ["fire", "fire", "fire", "filled", "filled",
-                      "barrier", "barrier", "post", "post", "finish"]
-        random.shuffle(cell_types)
-
-        positions = []
-        for y in range(5):
-            for x in range(5):
-                if not (x == 0 and y == 0):
-                    positions.append((x, y))
-
-        random.shuffle(positions)
-
-        for i, (x, y) in enumerate(positions):
-            if i < len(cell_types):
-                self.grid[y][x] = cell_types[i]
-
-        self.robot_x = 0
-        self.robot_y = 0
-        self.mission_completed = False
-
-        self.find_finish_position()
-
-    def find_finish_position(self):
-        """Находит координаты клетки финиша"""
-        self.finish_x = None
-        self.finish_y = None
-        for y in range(5):
-            for x in range(5):
-                if self.grid[y][x] == "finish":
-                    self.finish_x = x
-                    self.finish_y = y
-                    return
-
-    def get_cell_color(self, cell_type):
-        """Возвращает цвет клетки"""
-        colors = {
-            "road": "#FFFFFF",  # Белый
-            "fire": "#FF0000",  # Красный
-            "filled": "#FFA500",  # Оранжевый
-            "finish": "#00FF00",  # Зеленый
-            "post": "#800080",  # Фиолетовый
-            "barrier": "#000000",  # Черный
-        }
-        return colors.get(cell_type, "#808080")  # Серый по умолчанию
-
-    def get_cell_text(self, cell_type):
-        """Возвращает текст для клетки (без робота)"""
-        texts = {
-            "road": "",
-            "fire": "🔥",
-            "filled": "💧",
-            "finish": "🏁",
-            "post": "📯",
-            "barrier": "⬛",
-        }
-        return texts.get(cell_type, "?")
-
-    def get_cell_name(self, cell_type):
-        """Возвращает название типа клетки"""
-        names = {
-            "road": "Дорога",
-            "fire": "Пожар",
-            "filled": "Залитое",
-            "finish": "Финиш",
-            "post": "Пост",
-            "barrier": "Барьер",
-        }
-        return names.get(cell_type, "Неизвестно")
-
-    def can_move_to(self, x, y):
-        """Проверяет, может ли робот переместиться в клетку"""
-        if x < 0 or x >= 5 or y < 0 or y >= 5:
-            return False
-        if self.grid[y][x] == "barrier":
-            return False
-        return True
-
-    def move_robot(self, dx, dy, direction_name):
-        """Перемещает робота"""
-        new_x = self.robot_x + dx
-        new_y = self.robot_y + dy
-
-        if self.can_move_to(new_x, new_y):
-            old_x, old_y = self.robot_x, self.robot_y
-            self.robot_x = new_x
-            self.robot_y = new_y
-
-            self.mission_completed = False
-
-            timestamp = time.strftime("%H:%M:%S")
-            cell_name = self.get_cell_name(self.grid[new_y][new_x])
-            self.history.append(
-                f"[{timestamp}] {direction_name}: ({old_x},{old_y}) → ({new_x},{new_y}) [{cell_name}]")
-            return True
-        else:
-            timestamp = time.strftime("%H:%M:%S")
-            self.history.append(f"[{timestamp}] Не могу двигаться {direction_name}!")
-            return False
-
-    def extinguish_fire(self):
-        """Тушит пожар на текущей клетке (Пожар -> Залитое)"""
-        current_cell = self.grid[self.robot_y][self.robot_x]
-        timestamp = time.strftime("%H:%M:%S")
-
-        if current_cell == "fire":
-            self.grid[self.robot_y][self.robot_x] = "filled"
+import os
+import re
+import sys
+import tempfile
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import catalog, history, savefile
+from maze_core.distance import FIELD_SOURCES
+from maze_core.plan_cache import PlanCache
+from web_maze import Maze
+
+# Контрольные точки веб-сессий: <каталог>/<id игры>.rfs, id хранится в адресе страницы (?game=...)
+AUTOSAVE_DIR = os.path.join(tempfile.gettempdir(), "robot_fireman_autosave")
+
+# Сколько клеток по стороне показывает основной вид (большие карты листаются)
+VIEW_CELLS = 15
+# Сколько кнопок переноса вида по стороне под мини-картой
+MINIMAP_REGIONS = 5
+
+# Сложность случайной карты: подпись -> уровень каталога миссий (None — любой)
+DIFFICULTY_CHOICES = {"Любая сложность": None, **{name: level for level, name in catalog.LEVEL_NAMES.items()}}
+
+# Подписи действий плана (индексы — как у maze_core.solver)
+PLAN_ACTION_LABELS = ("↑ Вперед", "↓ Назад", "← Влево", "→ Вправо", "🚒 Потушить", "📯 Пост")
+# Сколько действий плана показывать целиком
+PLAN_PREVIEW = 40
+
+# Сколько событий истории показывать на странице
+HISTORY_PAGE_SIZE = 10
+# Фильтр вида событий: подпись -> вид (None — все)
+HISTORY_KIND_FILTERS = {"Все события": None, **{name: kind for kind, name in history.KIND_NAMES.items()}}
+
+
+def get_view(maze):
+    """Видимая часть карты (x0, y0, ширина, высота).
+
+    Вид следует за роботом, когда тот уходит за край; кнопки под мини-картой
+    задают центр в view_centre сессии (см. minimap_buttons).
+    """
+    view_width, view_height = min(maze.width, VIEW_CELLS), min(maze.height, VIEW_CELLS)
+    robot = (maze.robot_x, maze.robot_y)
+    centre = st.session_state.get("view_centre", robot)
+
+    def origin(centre):
+        return (max(0, min(centre[0] - view_width // 2, maze.width - view_width)),
+                max(0, min(centre[1] - view_height // 2, maze.height - view_height)))
+
+    if st.session_state.get("view_robot") != robot:
+        st.session_state.view_robot = robot
+        x0, y0 = origin(centre)
+        if not (x0 <= robot[0] < x0 + view_width and y0 <= robot[1] < y0 + view_height):
+            centre = robot
+    st.session_state.view_centre = centre
+    return origin(centre) + (view_width, view_height)
+
+
+def minimap_buttons(maze):
+    """Сетка кнопок под мини-картой: щелчок переносит центр вида в свою часть карты без перезагрузки страницы"""
+    regions_x, regions_y = min(maze.width, MINIMAP_REGIONS), min(maze.height, MINIMAP_REGIONS)
+    # Строки сверху вниз, как на мини-карте: сверху — наибольший y
+    for ry in reversed(range(regions_y)):
+        bottom, top = maze.height * ry // regions_y, maze.height * (ry + 1) // regions_y
+        for rx, column in enumerate(st.columns(regions_x)):
+            left, right = maze.width * rx // regions_x, maze.width * (rx + 1) // regions_x
+            centre = ((left + right) // 2, (bottom + top) // 2)
+            if column.button(f"{centre[0]},{centre[1]}", key=f"minimap_{rx}_{ry}",
+                             help=f"Показать ({centre[0]},{centre[1]})", use_container_width=True):
+                st.session_state.view_centre = centre
+                # Вид остаётся здесь, пока робот не сделает ход за его край
+                st.session_state.view_robot = (maze.robot_x, maze.robot_y)
+                st.rerun()
 
-            self.mission_completed = False
 
-            self.history.append(f"[{timestamp}] Потушен пожар в ({self.robot_x},{self.robot_y})")
-            return True
+@st.cache_resource
+def get_autosaver():
+    """Один фоновый поток автосохранения на процесс сервера"""
+    return savefile.Autosaver()
+
+
+@st.cache_resource
+def get_plan_cache():
+    """Кэш планов, общий для всех сессий процесса: одинаковые состояния решаются один раз"""
+    return PlanCache()
+
+
+def show_plan_controls(maze, mission_complete):
+    """Подсказка (следующее действие) и полный план; оба берутся из общего кэша планов"""
+    cache = get_plan_cache()
+    col_hint, col_solve = st.columns(2)
+    with col_hint:
+        hint = st.button("💡 Подсказка", key="hint", disabled=mission_complete)
+    with col_solve:
+        solve = st.button("🧭 Решить", key="solve", disabled=mission_complete)
+    if hint or solve:
+        plan = maze.solve(cache)
+        if plan is None:
+            st.warning("Плана нет: миссия невыполнима из этой позиции.")
+        elif hint:
+            st.info(f"Следующее действие: {PLAN_ACTION_LABELS[plan[0]]} (до конца — {len(plan)})")
         else:
-            self.history.append(f"[{timestamp}] Здесь нет пожара для тушения")
-            return False
-
-    def place_post(self):
-        """Ставит пост на текущей клетке (Залитое -> Пост)"""
-        current_cell = self.grid[self.robot_y][self.robot_x]
-        timestamp = time.strftime("%H:%M:%S")
-
-        if current_cell == "filled":
-            self.grid[self.robot_y][self.robot_x] = "post"
-
-            self.mission_completed = False
+            steps = " ".join(PLAN_ACTION_LABELS[action].split()[0] for action in plan[:PLAN_PREVIEW])
+            more = f" … ещё {len(plan) - PLAN_PREVIEW}" if len(plan) > PLAN_PREVIEW else ""
+            st.info(f"План из {len(plan)} действий: {steps}{more}")
+
+    stats = cache.stats()
+    st.caption(f"Кэш планов: {stats.entries} записей, {stats.size / 1024:.0f} КБ из {stats.max_bytes >> 20} МБ, "
+               f"попаданий {stats.hit_rate:.0%} ({stats.hits + stats.waits} из {stats.requests})")
+
+
+def get_game_id():
+    """Идентификатор игры из адреса страницы; по нему восстанавливается автосохранение"""
+    game_id = st.query_params.get("game", "")
+    if not re.fullmatch(r"[0-9a-f]{32}", game_id):
+        game_id = uuid.uuid4().hex
+        st.query_params["game"] = game_id
+    return game_id
+
+
+def restore_autosave(game_id):
+    path = os.path.join(AUTOSAVE_DIR, f"{game_id}.rfs")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as file:
+            return Maze.from_bytes(file.read())
+    except (OSError, ValueError):
+        return None
+
+
+def autosave(game_id, maze):
+    """Отдает снимок игры фоновому потоку, если с прошлого раза что-то изменилось"""
+    token = (id(maze), len(maze.history), maze.robot_x, maze.robot_y, maze.width, maze.height)
+    if st.session_state.get("autosave_token") == token:
+        return
+    st.session_state.autosave_token = token
+    get_autosaver().submit(os.path.join(AUTOSAVE_DIR, f"{game_id}.rfs"), **maze.snapshot())
+
+
+def show_history(maze):
+    """Раздел истории: фильтры по виду, клетке и времени и листание страницами"""
+    kind_col, cell_col, time_col = st.columns(3)
+    with kind_col:
+        kind_name = st.selectbox("Вид событий", list(HISTORY_KIND_FILTERS), key="history_kind")
+    with cell_col:
+        cell_text = st.text_input("Клетка x,y", key="history_cell")
+    with time_col:
+        time_text = st.text_input("Время ЧЧ:ММ-ЧЧ:ММ", key="history_time")
+
+    try:
+        cell = history.parse_cell(cell_text)
+        last = maze.history.last(1)
+        since, until = history.parse_time_range(time_text, last[0].time if last and last[0].time else None)
+    except ValueError as error:
+        st.warning(f"Фильтр не применён: {error}")
+        cell = since = until = None
+    view = maze.history.select(kind=HISTORY_KIND_FILTERS[kind_name], cell=cell, since=since, until=until)
+
+    # Страница отсчитывается от последней, чтобы по умолчанию были видны новые события
+    filters = (kind_name, cell_text, time_text)
+    if st.session_state.get("history_filters") != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_back = 0
+    pages = view.page_count(HISTORY_PAGE_SIZE)
+    back = min(st.session_state.get("history_back", 0), pages - 1)
+
+    older_col, info_col, newer_col = st.columns([1, 2, 1])
+    with older_col:
+        if st.button("◀ Раньше", key="history_older", disabled=back >= pages - 1, use_container_width=True):
+            back += 1
+    with newer_col:
+        if st.button("Позже ▶", key="history_newer", disabled=back == 0, use_container_width=True):
+            back -= 1
+    st.session_state.history_back = back
+    with info_col:
+        st.caption(f"Страница {pages - back} из {pages}, событий: {len(view)}")
+
+    events = view.page(pages - 1 - back, HISTORY_PAGE_SIZE)
+    if events:
+        for event in events:
+            st.text(event.format())
+    elif len(maze.history):
+        st.text("Нет событий, подходящих под фильтр")
+    else:
+        st.text("Действий еще нет")
 
-            self.history.append(f"[{timestamp}] Поставлен пост в ({self.robot_x},{self.robot_y})")
-            return True
-        else:
-            self.history.append(f"[{timestamp}] Здесь нельзя поставить пост (нужна залитая клетка)")
-            return False
-
-    def check_mission_complete(self):
-        """Проверяет, выполнена ли миссия"""
-        if self.mission_completed:
-            return True
-
-        if self.grid[self.robot_y][self.robot_x] != "finish":
-            return False
-
-        for y in range(5):
-            for x in range(5):
-                cell = self.grid[y][x]
-                if cell in ["fire", "filled"]:
-                    return False
-
-        self.mission_completed = True
-        return True
-
-    def display_maze_css(self):
-        """Создает CSS Grid для лабиринта"""
-        css = """
-        <style>
-        .maze-container {
-            display: grid;
-            grid-template-columns: repeat(5, 80px);
-            grid-template-rows: repeat(5, 80px);
-            gap: 5px;
-            margin: 20px auto;
-            width: fit-content;
-            background-color: #f0f0f0;
-            padding: 15px;
-            border-radius: 10px;
-            border: 3px solid #333;
-        }
-        .maze-cell {
-            width: 80px;
-            height: 80px;
-            border: 2px solid #666;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 40px;
-            font-weight: bold;
-            border-radius: 5px;
-            position: relative;
-        }
-        .cell-coords {
-            position: absolute;
-            bottom: 2px;
-            right: 2px;
-            font-size: 10px;
-            color: #666;
-        }
-        .robot-overlay {
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 45px;
-            z-index: 2;
-        }
-        .finish-cell {
-            outline: 3px solid #00FF00;
-            outline-offset: -3px;
-        }
-        </style>
-        """
-
-        html = css + '<div class="maze-container">'
-
-        for y in range(4, -1, -1):
-            for x in range(5):
-                cell_type = self.grid[y][x]
-                has_robot = (x == self.robot_x and y == self.robot_y)
-                is_finish = (cell_type == "finish")
-                color = self.get_cell_color(cell_type)
-                text = self.get_cell_text(cell_type)
-
-                text_color = "#000000"
-                if color in ["#000000", "#800080", "#FF0000"]:
-                    text_color = "#FFFFFF"
-
-                cell_class = "maze-cell"
-                if is_finish:
-                    cell_class += " finish-cell"
-
-                html += f'<div class="{cell_class}" style="background-color:{color};color:{text_color}" title="{self.get_cell_name(cell_type)} ({x},{y})">{text}<div class="cell-coords">({x},{y})</div>'
-
-                if has_robot:
-                    html += f'<div class="robot-overlay">🤖</div>'
-
-                html += '</div>'
-
-        html += '</div>'
-        return html
 
 def main():
     st.set_page_config(
@@ -296,22 +193,33 @@ def main():
         layout="wide"
     )
 
-    st.title("🤖 Робот-Пожарный Лабиринт 5x5")
-
+    game_id = get_game_id()
     if 'maze' not in st.session_state:
-        st.session_state.maze = Maze()
+        st.session_state.maze = restore_autosave(game_id) or Maze()
+
+    st.title(f"🤖 Робот-Пожарный Лабиринт {st.session_state.maze.width}x{st.session_state.maze.height}")
 
     col1, col2 = st.columns([2, 1])
 
     with col1:
         st.subheader("Карта лабиринта")
 
+        heatmap_labels = {"off": "Нет", "finish": "До финиша", "pending": "До пожаров"}
+        heatmap = st.radio("Тепловая карта расстояний", list(heatmap_labels), format_func=heatmap_labels.get,
+                           horizontal=True, key="heatmap")
+
+        view = get_view(st.session_state.maze)
         try:
-            maze_html = st.session_state.maze.display_maze_css()
+            maze_html = st.session_state.maze.display_maze_css(heatmap, view)
             st.markdown(maze_html, unsafe_allow_html=True)
         except:
             st.warning("Графическое отображение не поддерживается.")
 
+        st.caption("Мини-карта — кнопки под ней переносят вид в эту часть карты")
+        st.markdown(st.session_state.maze.minimap_html(view), unsafe_allow_html=True)
+        if view[2:] != (st.session_state.maze.width, st.session_state.maze.height):
+            minimap_buttons(st.session_state.maze)
+
         st.markdown("""
         **Легенда:**
         - 🤖 - Робот (отображается поверх клетки)
@@ -338,17 +246,28 @@ def main():
             st.success("🎉 Миссия выполнена! Все пожары потушены и робот на финише!")
             st.balloons()
 
+        impossible_reason = st.session_state.maze.mission_impossible_reason()
+        if impossible_reason:
+            st.error(f"⛔ Миссия невыполнима: {impossible_reason}. Недостижимые клетки обведены пунктиром.")
+
         st.markdown("**Информация:**")
         col_info1, col_info2 = st.columns(2)
         with col_info1:
             st.metric("Позиция робота", f"({st.session_state.maze.robot_x},{st.session_state.maze.robot_y})")
         with col_info2:
-            cell_type = st.session_state.maze.grid[st.session_state.maze.robot_y][st.session_state.maze.robot_x]
+            cell_type = st.session_state.maze.cell(st.session_state.maze.robot_x, st.session_state.maze.robot_y)
             st.metric("Тип клетки", st.session_state.maze.get_cell_name(cell_type))
 
         if finish_info:
             st.info(f"🏁 Финиш находится на позиции: {finish_info}")
 
+        if heatmap in FIELD_SOURCES:
+            hints = []
+            for target, (_, caption) in FIELD_SOURCES.items():
+                distance = st.session_state.maze.distance_to(target)
+                hints.append(f"{caption.capitalize()}: {'недостижимо' if distance is None else distance}")
+            st.caption(" · ".join(hints))
+
         st.markdown("---")
 
         st.markdown("**Движение:**")
@@ -390,33 +309,31 @@ def main():
 
         st.markdown("---")
 
+        st.markdown("**Подсказки:**")
+        show_plan_controls(st.session_state.maze, mission_complete)
+
+        st.markdown("---")
+
         st.markdown("**Управление игрой:**")
         if st.button("✅ Проверить миссию", key="check"):
             if st.session_state.maze.check_mission_complete():
                 st.rerun()
             else:
-                current_cell = st.session_state.maze.grid[st.session_state.maze.robot_y][st.session_state.maze.robot_x]
+                current_cell = st.session_state.maze.cell(st.session_state.maze.robot_x, st.session_state.maze.robot_y)
                 on_finish = (current_cell == "finish")
 
-                if not on_finish:
+                if impossible_reason:
+                    st.warning(f"Миссия не может быть выполнена: {impossible_reason}.")
+                elif not on_finish:
                     st.warning(
                         f"Миссия не выполнена! Робот не на финише. Текущая позиция: ({st.session_state.maze.robot_x},{st.session_state.maze.robot_y})")
                 else:
-                    has_fire_or_filled = False
-                    for y in range(5):
-                        for x in range(5):
-                            cell = st.session_state.maze.grid[y][x]
-                            if cell in ["fire", "filled"]:
-                                has_fire_or_filled = True
-                                break
-                        if has_fire_or_filled:
-                            break
-
-                    if has_fire_or_filled:
+                    if st.session_state.maze.has_unprocessed_cells():
                         st.warning("Миссия не выполнена! Есть непотушенные пожары или незалитые клетки.")
                     else:
                         st.warning("Миссия не выполнена! Проверьте условия.")
 
+        difficulty = st.selectbox("Сложность случайной карты", list(DIFFICULTY_CHOICES), key="difficulty")
         col_game1, col_game2 = st.columns(2)
         with col_game1:
             if st.button("🔄 Сброс", key="reset"):
@@ -425,17 +342,55 @@ def main():
         with col_game2:
             if st.button("🎲 Случайный", key="random"):
                 st.session_state.maze = Maze()
-                st.session_state.maze.init_random_map()
+                st.session_state.maze.init_random_map(DIFFICULTY_CHOICES[difficulty])
                 st.rerun()
 
+        with st.expander("🗺️ Генератор карты"):
+            gen_col1, gen_col2 = st.columns(2)
+            with gen_col1:
+                gen_width = st.number_input("Ширина", min_value=2, max_value=30, value=10, key="gen_width")
+                gen_fire = st.slider("Пожары", 0.0, 0.3, 0.06, 0.01, key="gen_fire")
+                gen_barrier = st.slider("Барьеры", 0.0, 0.5, 0.12, 0.01, key="gen_barrier")
+            with gen_col2:
+                gen_height = st.number_input("Высота", min_value=2, max_value=30, value=10, key="gen_height")
+                gen_filled = st.slider("Залитые", 0.0, 0.3, 0.03, 0.01, key="gen_filled")
+                gen_post = st.slider("Посты", 0.0, 0.3, 0.03, 0.01, key="gen_post")
+            gen_structure = st.selectbox("Структура", ["нет", "коридоры", "комнаты"], key="gen_structure")
+            gen_seed = st.number_input("Seed (0 — случайный)", min_value=0, value=0, key="gen_seed")
+            if st.button("Сгенерировать", key="generate"):
+                structures = {"нет": None, "коридоры": "corridors", "комнаты": "rooms"}
+                try:
+                    maze = Maze()
+                    maze.init_generated_map(int(gen_width), int(gen_height), seed=int(gen_seed) or None,
+                                            fire=gen_fire, filled=gen_filled, barrier=gen_barrier,
+                                            post=gen_post, water=0.0, structure=structures[gen_structure],
+                                            room_size=4)
+                except ValueError as error:
+                    st.error(f"Не удалось создать карту: {error}")
+                else:
+                    st.session_state.maze = maze
+                    st.rerun()
+
+        with st.expander("💾 Сохранение"):
+            st.download_button("Скачать сохранение", data=st.session_state.maze.to_bytes(),
+                               file_name="robot_fireman.rfs", mime="application/octet-stream",
+                               key="download")
+            uploaded = st.file_uploader("Загрузить сохранение", type=["rfs"], key="upload")
+            if uploaded is not None and st.session_state.get("loaded_upload") != uploaded.file_id:
+                st.session_state.loaded_upload = uploaded.file_id
+                try:
+                    st.session_state.maze = Maze.from_bytes(uploaded.getvalue())
+                except ValueError as error:
+                    st.error(f"Не удалось загрузить сохранение: {error}")
+                else:
+                    st.rerun()
+
     st.markdown("---")
     st.subheader("История действий")
 
-    if st.session_state.maze.history:
-        for action in st.session_state.maze.history[-10:]:
-            st.text(action)
-    else:
-        st.text("Действий еще нет")
+    show_history(st.session_state.maze)
+
+    autosave(game_id, st.session_state.maze)
 
 
 if __name__ == "__main__":
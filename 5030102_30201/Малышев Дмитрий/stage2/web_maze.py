@@ -0,0 +1,378 @@
+"""Игра веб-версии (Maze) без streamlit: её используют web_app.py, сервер game_server.py и engine_check.py.
+
+Карта, робот и правила — в maze_core.engine.MissionEngine (общем с настольным
+приложением); здесь — журнал, сообщения и HTML карты и мини-карты.
+"""
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_core import catalog, cells, history, savefile
+from maze_core.distance import FIELD_SOURCES, DistanceField, heat_color
+from maze_core.engine import (DEFAULT_MISSION_SIZE, MOVED, MOVES, PROCESS_FILLED, PROCESS_FIRE, PROCESSED,
+                              MissionEngine, default_mission)
+from maze_core.generator import MapGenerator
+from maze_core.history import HistoryStore
+from maze_core.minimap import Minimap
+from maze_core.reachability import Reachability
+
+# Ширина мини-карты на странице
+MINIMAP_PIXELS = 200
+
+# Действие движка по смещению робота
+MOVE_ACTIONS = {move: action for action, move in enumerate(MOVES)}
+
+
+class Maze:
+    """Игра веб-сессии: карта, робот и правила — в maze_core.engine.MissionEngine
+    (общем с настольным приложением), здесь — журнал, сообщения и отрисовка"""
+
+    def __init__(self):
+        self.engine = MissionEngine()
+        self.history = HistoryStore()
+        self.finish_x = None
+        self.finish_y = None
+        self.init_default_map()
+
+    @property
+    def width(self):
+        return self.engine.width
+
+    @property
+    def height(self):
+        return self.engine.height
+
+    @property
+    def robot_x(self):
+        return self.engine.position % self.engine.width
+
+    @property
+    def robot_y(self):
+        return self.engine.position // self.engine.width
+
+    @property
+    def mission_completed(self):
+        return self.engine.completed
+
+    @mission_completed.setter
+    def mission_completed(self, completed):
+        self.engine.completed = completed
+
+    def init_default_map(self):
+        """Создает карту по умолчанию"""
+        self.load_grid(DEFAULT_MISSION_SIZE, DEFAULT_MISSION_SIZE, default_mission())
+
+    def init_random_map(self, level=None):
+        """Создает случайную карту 5x5: выполнимую миссию уровня level из каталога миссий.
+
+        Возвращает длину кратчайшего решения (без каталога — случайная карта, проверенная решателем)
+        """
+        mission = catalog.random_mission(level)
+        self.load_grid(catalog.SIZE, catalog.SIZE, mission.grid)
+        return mission.length
+
+    def init_generated_map(self, width, height, seed=None, **options):
+        """Создает процедурную карту произвольного размера (параметры — как у MapGenerator)"""
+        self.load_grid(width, height, MapGenerator(width, height, seed=seed, **options).generate())
+
+    def load_grid(self, width, height, grid, robot_x=0, robot_y=0):
+        """Заменяет карту целиком (коды клеток, индекс y * width + x) и ставит робота"""
+        self.engine.load(width, height, bytearray(grid))
+        self.engine.place_robot(robot_x, robot_y)
+        self.find_finish_position()
+
+    def snapshot(self):
+        """Состояние игры в виде аргументов savefile.dumps/Autosaver.submit"""
+        return dict(width=self.width, height=self.height, grid=self.engine.grid,
+                    robot_x=self.robot_x, robot_y=self.robot_y,
+                    mission_completed=self.mission_completed, history=self.history.checkpoint())
+
+    def to_bytes(self):
+        """Сохраняет игру в компактный формат maze_core.savefile"""
+        return savefile.dumps(**self.snapshot())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Восстанавливает игру из сохранения"""
+        saved = savefile.loads(data)
+        maze = cls()
+        maze.load_grid(saved.width, saved.height, saved.grid, saved.robot_x, saved.robot_y)
+        maze.mission_completed = saved.mission_completed
+        maze.history = HistoryStore.from_records(saved.history)
+        return maze
+
+    def cell(self, x, y):
+        """Ключ типа клетки (x, y)"""
+        return cells.KEYS[self.engine.value(x, y) & cells.TYPE_MASK]
+
+    def set_cell(self, x, y, cell_type):
+        """Меняет тип одной клетки (производные структуры обновит движок)"""
+        value = self.engine.value(x, y)
+        self.engine.set_value(x, y, (value & ~cells.TYPE_MASK) | cells.code_of(cell_type))
+
+    def get_codes(self):
+        """Значения клеток одним буфером (индекс y * width + x, бит робота 0x8) для алгоритмов maze_core"""
+        return self.engine.grid
+
+    def _derived_index(self, name, factory):
+        """Производная структура над картой: строится один раз и обновляется через слушателей движка"""
+        return self.engine.derived(name, lambda: factory(self.width, self.height, self.engine.grid))
+
+    def solve(self, cache):
+        """План выполнения миссии от текущей позиции через общий PlanCache (None — миссия невыполнима)"""
+        return cache.plan(self.width, self.height, self.get_codes(), (self.robot_x, self.robot_y))
+
+    def get_reachability(self):
+        """Компоненты связности проходимых клеток"""
+        return self._derived_index("reachability", Reachability)
+
+    def get_distance_field(self, target):
+        """Поле расстояний до целей target ("finish" или "pending")"""
+        sources, _ = FIELD_SOURCES[target]
+        return self._derived_index(f"distance:{target}",
+                                   lambda width, height, codes: DistanceField(width, height, codes, sources))
+
+    def get_minimap(self):
+        """Мини-карта (пересчитываются только плитки с изменёнными клетками)"""
+        return self._derived_index("minimap", Minimap)
+
+    def distance_to(self, target):
+        """Шагов от робота до ближайшей цели target; None — недостижимо"""
+        return self.get_distance_field(target).distance(self.robot_x, self.robot_y)
+
+    def unreachable_cells(self, area=None):
+        """Пожары и залитые клетки, до которых робот не может дойти (area = (x0, y0, x1, y1) — только в ней)"""
+        return self.get_reachability().unreachable_pending(self.robot_x, self.robot_y, area)
+
+    def mission_impossible_reason(self):
+        """Почему миссию уже нельзя выполнить (None, если ещё можно)"""
+        if self.mission_completed:
+            return None
+        return self.get_reachability().impossibility_reason(self.robot_x, self.robot_y)
+
+    def find_finish_position(self):
+        """Находит координаты клетки финиша"""
+        self.finish_x = None
+        self.finish_y = None
+        index = self.engine.grid.translate(cells.IS_FINISH).find(1)
+        if index >= 0:
+            self.finish_x, self.finish_y = index % self.width, index // self.width
+
+    def get_cell_color(self, cell_type):
+        """Возвращает цвет клетки"""
+        return cells.WEB_COLORS[cells.code_of(cell_type)]
+
+    def get_cell_text(self, cell_type):
+        """Возвращает текст для клетки (без робота)"""
+        return cells.EMOJI[cells.code_of(cell_type)]
+
+    def get_cell_name(self, cell_type):
+        """Возвращает название типа клетки"""
+        return cells.NAMES[cells.code_of(cell_type)]
+
+    def can_move_to(self, x, y):
+        """Проверяет, может ли робот переместиться в клетку"""
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+        return bool(cells.PASSABLE[self.engine.value(x, y)])
+
+    def has_unprocessed_cells(self):
+        """Есть ли на карте пожары или залитые клетки (счётчик движка)"""
+        return self.engine.pending > 0
+
+    def move_robot(self, dx, dy, direction_name):
+        """Перемещает робота"""
+        outcome, x, y = self.engine.step(MOVE_ACTIONS[dx, dy])
+        if outcome == MOVED:
+            cell_name = cells.NAMES[self.engine.value(x, y) & cells.TYPE_MASK]
+            self.history.append(f"{direction_name}: ({x - dx},{y - dy}) → ({x},{y}) [{cell_name}]",
+                                history.MOVE, (x, y))
+            return True
+        self.history.append(f"Не могу двигаться {direction_name}!", history.BLOCKED, (x, y))
+        return False
+
+    def extinguish_fire(self):
+        """Тушит пожар на текущей клетке (Пожар -> Залитое)"""
+        outcome, x, y = self.engine.step(PROCESS_FIRE)
+        if outcome == PROCESSED:
+            self.history.append(f"Потушен пожар в ({x},{y})", history.EXTINGUISH, (x, y))
+            return True
+        self.history.append("Здесь нет пожара для тушения", history.MISSED, (x, y))
+        return False
+
+    def place_post(self):
+        """Ставит пост на текущей клетке (Залитое -> Пост)"""
+        outcome, x, y = self.engine.step(PROCESS_FILLED)
+        if outcome == PROCESSED:
+            self.history.append(f"Поставлен пост в ({x},{y})", history.POST, (x, y))
+            return True
+        self.history.append("Здесь нельзя поставить пост (нужна залитая клетка)", history.MISSED, (x, y))
+        return False
+
+    def check_mission_complete(self):
+        """Проверяет, выполнена ли миссия (O(1): движок ведёт счётчик необработанных клеток)"""
+        return self.engine.is_complete()
+
+    def display_maze_css(self, heatmap=None, view=None):
+        """Создает CSS Grid для лабиринта.
+
+        heatmap — ключ поля расстояний для тепловой карты, view — видимая часть
+        (x0, y0, ширина, высота), по умолчанию вся карта.
+        """
+        x0, y0, view_width, view_height = view or (0, 0, self.width, self.height)
+        css = """
+        <style>
+        .maze-container {
+            display: grid;
+            grid-template-columns: repeat(5, 80px);
+            grid-template-rows: repeat(5, 80px);
+            gap: 5px;
+            margin: 20px auto;
+            width: fit-content;
+            background-color: #f0f0f0;
+            padding: 15px;
+            border-radius: 10px;
+            border: 3px solid #333;
+        }
+        .maze-cell {
+            width: 80px;
+            height: 80px;
+            border: 2px solid #666;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 40px;
+            font-weight: bold;
+            border-radius: 5px;
+            position: relative;
+        }
+        .cell-coords {
+            position: absolute;
+            bottom: 2px;
+            right: 2px;
+            font-size: 10px;
+            color: #666;
+        }
+        .robot-overlay {
+            position: absolute;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 45px;
+            z-index: 2;
+        }
+        .finish-cell {
+            outline: 3px solid #00FF00;
+            outline-offset: -3px;
+        }
+        .heat-overlay {
+            position: absolute;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+            opacity: 0.45;
+            border-radius: 3px;
+            z-index: 1;
+        }
+        .cell-distance {
+            position: absolute;
+            top: 2px;
+            left: 4px;
+            font-size: 11px;
+            color: #000;
+            z-index: 3;
+        }
+        .unreachable-cell {
+            outline: 3px dashed #400000;
+            outline-offset: -3px;
+            opacity: 0.5;
+        }
+        </style>
+        """
+
+        # Для карт больше 5x5 уменьшаем клетки, чтобы лабиринт помещался на экран
+        cell_size = max(28, min(80, 440 // max(view_width, view_height)))
+        if (view_width, view_height) != (5, 5):
+            css += f"""
+        <style>
+        .maze-container {{
+            grid-template-columns: repeat({view_width}, {cell_size}px);
+            grid-template-rows: repeat({view_height}, {cell_size}px);
+        }}
+        .maze-cell {{ width: {cell_size}px; height: {cell_size}px; font-size: {cell_size // 2}px; }}
+        .robot-overlay {{ font-size: {cell_size * 9 // 16}px; }}
+        </style>
+        """
+
+        html = css + '<div class="maze-container">'
+        unreachable = set(self.unreachable_cells((x0, y0, x0 + view_width, y0 + view_height)))
+
+        field = None
+        if heatmap in FIELD_SOURCES:
+            field = self.get_distance_field(heatmap)
+            max_distance = field.max_distance()
+
+        for y in range(y0 + view_height - 1, y0 - 1, -1):
+            for x in range(x0, x0 + view_width):
+                cell_type = self.cell(x, y)
+                has_robot = (x == self.robot_x and y == self.robot_y)
+                is_finish = (cell_type == "finish")
+                color = self.get_cell_color(cell_type)
+                text = self.get_cell_text(cell_type)
+
+                text_color = cells.WEB_TEXT_COLORS[cells.code_of(cell_type)]
+
+                cell_class = "maze-cell"
+                if is_finish:
+                    cell_class += " finish-cell"
+                title = f"{self.get_cell_name(cell_type)} ({x},{y})"
+                if (x, y) in unreachable:
+                    cell_class += " unreachable-cell"
+                    title += " — недостижима"
+
+                html += f'<div class="{cell_class}" style="background-color:{color};color:{text_color}" title="{title}">{text}<div class="cell-coords">({x},{y})</div>'
+
+                if field is not None:
+                    distance = field.distance(x, y)
+                    heat = heat_color(distance, max_distance)
+                    if heat:
+                        html += f'<div class="heat-overlay" style="background-color:{heat}"></div>'
+                        html += f'<div class="cell-distance">{distance}</div>'
+
+                if has_robot:
+                    html += f'<div class="robot-overlay">🤖</div>'
+
+                html += '</div>'
+
+        html += '</div>'
+        return html
+
+    def minimap_html(self, view):
+        """Мини-карта: PNG всей карты, рамка видимой части и робот"""
+        minimap = self.get_minimap()
+        minimap.update()
+        scale = max(1, MINIMAP_PIXELS // max(minimap.map_width, minimap.map_height))
+        width, height = minimap.map_width * scale, minimap.map_height * scale
+        image = base64.b64encode(minimap.to_png()).decode("ascii")
+
+        def box(left, bottom, right, top):
+            """Прямоугольник в клетках карты -> CSS в процентах мини-карты"""
+            return (f"left:{100 * left / self.width:.2f}%;top:{100 * (1 - top / self.height):.2f}%;"
+                    f"width:{100 * (right - left) / self.width:.2f}%;height:{100 * (top - bottom) / self.height:.2f}%")
+
+        x0, y0, view_width, view_height = view
+        html = (f'<div style="position:relative;width:{width}px;height:{height}px;margin:10px auto;'
+                f'border:2px solid #333">'
+                f'<img src="data:image/png;base64,{image}" style="width:100%;height:100%;image-rendering:pixelated">'
+                f'<div style="position:absolute;{box(x0, y0, x0 + view_width, y0 + view_height)};'
+                f'border:2px solid #00BFFF;box-sizing:border-box"></div>'
+                f'<div style="position:absolute;{box(self.robot_x, self.robot_y, self.robot_x + 1, self.robot_y + 1)};'
+                f'min-width:6px;min-height:6px;background:#0000FF;border-radius:50%"></div>')
+
+        return html + '</div>'